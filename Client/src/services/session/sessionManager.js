@@ -1,8 +1,10 @@
 /**
  * Session Manager with WebSocket Support
  *
- * Clean, event-driven session management with real-time countdown from server.
- * No client-side timers - server is source of truth for all session state.
+ * Clean, event-driven session management with a countdown driven by the server.
+ * The server pushes status only when the session changes or crosses a warning
+ * threshold; between pushes the display ticks down locally. Expiry is always
+ * decided by the server.
  *
  * Features:
  * - WebSocket connection for real-time status updates
@@ -54,6 +56,10 @@ class SessionManager {
     this.activityDebounceTimer = null
     this.activityDebounceDelay = 1000 // 1 second
 
+    // Local display countdown between server status pushes
+    this.countdownTimer = null
+    this.countdownDeadline = null
+
     // Setup cleanup on page unload/refresh
     this._setupUnloadHandler()
 
@@ -288,6 +294,8 @@ class SessionManager {
       this.activityDebounceTimer = null
     }
 
+    this._stopCountdown()
+
     console.log('[SessionManager] Session reset')
   }
 
@@ -355,6 +363,8 @@ class SessionManager {
    * Disconnect WebSocket
    */
   _disconnectWebSocket() {
+    this._stopCountdown()
+
     if (this.ws) {
       try {
         this.ws.close()
@@ -389,6 +399,7 @@ class SessionManager {
         if (!this.isProcessing) {
           this._notifyStatusUpdate()
         }
+        this._startCountdown(data.remaining_seconds)
         break
 
       case 'session_expired':
@@ -409,6 +420,43 @@ class SessionManager {
     }
   }
 
+  /**
+   * Tick the displayed countdown locally until the next server push
+   */
+  _startCountdown(remainingSeconds) {
+    this._stopCountdown()
+    this.countdownDeadline = Date.now() + remainingSeconds * 1000
+
+    this.countdownTimer = setInterval(() => {
+      // Warning flags and expiry still come from the server
+      const remaining = Math.max(0, Math.round((this.countdownDeadline - Date.now()) / 1000))
+      this.sessionStatus = {
+        ...this.sessionStatus,
+        remainingSeconds: remaining,
+        minutes: Math.floor(remaining / 60),
+        seconds: remaining % 60
+      }
+
+      if (!this.isProcessing) {
+        this._notifyStatusUpdate()
+      }
+      if (remaining === 0) {
+        this._stopCountdown()
+      }
+    }, 1000)
+  }
+
+  /**
+   * Stop the local countdown
+   */
+  _stopCountdown() {
+    if (this.countdownTimer) {
+      clearInterval(this.countdownTimer)
+      this.countdownTimer = null
+    }
+    this.countdownDeadline = null
+  }
+
   /**
    * Send activity ping to server via WebSocket
    */
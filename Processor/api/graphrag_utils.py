@@ -6,10 +6,13 @@ Helper functions for data loading, processing, and search operations
 import logging
 import json
 import os
+import re
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Iterable
+from collections import defaultdict
+from contextvars import ContextVar
 from pathlib import Path
 from graphrag import api
 
@@ -164,6 +167,9 @@ def load_graphrag_data_from_master() -> Dict[str, Any]:
 
         config = _create_mock_config()
 
+        context_index = build_context_index(entities_df, community_reports_df, text_units_df)
+        entity_embedding_dim = _detect_entity_embedding_dim(entities_df, config)
+
         logger.info("✅ Master GraphRAG data loaded successfully")
 
         return {
@@ -173,7 +179,9 @@ def load_graphrag_data_from_master() -> Dict[str, Any]:
             "community_reports": community_reports_df,
             "text_units": text_units_df,
             "relationships": relationships_df,
-            "documents": documents_df
+            "documents": documents_df,
+            "context_index": context_index,
+            "entity_embedding_dim": entity_embedding_dim
         }
 
     except Exception as e:
@@ -258,6 +266,215 @@ def _create_mock_config():
     return config
 
 
+# ============================================================================
+# CONTEXT RELEVANCE INDEX
+# ============================================================================
+
+_TOKEN_RE = re.compile(r'\w+')
+
+_STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'about', 'what', 'which', 'who', 'when', 'where', 'why', 'how'}
+
+
+class TableTokenIndex:
+    """
+    Inverted index from lowercase tokens to row positions of one master table.
+
+    Context rows are resolved to master rows through a lookup key (entity name,
+    report title or stripped chunk text), so filtering a search context is a
+    vocabulary scan plus array lookups instead of per-row string matching.
+    """
+
+    def __init__(self, keys: Iterable[str], texts: Iterable[str]):
+        self.key_to_row: Dict[str, int] = {}
+        postings = defaultdict(list)
+        size = 0
+        for row, (key, text) in enumerate(zip(keys, texts)):
+            self.key_to_row.setdefault(key, row)
+            for token in set(_TOKEN_RE.findall(text.lower())):
+                postings[token].append(row)
+            size = row + 1
+
+        self.size = size
+        self.vocabulary = np.array(list(postings.keys()), dtype=str)
+        self.postings = [np.asarray(rows, dtype=np.int64) for rows in postings.values()]
+
+    def match_rows(self, keywords: Iterable[str]) -> np.ndarray:
+        """Boolean array over master rows containing any keyword (substring of a token)"""
+        matched = np.zeros(self.size, dtype=bool)
+        if len(self.vocabulary) == 0:
+            return matched
+        for keyword in keywords:
+            for token_idx in np.flatnonzero(np.char.find(self.vocabulary, keyword) >= 0):
+                matched[self.postings[token_idx]] = True
+        return matched
+
+
+def _column_text(df: pd.DataFrame, *columns: str) -> pd.Series:
+    """Space-joined string view of the given columns (missing columns count as empty)"""
+    text = pd.Series('', index=df.index, dtype=object)
+    for column in columns:
+        if column in df.columns:
+            text = text + ' ' + df[column].fillna('').astype(str)
+    return text
+
+
+def build_context_index(
+    entities_df: pd.DataFrame,
+    community_reports_df: pd.DataFrame,
+    text_units_df: pd.DataFrame
+) -> Dict[str, TableTokenIndex]:
+    """Build token indexes over entity, report and text unit text for context filtering"""
+    index = {}
+    try:
+        if not entities_df.empty and 'title' in entities_df.columns:
+            index["entities"] = TableTokenIndex(
+                entities_df['title'].fillna('').astype(str).str.strip().str.upper(),
+                _column_text(entities_df, 'title', 'description')
+            )
+
+        if not community_reports_df.empty and 'title' in community_reports_df.columns:
+            content_column = 'full_content' if 'full_content' in community_reports_df.columns else 'summary'
+            index["reports"] = TableTokenIndex(
+                community_reports_df['title'].fillna('').astype(str).str.strip(),
+                _column_text(community_reports_df, 'title', content_column)
+            )
+
+        if not text_units_df.empty and 'text' in text_units_df.columns:
+            texts = text_units_df['text'].fillna('').astype(str)
+            index["sources"] = TableTokenIndex(texts.str.strip(), texts)
+
+        logger.info(f"🗂️ Built context index: " +
+                    ", ".join(f"{name} ({len(idx.vocabulary)} tokens)" for name, idx in index.items()))
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to build context index, filtering will scan context text: {e}")
+    return index
+
+
+def _relevance_mask(
+    df: pd.DataFrame,
+    keys: pd.Series,
+    text: pd.Series,
+    table_index: Optional[TableTokenIndex],
+    keywords: set,
+    pattern: str
+) -> pd.Series:
+    """Rows relevant to the keywords, resolved via the index with a vectorized text fallback"""
+    mask = pd.Series(False, index=df.index)
+    unresolved = pd.Series(True, index=df.index)
+
+    if table_index is not None:
+        rows = np.fromiter((table_index.key_to_row.get(key, -1) for key in keys),
+                           dtype=np.int64, count=len(keys))
+        resolved = rows >= 0
+        if resolved.any():
+            matched = table_index.match_rows(keywords)
+            mask[resolved] = matched[rows[resolved]]
+        unresolved = pd.Series(~resolved, index=df.index)
+
+    if unresolved.any():
+        mask[unresolved] = text[unresolved].str.lower().str.contains(pattern, regex=True)
+
+    return mask
+
+
+# ============================================================================
+# PRE-COMPUTED QUERY EMBEDDINGS
+# ============================================================================
+
+# Name graphrag's local search engine registers its embedding model under
+LOCAL_SEARCH_EMBEDDING_MODEL = "local_search_embedding"
+
+# (query, vector) supplied by the caller for the local search running in this task
+_supplied_query_embedding: ContextVar[Optional[Tuple[str, List[float]]]] = ContextVar(
+    "supplied_query_embedding", default=None
+)
+
+
+class SuppliedQueryEmbedder:
+    """
+    Embedding model wrapper that answers the current query from a supplied vector.
+
+    Local search embeds the query once to find matching entities. When the caller
+    already embedded the same query, that vector is returned instead of making
+    another embedding call; any other text goes to the wrapped model.
+    """
+
+    def __init__(self, delegate):
+        self.delegate = delegate
+
+    def _lookup(self, text: str) -> Optional[List[float]]:
+        supplied = _supplied_query_embedding.get()
+        if supplied is not None and supplied[0] == text:
+            return list(supplied[1])
+        return None
+
+    def embed(self, text: str, **kwargs) -> List[float]:
+        vector = self._lookup(text)
+        return vector if vector is not None else self.delegate.embed(text, **kwargs)
+
+    async def aembed(self, text: str, **kwargs) -> List[float]:
+        vector = self._lookup(text)
+        return vector if vector is not None else await self.delegate.aembed(text, **kwargs)
+
+    def embed_batch(self, text_list: List[str], **kwargs) -> List[List[float]]:
+        return self.delegate.embed_batch(text_list, **kwargs)
+
+    async def aembed_batch(self, text_list: List[str], **kwargs) -> List[List[float]]:
+        return await self.delegate.aembed_batch(text_list, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.delegate, name)
+
+
+def _install_supplied_query_embedder(config: Dict[str, Any]) -> bool:
+    """Wrap graphrag's local search embedding model so supplied query vectors are used"""
+    try:
+        from graphrag.language_model.manager import ModelManager
+        from graphrag.config.models.language_model_config import LanguageModelConfig
+
+        manager = ModelManager()
+        current = manager.embedding_models.get(LOCAL_SEARCH_EMBEDDING_MODEL)
+        if isinstance(current, SuppliedQueryEmbedder):
+            return True
+
+        if current is None:
+            model_id = config["local_search"]["embedding_model_id"]
+            settings = LanguageModelConfig(**config["models"][model_id])
+            current = manager.get_or_create_embedding_model(
+                name=LOCAL_SEARCH_EMBEDDING_MODEL,
+                model_type=settings.type,
+                config=settings,
+            )
+
+        manager.embedding_models[LOCAL_SEARCH_EMBEDDING_MODEL] = SuppliedQueryEmbedder(current)
+        logger.info("✅ Local search will reuse pre-computed query embeddings")
+        return True
+
+    except Exception as e:
+        logger.warning(f"⚠️ Could not install pre-computed query embedder: {e}")
+        return False
+
+
+def _detect_entity_embedding_dim(entities_df: pd.DataFrame, config: Dict[str, Any]) -> Optional[int]:
+    """Dimension of the entity description embeddings used for local search entity lookup"""
+    try:
+        if not entities_df.empty and 'description_embedding' in entities_df.columns:
+            for vector in entities_df['description_embedding']:
+                if isinstance(vector, (list, np.ndarray)) and len(vector) > 0:
+                    return len(vector)
+
+        store = config["vector_store"]["default_vector_store"]
+        import lancedb
+        db = lancedb.connect(store["db_uri"])
+        table_name = f"{store['container_name']}-entity-description"
+        if table_name in db.table_names():
+            vector_type = db.open_table(table_name).schema.field("vector").type
+            return vector_type.list_size if vector_type.list_size > 0 else None
+    except Exception as e:
+        logger.debug(f"Could not detect entity embedding dimension: {e}")
+    return None
+
+
 # ============================================================================
 # GRAPHRAG DATA CACHE
 # ============================================================================
@@ -348,23 +565,33 @@ async def graphrag_local_search_with_response(
             config["models"]["query_chat_model"]["model"] = "qwen2.5:0.5b"
             config["models"]["query_chat_model"]["max_tokens"] = 2000
 
+        supplied_token = None
         if query_embedding:
-            logger.info(f"✅ Pre-computed embedding provided ({len(query_embedding)} dims)")
-            logger.warning("⚠️ Note: GraphRAG library doesn't support pre-computed embeddings yet - will generate embedding internally")
+            expected_dim = graphrag_data.get("entity_embedding_dim")
+            if expected_dim and len(query_embedding) == expected_dim and _install_supplied_query_embedder(config):
+                supplied_token = _supplied_query_embedding.set((query, list(query_embedding)))
+                logger.info(f"✅ Using pre-computed embedding for entity lookup ({len(query_embedding)} dims)")
+            else:
+                logger.info(f"ℹ️ Pre-computed embedding has {len(query_embedding)} dims, entity index expects "
+                            f"{expected_dim or 'unknown'} - embedding query internally")
 
         logger.info("🔨 Building context from knowledge graph and generating LLM response...")
-        llm_response, context = await api.local_search(
-            config=config,
-            entities=graphrag_data["entities"],
-            communities=graphrag_data["communities"],
-            community_reports=graphrag_data["community_reports"],
-            text_units=graphrag_data["text_units"],
-            relationships=graphrag_data["relationships"],
-            covariates=graphrag_data.get("covariates"),
-            community_level=community_level,
-            response_type=response_type,
-            query=query,
-        )
+        try:
+            llm_response, context = await api.local_search(
+                config=config,
+                entities=graphrag_data["entities"],
+                communities=graphrag_data["communities"],
+                community_reports=graphrag_data["community_reports"],
+                text_units=graphrag_data["text_units"],
+                relationships=graphrag_data["relationships"],
+                covariates=graphrag_data.get("covariates"),
+                community_level=community_level,
+                response_type=response_type,
+                query=query,
+            )
+        finally:
+            if supplied_token is not None:
+                _supplied_query_embedding.reset(supplied_token)
 
         logger.info(f"✅ Context and LLM response retrieved")
 
@@ -376,7 +603,7 @@ async def graphrag_local_search_with_response(
         )
 
         # Filter context by query to remove irrelevant results
-        context = filter_context_by_query(context, query)
+        context = filter_context_by_query(context, query, graphrag_data.get("context_index"))
 
         titles = extract_document_titles_from_context(
             context.get("sources", pd.DataFrame()),
@@ -694,15 +921,19 @@ def add_document_names_to_context(
         return context
 
 
-def filter_context_by_query(context: Dict[str, Any], query: str) -> Dict[str, Any]:
+def filter_context_by_query(
+    context: Dict[str, Any],
+    query: str,
+    context_index: Optional[Dict[str, TableTokenIndex]] = None
+) -> Dict[str, Any]:
     """
     Filter context to only include results relevant to the query
     This helps when embeddings are missing and all communities are returned
     """
     try:
         # Extract query keywords (lowercase, remove common words)
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'about', 'what', 'which', 'who', 'when', 'where', 'why', 'how'}
-        query_keywords = set(word.lower() for word in query.split() if word.lower() not in stop_words and len(word) > 2)
+        query_keywords = set(word for word in _TOKEN_RE.findall(query.lower())
+                             if word not in _STOP_WORDS and len(word) > 2)
 
         if not query_keywords:
             logger.info("⚠️ No meaningful keywords in query, returning unfiltered results")
@@ -710,16 +941,21 @@ def filter_context_by_query(context: Dict[str, Any], query: str) -> Dict[str, An
 
         logger.info(f"🔍 Filtering results by query keywords: {query_keywords}")
 
+        context_index = context_index or {}
+        pattern = "|".join(re.escape(keyword) for keyword in query_keywords)
+
         # Filter reports
         reports_df = context.get("reports", pd.DataFrame())
         if isinstance(reports_df, pd.DataFrame) and not reports_df.empty:
-            def is_relevant_report(row):
-                text = f"{row.get('title', '')} {row.get('content', '')}".lower()
-                # A report is relevant if it mentions any query keyword
-                return any(keyword in text for keyword in query_keywords)
-
-            mask = reports_df.apply(is_relevant_report, axis=1)
-            relevant_count = mask.sum()
+            mask = _relevance_mask(
+                reports_df,
+                _column_text(reports_df, 'title').str.strip(),
+                _column_text(reports_df, 'title', 'content'),
+                context_index.get("reports"),
+                query_keywords,
+                pattern
+            )
+            relevant_count = int(mask.sum())
             total_count = len(reports_df)
 
             if relevant_count < total_count:
@@ -729,55 +965,52 @@ def filter_context_by_query(context: Dict[str, Any], query: str) -> Dict[str, An
         # Filter entities
         entities_df = context.get("entities", pd.DataFrame())
         if isinstance(entities_df, pd.DataFrame) and not entities_df.empty:
-            def is_relevant_entity(row):
-                text = f"{row.get('entity', '')} {row.get('description', '')}".lower()
-                return any(keyword in text for keyword in query_keywords)
-
-            mask = entities_df.apply(is_relevant_entity, axis=1)
-            relevant_entity_ids = set(entities_df[mask]['id'].astype(str).tolist()) if 'id' in entities_df.columns else set()
-
-            relevant_count = mask.sum()
+            mask = _relevance_mask(
+                entities_df,
+                _column_text(entities_df, 'entity').str.strip().str.upper(),
+                _column_text(entities_df, 'entity', 'description'),
+                context_index.get("entities"),
+                query_keywords,
+                pattern
+            )
+            relevant_count = int(mask.sum())
             total_count = len(entities_df)
 
             if relevant_count < total_count and relevant_count > 0:
                 context["entities"] = entities_df[mask].copy()
                 logger.info(f"🔍 Filtered entities: {relevant_count}/{total_count} relevant to query")
-            else:
-                relevant_entity_ids = set(entities_df['id'].astype(str).tolist()) if 'id' in entities_df.columns else set()
-        else:
-            relevant_entity_ids = set()
 
         # Filter relationships (only keep those connecting relevant entities)
         relationships_df = context.get("relationships", pd.DataFrame())
-        if isinstance(relationships_df, pd.DataFrame) and not relationships_df.empty and relevant_entity_ids:
-            # Get entity names from relevant entities
-            entities_df = context.get("entities", pd.DataFrame())
-            if isinstance(entities_df, pd.DataFrame) and not entities_df.empty and 'entity' in entities_df.columns:
-                relevant_entity_names = set(entities_df['entity'].str.upper().tolist())
-
-                def is_relevant_relationship(row):
-                    source = str(row.get('source', '')).upper()
-                    target = str(row.get('target', '')).upper()
-                    # Keep relationship if either source or target is a relevant entity
-                    return source in relevant_entity_names or target in relevant_entity_names
-
-                mask = relationships_df.apply(is_relevant_relationship, axis=1)
-                relevant_count = mask.sum()
-                total_count = len(relationships_df)
-
-                if relevant_count < total_count and relevant_count > 0:
-                    context["relationships"] = relationships_df[mask].copy()
-                    logger.info(f"🔍 Filtered relationships: {relevant_count}/{total_count} relevant to query")
+        entities_df = context.get("entities", pd.DataFrame())
+        if (isinstance(relationships_df, pd.DataFrame) and not relationships_df.empty
+                and isinstance(entities_df, pd.DataFrame) and not entities_df.empty
+                and 'entity' in entities_df.columns):
+            relevant_entity_names = entities_df['entity'].astype(str).str.upper().unique()
+            source = _column_text(relationships_df, 'source').str.strip().str.upper()
+            target = _column_text(relationships_df, 'target').str.strip().str.upper()
+            # Keep relationship if either source or target is a relevant entity
+            mask = source.isin(relevant_entity_names) | target.isin(relevant_entity_names)
+            relevant_count = int(mask.sum())
+            total_count = len(relationships_df)
+
+            if relevant_count < total_count and relevant_count > 0:
+                context["relationships"] = relationships_df[mask].copy()
+                logger.info(f"🔍 Filtered relationships: {relevant_count}/{total_count} relevant to query")
 
         # Filter sources (text chunks)
         sources_df = context.get("sources", pd.DataFrame())
         if isinstance(sources_df, pd.DataFrame) and not sources_df.empty:
-            def is_relevant_source(row):
-                text = str(row.get('text', '')).lower()
-                return any(keyword in text for keyword in query_keywords)
-
-            mask = sources_df.apply(is_relevant_source, axis=1)
-            relevant_count = mask.sum()
+            text = _column_text(sources_df, 'text')
+            mask = _relevance_mask(
+                sources_df,
+                text.str.strip(),
+                text,
+                context_index.get("sources"),
+                query_keywords,
+                pattern
+            )
+            relevant_count = int(mask.sum())
             total_count = len(sources_df)
 
             if relevant_count < total_count and relevant_count > 0:
@@ -10,8 +10,8 @@ Provides:
 - Webhook handling for MinIO events
 """
 
-from fastapi import FastAPI, Query
-from typing import Optional, Dict, Any
+from fastapi import FastAPI, Query, HTTPException
+from typing import Optional, Dict, Any, BinaryIO
 from datetime import datetime
 import asyncio
 import uuid
@@ -148,7 +148,7 @@ class BackgroundTaskManager:
 task_manager = BackgroundTaskManager()
 
 
-async def background_document_processor(task_id: str, document_content: bytes, filename: str,
+async def background_document_processor(task_id: str, document_stream: BinaryIO, filename: str,
                                        bucket: str, include_chunking: bool, include_summarization: bool,
                                        include_graphrag: bool, include_stp: bool, get_services_func):
     """Background document processing task with STP support"""
@@ -159,7 +159,7 @@ async def background_document_processor(task_id: str, document_content: bytes, f
         from processors.pipeline import processor
 
         result = await processor.process_document(
-            document_content, filename, bucket,
+            document_stream, filename, bucket,
             include_chunking, include_summarization, include_graphrag, include_stp
         )
 
@@ -169,12 +169,14 @@ async def background_document_processor(task_id: str, document_content: bytes, f
     except Exception as e:
         logger.error(f"❌ Background processing failed for {filename}: {e}")
         raise
+    finally:
+        document_stream.close()
 
 
 async def background_batch_processor(task_id: str, batch_processor, skip_processed: bool,
                                    include_graphrag: bool, include_chunking: bool,
                                    include_summarization: bool, include_stp: bool,
-                                   max_documents_per_bucket: Optional[int]):
+                                   max_documents_per_bucket: Optional[int], incremental: bool = False):
     """Background batch processing task with STP support"""
     try:
         task_manager.mark_task_started(task_id)
@@ -182,7 +184,7 @@ async def background_batch_processor(task_id: str, batch_processor, skip_process
 
         result = await batch_processor.process_all_buckets(
             skip_processed, include_graphrag, include_chunking,
-            include_summarization, include_stp, max_documents_per_bucket
+            include_summarization, include_stp, max_documents_per_bucket, incremental
         )
 
         logger.info(f"✅ Background batch processing completed")
@@ -195,7 +197,8 @@ async def background_batch_processor(task_id: str, batch_processor, skip_process
 
 async def background_bucket_processor(task_id: str, batch_processor, bucket: str, skip_processed: bool,
                                     include_chunking: bool, include_summarization: bool,
-                                    include_graphrag: bool, include_stp: bool, max_documents: Optional[int]):
+                                    include_graphrag: bool, include_stp: bool, max_documents: Optional[int],
+                                    incremental: bool = False):
     """Background bucket processing task with STP support"""
     try:
         task_manager.mark_task_started(task_id)
@@ -203,7 +206,7 @@ async def background_bucket_processor(task_id: str, batch_processor, bucket: str
 
         result = await batch_processor.process_bucket(
             bucket, skip_processed, include_graphrag,
-            include_chunking, include_summarization, include_stp, max_documents
+            include_chunking, include_summarization, include_stp, max_documents, incremental
         )
 
         logger.info(f"✅ Background bucket processing completed for {bucket}")
@@ -233,15 +236,17 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
         try:
             services = get_services_func()
 
-            # Get document from MinIO
-            document_content = services.minio.get_document(request.bucket, request.filename)
+            # Stream document from MinIO into a spooled temp file (off the event loop)
+            document_stream = await asyncio.get_running_loop().run_in_executor(
+                None, services.minio.get_document_stream, request.bucket, request.filename
+            )
 
             # Create background task
             task_id = str(uuid.uuid4())
             task_manager.create_task(
                 task_id,
                 background_document_processor(
-                    task_id, document_content, request.filename, request.bucket,
+                    task_id, document_stream, request.filename, request.bucket,
                     request.include_chunking, request.include_summarization,
                     request.include_graphrag, include_stp, get_services_func
                 ),
@@ -346,7 +351,8 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
                 background_batch_processor(
                     task_id, services.batch_processor, request.skip_processed,
                     request.include_graphrag, request.include_chunking,
-                    request.include_summarization, include_stp, request.max_documents_per_bucket
+                    request.include_summarization, include_stp, request.max_documents_per_bucket,
+                    request.incremental
                 ),
                 "batch_processing_all",
                 {
@@ -356,7 +362,8 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
                         "include_summarization": request.include_summarization,
                         "include_graphrag": request.include_graphrag,
                         "include_stp": include_stp,
-                        "max_documents_per_bucket": request.max_documents_per_bucket
+                        "max_documents_per_bucket": request.max_documents_per_bucket,
+                        "incremental": request.incremental
                     }
                 }
             )
@@ -398,7 +405,8 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
                 background_bucket_processor(
                     task_id, services.batch_processor, request.bucket, request.skip_processed,
                     request.include_chunking, request.include_summarization,
-                    request.include_graphrag, include_stp, request.max_documents
+                    request.include_graphrag, include_stp, request.max_documents,
+                    request.incremental
                 ),
                 "bucket_processing",
                 {
@@ -409,7 +417,8 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
                         "include_summarization": request.include_summarization,
                         "include_graphrag": request.include_graphrag,
                         "include_stp": include_stp,
-                        "max_documents": request.max_documents
+                        "max_documents": request.max_documents,
+                        "incremental": request.incremental
                     }
                 }
             )
@@ -490,7 +499,8 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
             if not queue:
                 APIResponse.error("Processing queue unavailable", 503)
 
-            task_id = await queue.add_task(request.bucket, request.filename, request.file_path)
+            task_id = await queue.add_task(request.bucket, request.filename, request.file_path,
+                                           priority=request.priority)
 
             if task_id:
                 return APIResponse.success({
@@ -674,8 +684,11 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
 
             import json
             import urllib.parse
+            from services.queue import QueueFullError
 
             processed_files = []
+            rejected_files = []
+            minio_service = get_services_func().minio
 
             for record in request.get("Records", []):
                 try:
@@ -686,6 +699,14 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
 
                     object_key = urllib.parse.unquote_plus(object_key_encoded)
 
+                    # Keep the filename -> key index current so queued filenames resolve without a scan.
+                    # Updating it touches the snapshot and journal on disk, so it runs off the event loop.
+                    if minio_service and bucket and object_key and event_name.startswith(("s3:ObjectCreated:", "s3:ObjectRemoved:")):
+                        await asyncio.get_running_loop().run_in_executor(
+                            None, minio_service.record_object_event,
+                            bucket, object_key, event_name.startswith("s3:ObjectCreated:")
+                        )
+
                     if not event_name.startswith("s3:ObjectCreated:"):
                         continue
 
@@ -701,8 +722,13 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
 
                     filename = object_key.split('/')[-1] if '/' in object_key else object_key
 
-                    # Add to processing queue
-                    task_id = await queue.add_task(bucket, filename, object_key)
+                    # Add to processing queue (subject to backlog backpressure)
+                    try:
+                        task_id = await queue.add_task(bucket, filename, object_key, apply_backpressure=True)
+                    except QueueFullError as e:
+                        logger.warning(f"⏳ Rejected webhook file {filename}: {e}")
+                        rejected_files.append(object_key)
+                        continue
 
                     if enable_stp and task_id:
                         logger.info(f"🎯 STP processing enabled for webhook file: {filename}")
@@ -712,7 +738,7 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
                         "filename": filename,
                         "object_key": object_key,
                         "task_id": task_id,
-                        "status": "queued" if task_id else "skipped",
+                        "status": queue.get_task_status(task_id)["status"] if task_id else "skipped",
                         "stp_enabled": enable_stp
                     })
 
@@ -720,12 +746,22 @@ def setup_processing_routes(app: FastAPI, get_services_func, get_queue_func):
                     logger.error(f"Error processing event record: {e}")
                     continue
 
+            if rejected_files:
+                # Non-2xx makes MinIO redeliver the event; files already queued are deduplicated
+                APIResponse.error(
+                    f"Processing backlog full, rejected {len(rejected_files)} files",
+                    503,
+                    {"rejected_files": rejected_files, "queue_status": queue.get_queue_status()}
+                )
+
             return APIResponse.success({
                 "processed_files": processed_files,
                 "queue_status": queue.get_queue_status(),
                 "stp_enabled": enable_stp
             }, f"Processed {len(processed_files)} files from event")
 
+        except HTTPException:
+            raise
         except Exception as e:
             APIResponse.error(f"Webhook processing failed: {str(e)}", 500)
 
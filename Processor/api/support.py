@@ -9,11 +9,17 @@ Provides:
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import hashlib
 import logging
+import os
+import re
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +42,14 @@ models_cache = {}
 tokenizers_cache = {}
 _executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="translation_worker")
 
+# Sentence translation cache: (source, target, sentence sha1) -> translation, LRU ordered
+_translation_cache: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+_translation_cache_lock = threading.Lock()
+
+# Split after sentence-ending punctuation (';' is the Greek question mark) and at line breaks,
+# keeping the separators so the translated text can be reassembled verbatim
+_SENTENCE_SPLIT_RE = re.compile(r'((?<=[.!?;…])\s+|\n\s*)')
+
 
 class TranslateInRequest(BaseModel):
     text: str
@@ -105,25 +119,149 @@ def load_translation_model(source_lang: str, target_lang: str):
     return model, tokenizer
 
 
-def translate_text_sync(text: str, source_lang: str, target_lang: str) -> str:
-    """Translate text from source language to target language - sync"""
-    if not text or not text.strip():
-        return text
+def _get_translation_settings() -> Dict[str, int]:
+    from config import config
+    return config.get('translation', {})
 
-    if source_lang == target_lang:
-        return text
 
-    try:
-        model, tokenizer = load_translation_model(source_lang, target_lang)
+def split_sentences(text: str, max_chars: int = 1000) -> List[Tuple[str, bool]]:
+    """
+    Split text into (segment, translatable) pairs that concatenate back to the text.
 
-        inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
+    Sentences are translatable; the whitespace and line breaks between them are
+    kept verbatim. Sentences longer than max_chars are split at word boundaries.
+    """
+    segments = []
+    for part in _SENTENCE_SPLIT_RE.split(text):
+        if not part:
+            continue
+        if not part.strip():
+            segments.append((part, False))
+            continue
+
+        leading = part[:len(part) - len(part.lstrip())]
+        trailing = part[len(part.rstrip()):]
+        if leading:
+            segments.append((leading, False))
+
+        sentence = part.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            segments.append((sentence[:cut].rstrip(), True))
+            segments.append((' ', False))
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            segments.append((sentence, True))
+
+        if trailing:
+            segments.append((trailing, False))
+    return segments
+
+
+def _translation_cache_key(source_lang: str, target_lang: str, sentence: str) -> Tuple[str, str, str]:
+    return source_lang, target_lang, hashlib.sha1(sentence.encode('utf-8')).hexdigest()
+
+
+def _get_cached_translations(keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], str]:
+    found = {}
+    with _translation_cache_lock:
+        for key in keys:
+            translated = _translation_cache.get(key)
+            if translated is not None:
+                _translation_cache.move_to_end(key)
+                found[key] = translated
+    return found
+
+
+def _cache_translations(items: Dict[Tuple[str, str, str], str], max_size: int):
+    with _translation_cache_lock:
+        for key, translated in items.items():
+            _translation_cache[key] = translated
+            _translation_cache.move_to_end(key)
+        while len(_translation_cache) > max_size:
+            _translation_cache.popitem(last=False)
+
+
+def _generate_translations(model, tokenizer, sentences: List[str]) -> List[str]:
+    """Translate a batch of sentences with a single generate call"""
+    import torch
+
+    inputs = tokenizer(sentences, return_tensors="pt", padding=True, truncation=True, max_length=512)
+    with torch.inference_mode():
         translated = model.generate(**inputs)
-        translated_text = tokenizer.decode(translated[0], skip_special_tokens=True)
+    return tokenizer.batch_decode(translated, skip_special_tokens=True)
 
-        return translated_text
-    except Exception as e:
-        logger.error(f"Translation error: {str(e)}")
-        return text
+
+def translate_texts_sync(texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+    """
+    Translate several texts in sentence batches - sync.
+
+    Sentences from all texts are deduplicated, looked up in the translation
+    cache, and the misses are length-sorted and translated batch by batch.
+    """
+    if source_lang == target_lang:
+        return list(texts)
+
+    settings = _get_translation_settings()
+    batch_size = max(1, settings.get('batch_size', 16))
+
+    segmented = [
+        split_sentences(text, settings.get('max_sentence_chars', 1000))
+        if isinstance(text, str) and text.strip() else None
+        for text in texts
+    ]
+
+    keys = {}
+    for segments in segmented:
+        for segment, translatable in segments or []:
+            if translatable and segment not in keys:
+                keys[segment] = _translation_cache_key(source_lang, target_lang, segment)
+
+    if not keys:
+        return list(texts)
+
+    translations = _get_cached_translations(list(keys.values()))
+    pending = sorted((s for s, key in keys.items() if key not in translations), key=len)
+
+    if pending:
+        try:
+            model, tokenizer = load_translation_model(source_lang, target_lang)
+            new_translations = {}
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                for sentence, translated in zip(batch, _generate_translations(model, tokenizer, batch)):
+                    new_translations[keys[sentence]] = translated
+            _cache_translations(new_translations, settings.get('cache_size', 10000))
+            translations.update(new_translations)
+        except Exception as e:
+            logger.error(f"Translation error: {str(e)}")
+
+        logger.info(f"Translated {len(pending)} sentences {source_lang} -> {target_lang} "
+                    f"({len(keys) - len(pending)} from cache)")
+
+    results = []
+    for text, segments in zip(texts, segmented):
+        if segments is None:
+            results.append(text)
+            continue
+        results.append(''.join(
+            translations.get(keys[segment], segment) if translatable else segment
+            for segment, translatable in segments
+        ))
+    return results
+
+
+def translate_text_sync(text: str, source_lang: str, target_lang: str) -> str:
+    """Translate text from source language to target language - sync"""
+    return translate_texts_sync([text], source_lang, target_lang)[0]
+
+
+async def translate_texts(texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+    """Translate several texts asynchronously in shared sentence batches"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_executor, translate_texts_sync, texts, source_lang, target_lang)
 
 
 async def translate_text(text: str, source_lang: str, target_lang: str) -> str:
@@ -188,7 +326,7 @@ async def translate_in(request: TranslateInRequest):
 
 @router.post("/translate/out")
 async def translate_out(request: TranslateOutRequest):
-    """Translate outgoing response from English to target language - PARALLEL VERSION"""
+    """Translate outgoing response from English to target language - BATCHED VERSION"""
     try:
         target_lang = request.target_lang.lower()
 
@@ -209,37 +347,33 @@ async def translate_out(request: TranslateOutRequest):
                 translated_response['social_tipping_point'] = request.social_tipping_point
             return translated_response
 
-        # Collect all translation tasks to execute in parallel
-        translation_tasks = []
+        # Collect every field so all sentences share the same translation batches
+        texts = []
         field_mapping = []
 
         if request.title:
-            translation_tasks.append(translate_text(request.title, 'en', target_lang))
+            texts.append(request.title)
             field_mapping.append(('title', None))
 
         if request.response:
-            translation_tasks.append(translate_text(request.response, 'en', target_lang))
+            texts.append(request.response)
             field_mapping.append(('response', None))
 
         if request.social_tipping_point and isinstance(request.social_tipping_point, dict):
             if 'text' in request.social_tipping_point:
-                translation_tasks.append(translate_text(request.social_tipping_point['text'], 'en', target_lang))
+                texts.append(request.social_tipping_point['text'])
                 field_mapping.append(('stp_text', None))
 
             if 'qualifying_factors' in request.social_tipping_point:
                 factors = request.social_tipping_point['qualifying_factors']
                 if isinstance(factors, list):
                     for i, factor in enumerate(factors):
-                        translation_tasks.append(translate_text(factor, 'en', target_lang))
+                        texts.append(factor)
                         field_mapping.append(('qualifying_factor', i))
 
-        # Execute all translations in parallel
-        if translation_tasks:
-            translated_results = await asyncio.gather(*translation_tasks)
-        else:
-            translated_results = []
+        translated_results = await translate_texts(texts, 'en', target_lang) if texts else []
 
-        # Build response from parallel results
+        # Build response from batched results
         translated_response = {'target_lang': target_lang}
 
         for i, (field_type, index) in enumerate(field_mapping):
@@ -258,7 +392,7 @@ async def translate_out(request: TranslateOutRequest):
                     translated_response['social_tipping_point']['qualifying_factors'] = []
                 translated_response['social_tipping_point']['qualifying_factors'].append(translated_results[i])
 
-        logger.info(f"Translated OUT: en -> {target_lang} (parallel: {len(translation_tasks)} fields)")
+        logger.info(f"Translated OUT: en -> {target_lang} (batched: {len(texts)} fields)")
 
         return translated_response
 
@@ -292,6 +426,19 @@ class STPSearchService:
         self.connection = None
         self.collection = None
         self._pymilvus_available = False
+
+        # STP uses its own embedding endpoint (use Ollama model name format: all-minilm:l6-v2)
+        stp_api_base = os.getenv('STP_EMBEDDING_API_BASE', 'http://localhost:11434')
+        self.embedding_url = f"{stp_api_base.rstrip('/')}/api/embeddings"
+        self.embedding_model = os.getenv('STP_EMBEDDING_MODEL', 'all-minilm:l6-v2')
+        self.embedding_timeout = float(config.get('ollama.timeout', 120))
+        self.max_connections = config.get('stp.search_max_connections', 20)
+        self._session = None
+
+        # Bounded pool for blocking Milvus searches so they never run on the event loop
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=config.get('stp.search_workers', 4), thread_name_prefix="stp_search"
+        )
         self._connect()
 
     def _connect(self):
@@ -345,6 +492,14 @@ class STPSearchService:
             self.connection = False
             self._pymilvus_available = False
 
+    async def cleanup(self):
+        """Close the embedding session and the search executor"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._search_executor.shutdown(wait=False)
+        logger.info("✅ STP search service closed")
+
     def health_check(self) -> bool:
         """Check STP service health"""
         if not self._pymilvus_available or not self.connection or not self.collection:
@@ -355,64 +510,69 @@ class STPSearchService:
         except Exception:
             return False
 
+    async def _get_session(self):
+        """Get or create the pooled aiohttp session for the STP embedding API"""
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.embedding_timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+        return self._session
+
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for search query using local Ollama (separate from GraphRAG)"""
-        import requests
-        import os
-        from config import config
+        import aiohttp
 
         try:
-            ollama_config = config.get('ollama')
-
             # STP uses LOCAL Ollama with sentence-transformers/all-MiniLM-L6-v2
             # This is SEPARATE from GraphRAG which uses remote API endpoints
-            # Use STP-specific config if set, otherwise default to local Ollama
-            stp_api_base = os.getenv('STP_EMBEDDING_API_BASE', 'http://localhost:11434')
-            # STP_EMBEDDING_MODEL from .env (use Ollama model name format: all-minilm:l6-v2)
-            stp_model = os.getenv('STP_EMBEDDING_MODEL', 'all-minilm:l6-v2')
+            logger.info(f"🔗 [STP] Calling local embedding API: {self.embedding_url}")
+            logger.info(f"📦 [STP] Using model: {self.embedding_model}")
 
-            # Use Ollama native API format for local embeddings
-            embedding_url = f"{stp_api_base.rstrip('/')}/api/embeddings"
-
-            logger.info(f"🔗 [STP] Calling local embedding API: {embedding_url}")
-            logger.info(f"📦 [STP] Using model: {stp_model}")
-
-            response = requests.post(
-                embedding_url,
+            session = await self._get_session()
+            async with session.post(
+                self.embedding_url,
                 json={
-                    "model": stp_model,
+                    "model": self.embedding_model,
                     "prompt": text[:4000]
-                },
-                timeout=float(ollama_config.get('timeout', 120))
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-
-                # Handle both OpenAI-compatible format and Ollama native format
-                if "data" in result and len(result["data"]) > 0:
-                    # OpenAI-compatible format: {"data": [{"embedding": [...]}]}
-                    embedding = result["data"][0].get("embedding", [])
-                else:
-                    # Ollama native format: {"embedding": [...]}
-                    embedding = result.get("embedding", [])
-
-                if not embedding:
-                    logger.error("❌ [STP] No embedding returned from API")
+                }
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"❌ [STP] Embedding API error: {response.status}")
+                    logger.error(f"❌ [STP] Response: {error_text[:500]}")
                     return [0.0] * self.embedding_dim
 
-                # Handle embedding dimension mismatch dynamically
-                if len(embedding) != self.embedding_dim:
-                    logger.info(f"📊 [STP] Embedding dimension: {len(embedding)} (expected {self.embedding_dim})")
-                    # Update expected dimension if this is first successful embedding
-                    self.embedding_dim = len(embedding)
+                result = await response.json(content_type=None)
 
-                return embedding
+            # Handle both OpenAI-compatible format and Ollama native format
+            if "data" in result and len(result["data"]) > 0:
+                # OpenAI-compatible format: {"data": [{"embedding": [...]}]}
+                embedding = result["data"][0].get("embedding", [])
             else:
-                logger.error(f"❌ [STP] Embedding API error: {response.status_code}")
-                logger.error(f"❌ [STP] Response: {response.text[:500]}")
+                # Ollama native format: {"embedding": [...]}
+                embedding = result.get("embedding", [])
+
+            if not embedding:
+                logger.error("❌ [STP] No embedding returned from API")
                 return [0.0] * self.embedding_dim
 
+            # Handle embedding dimension mismatch dynamically
+            if len(embedding) != self.embedding_dim:
+                logger.info(f"📊 [STP] Embedding dimension: {len(embedding)} (expected {self.embedding_dim})")
+                # Update expected dimension if this is first successful embedding
+                self.embedding_dim = len(embedding)
+
+            return embedding
+
+        except asyncio.TimeoutError:
+            logger.error(f"❌ [STP] Embedding generation timeout after {self.embedding_timeout}s")
+            return [0.0] * self.embedding_dim
+        except aiohttp.ClientError as e:
+            logger.error(f"❌ [STP] Embedding API request failed: {e}")
+            return [0.0] * self.embedding_dim
         except Exception as e:
             logger.error(f"❌ [STP] Embedding generation failed: {e}")
             return [0.0] * self.embedding_dim
@@ -448,12 +608,18 @@ class STPSearchService:
             logger.info(f"🔍 Searching STP documents with query: {query_text[:100]}...")
             logger.info(f"📊 Min similarity threshold: {min_similarity}")
 
-            results = self.collection.search(
-                data=[query_embedding],
-                anns_field="embedding",
-                param=search_params,
-                limit=top_k,
-                output_fields=output_fields
+            # pymilvus search is blocking; run it on the bounded search executor
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self._search_executor,
+                partial(
+                    self.collection.search,
+                    data=[query_embedding],
+                    anns_field="embedding",
+                    param=search_params,
+                    limit=top_k,
+                    output_fields=output_fields
+                )
             )
 
             formatted_results = []
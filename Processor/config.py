@@ -48,6 +48,7 @@ class Config:
             'app': self._load_app(),
             'ollama': self._load_ollama(),
             'local_embeddings': self._load_local_embeddings(),
+            'embedding_cache': self._load_embedding_cache(),
             'minio': self._load_minio(),
             'milvus': self._load_milvus(),
             'mongodb': self._load_mongodb(),
@@ -59,7 +60,8 @@ class Config:
             'climategpt': self._load_climategpt(),
             'graphrag': self._load_graphrag(),
             'stp': self._load_stp(),
-            'vision': self._load_vision()
+            'vision': self._load_vision(),
+            'translation': self._load_translation()
         }
     
     def get(self, path: str, default=None):
@@ -136,13 +138,29 @@ class Config:
             }
         }
 
+    def _load_embedding_cache(self) -> Dict[str, Any]:
+        """Configuration for the persistent ingestion embedding cache"""
+        return {
+            'enabled': os.getenv('ENABLE_EMBEDDING_CACHE', 'True').lower() == 'true',
+            'cache_dir': os.getenv('EMBEDDING_CACHE_DIR', './data/embeddings'),
+            'max_size_mb': int(os.getenv('EMBEDDING_CACHE_MAX_SIZE_MB', '2048')),
+            'segment_rows': int(os.getenv('EMBEDDING_CACHE_SEGMENT_ROWS', '50000'))
+        }
+
     def _load_minio(self) -> Dict[str, Any]:
         return {
             'endpoint': os.getenv('MINIO_ENDPOINT', 'localhost:9000'),
             'access_key': os.getenv('ACCESS_KEY', 'minioadmin'),
             'secret_key': os.getenv('SECRET_KEY', 'minioadmin'),
             'secure': os.getenv('SECURE', 'False').lower() == 'true',
-            'processable_buckets': ["researchpapers", "policy", "news", "scientificdata"]
+            'processable_buckets': ["researchpapers", "policy", "news", "scientificdata"],
+            # Filename -> object key index per bucket (snapshot + event journal on disk)
+            'key_index_dir': os.getenv('MINIO_KEY_INDEX_DIR', './data/object_keys'),
+            'key_index_rescan_seconds': int(os.getenv('MINIO_KEY_INDEX_RESCAN_SECONDS', '300')),
+            # Documents are streamed into spooled temp files: in memory up to spool_max_mb, then on disk
+            'stream_chunk_size': int(os.getenv('MINIO_STREAM_CHUNK_KB', '1024')) * 1024,
+            'spool_max_mb': int(os.getenv('MINIO_SPOOL_MAX_MB', '8')),
+            'spool_dir': os.getenv('MINIO_SPOOL_DIR') or None
         }
     
     def _load_milvus(self) -> Dict[str, Any]:
@@ -153,6 +171,13 @@ class Config:
             'password': os.getenv('MILVUS_PASSWORD', ''),
             'chunks_database': os.getenv('MILVUS_CHUNK_DATABASE', 'chunk_test5'),
             'summaries_database': os.getenv('MILVUS_SUMMARY_DATABASE', 'summary_test5'),
+            # Inserts are buffered across documents and written in batches (no per-insert flush)
+            'write_buffer': {
+                'max_rows': int(os.getenv('MILVUS_WRITE_BATCH_SIZE', '1000')),
+                'max_latency_seconds': float(os.getenv('MILVUS_WRITE_MAX_LATENCY', '0.2'))
+            },
+            # Per-collection term statistics for the Server's BM25 reranker, updated on insert
+            'corpus_stats_enabled': os.getenv('BM25_STATS_ENABLED', 'True').lower() == 'true',
             'collections': {
                 'chunks': {
                     'news': 'News',
@@ -194,13 +219,18 @@ class Config:
             'connection_uri': connection_uri,
             'collections': {
                 'document_status': 'document_status',
-                'news_articles_status': 'news_articles_status'
+                'news_articles_status': 'news_articles_status',
+                'bm25_corpus_stats': 'bm25_corpus_stats',
+                'bm25_term_stats': 'bm25_term_stats',
+                'bucket_watermarks': 'bucket_watermarks'
             },
             # Connection pool settings for multi-replica support
             'max_pool_size': int(os.getenv('MONGODB_MAX_POOL_SIZE', '100')),
             'min_pool_size': int(os.getenv('MONGODB_MIN_POOL_SIZE', '10')),
             'server_selection_timeout_ms': int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT', '5000')),
             'connect_timeout_ms': int(os.getenv('MONGODB_CONNECT_TIMEOUT', '10000')),
+            # Memoize tracker statistics for dashboards/health checks (0 = disabled)
+            'stats_cache_ttl_seconds': float(os.getenv('MONGODB_STATS_CACHE_TTL', '10')),
         }
 
     def _load_lancedb(self) -> Dict[str, Any]:
@@ -230,7 +260,12 @@ class Config:
             'enable_cache': os.getenv('ENABLE_UNSTRUCTURED_CACHE', 'True').lower() == 'true',
             'graphrag_timeout': graphrag_timeout_seconds,
             'max_concurrent_tasks': int(os.getenv('MAX_CONCURRENT_TASKS', '3')),
-            'enable_stp': os.getenv('ENABLE_STP', 'True').lower() == 'true'  # NEW: STP enabled flag
+            'enable_stp': os.getenv('ENABLE_STP', 'True').lower() == 'true',  # NEW: STP enabled flag
+            'queue': {
+                'journal_path': os.getenv('QUEUE_JOURNAL_PATH', './data/queue/tasks.db'),
+                'max_backlog': int(os.getenv('QUEUE_MAX_BACKLOG', '1000')),  # 0 = unlimited
+                'backpressure_mode': os.getenv('QUEUE_BACKPRESSURE_MODE', 'reject').lower()  # reject | defer
+            }
         }
     
     # STP Configuration from Environment Variables
@@ -276,6 +311,10 @@ class Config:
             'embedding_model': os.getenv('STP_EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'),
             'embedding_dim': int(os.getenv('STP_EMBEDDING_DIM', '384')),
 
+            # Search Concurrency (blocking Milvus searches run on a bounded pool)
+            'search_workers': int(os.getenv('STP_SEARCH_WORKERS', '4')),
+            'search_max_connections': int(os.getenv('STP_SEARCH_MAX_CONNECTIONS', '20')),
+
             # Processing Options
             'batch_size': int(os.getenv('STP_BATCH_SIZE', '32')),
             'timeout': stp_timeout_seconds
@@ -509,6 +548,12 @@ class Config:
             'max_dimension': int(os.getenv('MAX_IMAGE_DIMENSION', '1024')),
             'replace_with_descriptions': os.getenv('REPLACE_IMAGES_WITH_DESCRIPTIONS', 'True').lower() == 'true',
 
+            # Image Description Throughput
+            'max_concurrent_descriptions': int(os.getenv('VISION_MAX_CONCURRENT', '4')),
+            'description_cache_enabled': os.getenv('VISION_DESCRIPTION_CACHE', 'True').lower() == 'true',
+            'description_cache_dir': os.getenv('VISION_DESCRIPTION_CACHE_DIR', './cache/image_descriptions'),
+            'description_cache_memory_size': int(os.getenv('VISION_DESCRIPTION_CACHE_SIZE', '1024')),
+
             # Image Description Prompts (imported from prompts.py)
             'description_prompt': GENERAL_IMAGE_DESCRIPTION_PROMPT,
             'chart_graph_prompt': CHART_GRAPH_DESCRIPTION_PROMPT,
@@ -517,6 +562,15 @@ class Config:
             'table_data_prompt': TABLE_DATA_DESCRIPTION_PROMPT
         }
 
+    # Translation Configuration
+    def _load_translation(self) -> Dict[str, Any]:
+        """Load MarianMT translation batching and cache configuration"""
+        return {
+            'batch_size': int(os.getenv('TRANSLATION_BATCH_SIZE', '16')),
+            'max_sentence_chars': int(os.getenv('TRANSLATION_MAX_SENTENCE_CHARS', '1000')),
+            'cache_size': int(os.getenv('TRANSLATION_CACHE_SIZE', '10000'))
+        }
+
     # ClimateGPT-7B Configuration
     def _load_climategpt(self) -> Dict[str, Any]:
         """Load ClimateGPT-7B model configuration for summarization"""
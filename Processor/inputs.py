@@ -3,8 +3,16 @@ Input Services for Document Sources
 Handles MinIO and other document input sources
 """
 
+import json
 import logging
-from typing import List, Dict, Any, Optional, BinaryIO
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, BinaryIO
 from io import BytesIO
 
 from config import config
@@ -12,6 +20,150 @@ from config import config
 logger = logging.getLogger(__name__)
 
 
+class ObjectKeyIndex:
+    """
+    Filename -> object key map for one bucket.
+    
+    Built from a single listing and kept current by webhook events and local
+    put/delete calls. State is a JSON snapshot plus an append-only journal of
+    added/removed keys, so events cost one small append and restarts replay
+    the journal instead of rescanning the bucket.
+    """
+    
+    # Compact the journal into a new snapshot once it outgrows this many lines
+    MAX_JOURNAL_LINES = 10000
+    
+    def __init__(self, bucket: str, index_dir: str):
+        slug = re.sub(r'[^A-Za-z0-9._-]+', '_', bucket)
+        self.bucket = bucket
+        self.snapshot_path = Path(index_dir) / f"{slug}.json"
+        self.journal_path = Path(index_dir) / f"{slug}.journal"
+        self.built_at = 0.0
+        self.loaded = False
+        self._keys: Set[str] = set()
+        self._by_name: Dict[str, Set[str]] = {}
+        self._journal_lines = 0
+        self._lock = threading.Lock()
+        # Serializes loads and listings so concurrent lookups share one rebuild
+        self.build_lock = threading.Lock()
+    
+    @staticmethod
+    def _basename(key: str) -> str:
+        return key.rsplit('/', 1)[-1]
+    
+    def _add(self, key: str):
+        self._keys.add(key)
+        self._by_name.setdefault(self._basename(key), set()).add(key)
+    
+    def _remove(self, key: str):
+        self._keys.discard(key)
+        keys = self._by_name.get(self._basename(key))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_name[self._basename(key)]
+    
+    def load(self) -> bool:
+        """Load the snapshot and replay the journal; False if there is nothing on disk"""
+        with self._lock:
+            try:
+                snapshot = json.loads(self.snapshot_path.read_text(encoding='utf-8'))
+            except FileNotFoundError:
+                return False
+            except Exception as e:
+                logger.warning(f"⚠️ Ignoring unreadable key index for {self.bucket}: {e}")
+                return False
+            
+            self._keys, self._by_name = set(), {}
+            for key in snapshot.get('keys', []):
+                self._add(key)
+            self.built_at = snapshot.get('built_at', 0.0)
+            
+            self._journal_lines = 0
+            if self.journal_path.exists():
+                with open(self.journal_path, encoding='utf-8') as f:
+                    for line in f:
+                        line = line.rstrip('\n')
+                        if line[:1] == '+':
+                            self._add(line[1:])
+                        elif line[:1] == '-':
+                            self._remove(line[1:])
+                        self._journal_lines += 1
+            
+            self.loaded = True
+            logger.info(f"🗂️ Loaded key index for {self.bucket}: {len(self._keys)} objects")
+            return True
+    
+    def rebuild(self, keys: Iterable[str]):
+        """Replace the index with a fresh listing and snapshot it"""
+        with self._lock:
+            self._keys, self._by_name = set(), {}
+            for key in keys:
+                self._add(key)
+            self.built_at = time.time()
+            self.loaded = True
+            self._write_snapshot()
+        logger.info(f"🗂️ Built key index for {self.bucket}: {len(self._keys)} objects")
+    
+    def _write_snapshot(self):
+        """Atomically write the snapshot and start a new journal (caller holds the lock)"""
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix('.tmp')
+            tmp_path.write_text(
+                json.dumps({'bucket': self.bucket, 'built_at': self.built_at, 'keys': sorted(self._keys)}),
+                encoding='utf-8'
+            )
+            os.replace(tmp_path, self.snapshot_path)
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_lines = 0
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to persist key index for {self.bucket}: {e}")
+    
+    def _journal(self, op: str, key: str):
+        try:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(f"{op}{key}\n")
+            self._journal_lines += 1
+            if self._journal_lines > max(self.MAX_JOURNAL_LINES, len(self._keys)):
+                self._write_snapshot()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to journal key index update for {self.bucket}: {e}")
+    
+    def add(self, key: str):
+        with self._lock:
+            if key not in self._keys:
+                self._add(key)
+                self._journal('+', key)
+    
+    def remove(self, key: str):
+        with self._lock:
+            if key in self._keys:
+                self._remove(key)
+                self._journal('-', key)
+    
+    def resolve(self, name: str) -> Optional[str]:
+        """Exact key, else the first key (in listing order) whose path ends with name"""
+        with self._lock:
+            if name in self._keys:
+                return name
+            candidates = self._by_name.get(self._basename(name))
+            if not candidates:
+                return None
+            if '/' in name:
+                # Whole path components only: 'dir/report.pdf' must not match 'otherdir/report.pdf'
+                candidates = [key for key in candidates if key == name or key.endswith('/' + name)]
+            return min(candidates) if candidates else None
+    
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
 class MinioInput:
     """MinIO input service for document storage"""
     
@@ -24,6 +176,13 @@ class MinioInput:
         self.secret_key = minio_config['secret_key']
         self.secure = minio_config['secure']
         self.processable_buckets = minio_config['processable_buckets']
+        self.key_index_dir = minio_config.get('key_index_dir', './data/object_keys')
+        self.key_index_rescan_seconds = minio_config.get('key_index_rescan_seconds', 300)
+        self.stream_chunk_size = minio_config.get('stream_chunk_size', 1024 * 1024)
+        self.spool_max_size = minio_config.get('spool_max_mb', 8) * 1024 * 1024
+        self.spool_dir = minio_config.get('spool_dir')
+        self._key_indexes: Dict[str, ObjectKeyIndex] = {}
+        self._key_indexes_lock = threading.Lock()
         
         # Initialize MinIO client
         self.client = None
@@ -112,24 +271,66 @@ class MinioInput:
             logger.error(f"Failed to list objects in {bucket_name}: {e}")
             return []
     
+    def _get_key_index(self, bucket: str, build: bool = True) -> Optional[ObjectKeyIndex]:
+        """Get the bucket's key index, loading it from disk or building it from one listing"""
+        with self._key_indexes_lock:
+            index = self._key_indexes.get(bucket)
+            if index is None:
+                index = ObjectKeyIndex(bucket, self.key_index_dir)
+                self._key_indexes[bucket] = index
+        
+        if not index.loaded:
+            with index.build_lock:
+                if not index.loaded and not index.load():
+                    if not build:
+                        return None
+                    self._rebuild_key_index(index)
+        return index
+    
+    def _rebuild_key_index(self, index: ObjectKeyIndex):
+        objects = self.client.list_objects(index.bucket, recursive=True)
+        index.rebuild(obj.object_name for obj in objects if not obj.is_dir)
+    
+    def record_object_event(self, bucket: str, object_key: str, created: bool):
+        """Apply a bucket notification to the key index (indexes not built yet pick it up from the listing)"""
+        try:
+            index = self._get_key_index(bucket, build=False)
+            if index is None:
+                return
+            if created:
+                index.add(object_key)
+            else:
+                index.remove(object_key)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to update key index for {bucket}/{object_key}: {e}")
+    
     def find_file_in_bucket(self, bucket: str, filename: str) -> str:
-        """Find file in specified bucket (searches recursively)"""
+        """Resolve a filename or key to the object key via the bucket's key index"""
         if not self._minio_available or not self.client:
             raise Exception("MinIO client not connected")
         
         try:
-            # Try direct path first
+            index = self._get_key_index(bucket)
+            key = index.resolve(filename)
+            if key:
+                return key
+            
+            # Not indexed yet (e.g. the event has not arrived): try the direct path
             try:
                 self.client.stat_object(bucket, filename)
+                index.add(filename)
                 return filename
             except self._S3Error:
                 pass
             
-            # Search recursively
-            objects = self.client.list_objects(bucket, recursive=True)
-            for obj in objects:
-                if obj.object_name.endswith(filename) or obj.object_name == filename:
-                    return obj.object_name
+            # Rescan at most once per interval so unknown names can't trigger repeated full listings
+            if index.age_seconds > self.key_index_rescan_seconds:
+                with index.build_lock:
+                    if index.age_seconds > self.key_index_rescan_seconds:
+                        self._rebuild_key_index(index)
+                key = index.resolve(filename)
+                if key:
+                    return key
             
             raise Exception(f"File '{filename}' not found in bucket '{bucket}'")
             
@@ -155,11 +356,63 @@ class MinioInput:
             
         except self._S3Error as e:
             logger.error(f"MinIO S3 error getting {object_name}: {e}")
+            if e.code == "NoSuchKey":
+                # Deleted without a notification reaching us; drop the stale key
+                self.record_object_event(bucket_name, actual_path, created=False)
             raise Exception(f"Document not found: {object_name}")
         except Exception as e:
             logger.error(f"Failed to get document {object_name}: {e}")
             raise
     
+    def iter_document(self, bucket_name: str, object_name: str,
+                      offset: int = 0, length: Optional[int] = None,
+                      resolved: bool = False) -> Iterator[bytes]:
+        """
+        Stream a document (or a byte range of it) in chunks without buffering it whole.
+        
+        With resolved, object_name is already the full object key and is not looked up again.
+        """
+        if not self._minio_available or not self.client:
+            raise Exception("MinIO client not connected")
+        
+        actual_path = object_name if resolved else self.find_file_in_bucket(bucket_name, object_name)
+        response = self.client.get_object(bucket_name, actual_path, offset=offset, length=length or 0)
+        try:
+            yield from response.stream(self.stream_chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+    
+    def get_document_stream(self, bucket_name: str, object_name: str) -> BinaryIO:
+        """
+        Get a document as a seekable file object, positioned at the start.
+        
+        The object is copied chunk by chunk into a spooled temporary file that
+        stays in memory up to spool_max_mb and spills to disk beyond that, so
+        resident memory per in-flight document is bounded. The caller closes it.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_max_size, dir=self.spool_dir)
+        actual_path = object_name
+        try:
+            actual_path = self.find_file_in_bucket(bucket_name, object_name)
+            for chunk in self.iter_document(bucket_name, actual_path, resolved=True):
+                spool.write(chunk)
+            size = spool.tell()
+            spool.seek(0)
+            logger.info(f"Streamed {object_name} from {bucket_name} ({size} bytes)")
+            return spool
+        except self._S3Error as e:
+            spool.close()
+            logger.error(f"MinIO S3 error getting {object_name}: {e}")
+            if e.code == "NoSuchKey":
+                # Deleted without a notification reaching us; drop the stale key
+                self.record_object_event(bucket_name, actual_path, created=False)
+            raise Exception(f"Document not found: {object_name}")
+        except Exception as e:
+            spool.close()
+            logger.error(f"Failed to stream document {object_name}: {e}")
+            raise
+    
     def put_document(self, bucket_name: str, object_name: str, 
                     content: bytes, content_type: str = "application/octet-stream") -> bool:
         """Put document content to MinIO"""
@@ -177,6 +430,7 @@ class MinioInput:
                 content_type=content_type
             )
             
+            self.record_object_event(bucket_name, object_name, created=True)
             logger.info(f"Uploaded {object_name} to {bucket_name}")
             return True
             
@@ -191,6 +445,7 @@ class MinioInput:
         
         try:
             self.client.remove_object(bucket_name, object_name)
+            self.record_object_event(bucket_name, object_name, created=False)
             logger.info(f"Deleted {object_name} from {bucket_name}")
             return True
             
@@ -257,23 +512,62 @@ class MinioInput:
         """Check if bucket is processable"""
         return bucket_name in self.processable_buckets
     
-    def get_bucket_documents(self, bucket_name: str, 
-                           file_extensions: List[str] = None) -> List[Dict[str, Any]]:
-        """Get all documents in bucket with metadata"""
+    def _document_from_listing(self, bucket_name: str, obj: Any) -> Dict[str, Any]:
+        """Build document metadata from a listing entry (no stat_object round trip)"""
+        return {
+            "object_name": obj.object_name,
+            "bucket_name": bucket_name,
+            "size": obj.size,
+            "etag": obj.etag,
+            "last_modified": obj.last_modified,
+            "content_type": obj.content_type,
+            "metadata": obj.metadata
+        }
+    
+    def iter_bucket_documents(self, bucket_name: str,
+                              file_extensions: List[str] = None,
+                              modified_since: Optional[datetime] = None,
+                              prefix: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream documents with metadata from a single paginated listing.
+        
+        The MinIO client fetches 1000 keys per page lazily, so callers that stop
+        early only pay for the pages they consumed. With modified_since, only
+        objects whose last_modified is at or after the watermark are returned.
+        """
+        if not self._minio_available or not self.client:
+            return
+        
         if file_extensions is None:
             file_extensions = ['.pdf', '.docx', '.doc', '.xlsx', '.xls', '.csv', '.txt']
+        extensions = tuple(ext.lower() for ext in file_extensions)
         
-        documents = []
-        objects = self.list_objects(bucket_name)
+        if modified_since is not None and modified_since.tzinfo is None:
+            modified_since = modified_since.replace(tzinfo=timezone.utc)
         
-        for object_name in objects:
-            # Filter by file extension
-            if any(object_name.lower().endswith(ext) for ext in file_extensions):
-                doc_info = self.get_document_info(bucket_name, object_name)
-                if doc_info:
-                    documents.append(doc_info)
+        objects = self.client.list_objects(
+            bucket_name,
+            prefix=prefix,
+            recursive=True,
+            include_user_meta=True  # MinIO returns content type and user metadata in the listing
+        )
         
-        return documents
+        for obj in objects:
+            if obj.is_dir or not obj.object_name.lower().endswith(extensions):
+                continue
+            if modified_since is not None and obj.last_modified and obj.last_modified < modified_since:
+                continue
+            yield self._document_from_listing(bucket_name, obj)
+    
+    def get_bucket_documents(self, bucket_name: str, 
+                           file_extensions: List[str] = None,
+                           modified_since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Get all documents in bucket with metadata (optionally only those changed since a watermark)"""
+        try:
+            return list(self.iter_bucket_documents(bucket_name, file_extensions, modified_since))
+        except Exception as e:
+            logger.error(f"Failed to list documents in {bucket_name}: {e}")
+            return []
     
     def get_stats(self) -> Dict[str, Any]:
         """Get MinIO service statistics"""
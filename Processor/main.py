@@ -146,7 +146,13 @@ async def initialize_services() -> ServiceContainer:
             if services.is_service_available('batch_processor'):
                 from services.queue import create_processing_queue
                 max_concurrent = config.get('processing.max_concurrent_tasks', 3)
-                queue = create_processing_queue(services.get_service('batch_processor'), max_concurrent)
+                queue = create_processing_queue(
+                    services.get_service('batch_processor'),
+                    max_concurrent,
+                    journal_path=config.get('processing.queue.journal_path') or None,
+                    max_backlog=config.get('processing.queue.max_backlog', 0),
+                    backpressure_mode=config.get('processing.queue.backpressure_mode', 'reject')
+                )
                 services.add_service('processing_queue', queue)
                 logger.info("✅ Async processing queue initialized")
             else:
@@ -297,6 +303,7 @@ async def cleanup_background_tasks():
     - Batch processor cleanup
     - STP processor cleanup
     - Custom cleanup tasks
+    - Milvus write buffer flush
 
     All cleanup operations are wrapped in try-except blocks to ensure
     graceful degradation even if individual cleanups fail.
@@ -321,6 +328,10 @@ async def cleanup_background_tasks():
         from processors.stp_processor import stp_processor
         if hasattr(stp_processor, 'cleanup'):
             await stp_processor.cleanup()
+
+        # Cleanup STP search service (embedding session, search executor)
+        from api.support import stp_service
+        await stp_service.cleanup()
         
         for cleanup_task in background_tasks_cleanup:
             try:
@@ -336,6 +347,13 @@ async def cleanup_background_tasks():
     except Exception as e:
         logger.error(f"❌ Error during background task cleanup: {e}")
 
+    # Write rows still in the Milvus write buffer before services disconnect
+    try:
+        from storage.milvus import milvus_storage
+        await milvus_storage.close_write_buffer()
+    except Exception as e:
+        logger.error(f"❌ Error flushing Milvus write buffer: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -17,6 +17,7 @@ class ProcessRequest(BaseModel):
     bucket: str
     filename: str
     file_path: Optional[str] = None
+    priority: int = 0  # Queue priority, higher runs first
 
 
 class EnhancedProcessRequest(BaseModel):
@@ -37,6 +38,7 @@ class BatchProcessRequest(BaseModel):
     include_graphrag: bool = False
     include_stp: bool = False  # NEW: STP processing option
     max_documents_per_bucket: Optional[int] = None
+    incremental: bool = False  # Only objects changed since the last incremental run
 
 
 class BucketProcessRequest(BaseModel):
@@ -48,6 +50,7 @@ class BucketProcessRequest(BaseModel):
     include_graphrag: bool = False
     include_stp: bool = False  # NEW: STP processing option
     max_documents: Optional[int] = None
+    incremental: bool = False  # Only objects changed since the last incremental run
 
 
 class SearchRequest(BaseModel):
@@ -149,6 +152,7 @@ class ProcessingStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     RETRYING = "retrying"
+    DEFERRED = "deferred"
 
 
 class ProcessingTask(BaseModel):
@@ -3,22 +3,33 @@ Unified Document Extraction
 Handles all document types with specialized extractors
 """
 
-import requests
+import base64
+import httpx
 import logging
 import hashlib
-from typing import List, Dict, Any, Optional
+import threading
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Union, BinaryIO
 from pathlib import Path
+import lz4.frame
+import orjson
 import pandas as pd
 import io
 import asyncio
-from io import BytesIO
-from PIL import Image
 
 from config import config
 from shared.clients.vision_client import get_vision_client
 
 logger = logging.getLogger(__name__)
 
+# Documents can be passed as bytes or as a seekable binary stream (e.g. a spooled temp file)
+DocumentSource = Union[bytes, BinaryIO]
+
+# Bump when the cached element format changes so stale entries are ignored
+EXTRACTION_CACHE_VERSION = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 class DocumentExtractor:
     """Unified document extractor with caching and type-specific handling"""
@@ -35,12 +46,26 @@ class DocumentExtractor:
         self.cache_dir = Path(cache_settings['extraction_cache_dir'])
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+        # One non-blocking HTTP client per event loop (sync callers run their own loop)
+        self._http_clients = weakref.WeakKeyDictionary()
+
         # Get vision configuration for image extraction
         vision_config = config.get_vision_config()
         self.image_extraction_enabled = vision_config.get('enabled', False)
         self.extract_images_from_pdf = vision_config.get('extract_from_pdf', True)
         self.extract_images_from_docx = vision_config.get('extract_from_docx', True)
         self.replace_images_with_descriptions = vision_config.get('replace_with_descriptions', True)
+        self.max_concurrent_descriptions = max(1, vision_config.get('max_concurrent_descriptions', 4))
+
+        # Image descriptions are cached by image content across documents (LRU in memory, files on disk)
+        self.description_cache_enabled = vision_config.get('description_cache_enabled', True)
+        self.description_cache_dir = Path(vision_config.get('description_cache_dir', './cache/image_descriptions'))
+        self.description_memory_size = vision_config.get('description_cache_memory_size', 1024)
+        self._description_memory: "OrderedDict[str, str]" = OrderedDict()
+        self._description_lock = threading.Lock()
+        self._description_semaphores = weakref.WeakKeyDictionary()
+        if self.image_extraction_enabled and self.description_cache_enabled:
+            self.description_cache_dir.mkdir(parents=True, exist_ok=True)
 
         # Initialize vision client if image extraction is enabled
         self.vision_client = None
@@ -50,37 +75,58 @@ class DocumentExtractor:
 
         logger.info(f"DocumentExtractor initialized with API: {self.api_url}")
         
-    def extract_content(self, document_content: bytes, filename: str, 
+    def extract_content(self, document_content: DocumentSource, filename: str,
                        strategy: str = "auto") -> List[Dict[str, Any]]:
-        """Main extraction method with caching and enhanced debugging"""
+        """Synchronous wrapper for extract_content_async (for callers without an event loop)"""
+        async def run():
+            try:
+                return await self.extract_content_async(document_content, filename, strategy)
+            finally:
+                await self._close_http_client()
+
+        return asyncio.run(run())
+
+    async def extract_content_async(self, document_content: DocumentSource, filename: str,
+                                    strategy: str = "auto") -> List[Dict[str, Any]]:
+        """Main extraction method with caching; accepts bytes or a seekable binary stream"""
+        loop = asyncio.get_running_loop()
         file_type = self._detect_file_type(filename)
         
-        logger.info(f"🔍 Extracting {file_type} file: {filename} ({len(document_content)} bytes)")
+        logger.info(f"🔍 Extracting {file_type} file: {filename} ({self._source_size(document_content)} bytes)")
         
         # Use cache if enabled
+        cache_key = None
         if self.cache_enabled:
-            cache_key = self._get_cache_key(document_content, filename, strategy)
-            cached_result = self._load_from_cache(cache_key)
+            content_hash = await loop.run_in_executor(None, self._hash_source, document_content)
+            cache_key = self._get_cache_key(content_hash, filename, strategy)
+            cached_result = await loop.run_in_executor(None, self._load_from_cache, cache_key)
             if cached_result:
+                # Same content may be cached under another name
+                for element in cached_result:
+                    element.setdefault("metadata", {})["filename"] = filename
                 total_text_length = sum(len(elem.get('text', '')) for elem in cached_result)
                 logger.info(f"📋 Cache hit for {filename} - {len(cached_result)} elements, {total_text_length} chars")
                 return cached_result
         
         # Extract based on file type
         if file_type == "excel":
-            elements = self._extract_excel(document_content, filename)
+            elements = await loop.run_in_executor(None, self._extract_excel, document_content, filename)
+            if elements is None:
+                logger.info("🔄 Falling back to generic extraction")
+                elements = await self._extract_generic(document_content, filename, "hi_res")
         elif file_type == "csv":
-            elements = self._extract_csv(document_content, filename)
+            elements = await loop.run_in_executor(None, self._extract_csv, document_content, filename)
         elif file_type == "pdf":
-            elements = self._extract_pdf(document_content, filename, strategy)
+            elements = await self._extract_pdf(document_content, filename, strategy)
         else:
-            elements = self._extract_generic(document_content, filename, strategy)
+            elements = await self._extract_generic(document_content, filename, strategy)
         
         # Post-process and cache
+        elements = await self._process_images_async(elements)
         elements = self._post_process_elements(elements, filename, file_type)
         
         if self.cache_enabled and elements:
-            self._save_to_cache(cache_key, elements)
+            await loop.run_in_executor(None, self._save_to_cache, cache_key, elements)
         
         # Enhanced debugging
         total_text_length = sum(len(elem.get('text', '')) for elem in elements)
@@ -98,6 +144,46 @@ class DocumentExtractor:
         
         return elements
     
+    @staticmethod
+    def _as_stream(source: DocumentSource) -> BinaryIO:
+        """File-like view of a document positioned at the start"""
+        if isinstance(source, (bytes, bytearray)):
+            return io.BytesIO(source)
+        source.seek(0)
+        return source
+
+    @staticmethod
+    def _source_size(source: DocumentSource) -> int:
+        """Size in bytes without reading the document"""
+        if isinstance(source, (bytes, bytearray)):
+            return len(source)
+        position = source.tell()
+        size = source.seek(0, io.SEEK_END)
+        source.seek(position)
+        return size
+
+    @staticmethod
+    def _read_source(source: DocumentSource) -> bytes:
+        """Read the whole document (only for small formats that need it)"""
+        if isinstance(source, (bytes, bytearray)):
+            return bytes(source)
+        source.seek(0)
+        content = source.read()
+        source.seek(0)
+        return content
+
+    @staticmethod
+    def _hash_source(source: DocumentSource) -> str:
+        """Full sha256 of the document, streamed in chunks"""
+        if isinstance(source, (bytes, bytearray)):
+            return hashlib.sha256(source).hexdigest()
+        digest = hashlib.sha256()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        source.seek(0)
+        return digest.hexdigest()
+    
     def _detect_file_type(self, filename: str) -> str:
         """Detect file type from filename"""
         filename_lower = filename.lower()
@@ -115,13 +201,13 @@ class DocumentExtractor:
         
         return "unknown"
     
-    def _extract_excel(self, document_content: bytes, filename: str) -> List[Dict[str, Any]]:
-        """Extract from Excel files"""
+    def _extract_excel(self, document_content: DocumentSource, filename: str) -> Optional[List[Dict[str, Any]]]:
+        """Extract from Excel files (None means fall back to generic extraction)"""
         try:
             logger.info(f"📊 Processing Excel file: {filename}")
             
             # Read Excel file
-            df = pd.read_excel(io.BytesIO(document_content), header=1, engine='openpyxl')
+            df = pd.read_excel(self._as_stream(document_content), header=1, engine='openpyxl')
             
             elements = []
             
@@ -162,16 +248,15 @@ class DocumentExtractor:
             
         except Exception as e:
             logger.error(f"❌ Excel extraction failed: {e}")
-            logger.info("🔄 Falling back to generic extraction")
-            return self._extract_generic(document_content, filename, "hi_res")
+            return None
     
-    def _extract_csv(self, document_content: bytes, filename: str) -> List[Dict[str, Any]]:
+    def _extract_csv(self, document_content: DocumentSource, filename: str) -> List[Dict[str, Any]]:
         """Extract from CSV files"""
         try:
             logger.info(f"📊 Processing CSV file: {filename}")
             
             # Read CSV
-            df = pd.read_csv(io.BytesIO(document_content))
+            df = pd.read_csv(self._as_stream(document_content))
             
             elements = []
             
@@ -209,11 +294,11 @@ class DocumentExtractor:
             logger.error(f"❌ CSV extraction failed: {e}")
             return []
     
-    def _extract_pdf(self, document_content: bytes, filename: str, strategy: str) -> List[Dict[str, Any]]:
+    async def _extract_pdf(self, document_content: DocumentSource, filename: str, strategy: str) -> List[Dict[str, Any]]:
         """Extract from PDF files using Unstructured API"""
         logger.info(f"📄 Processing PDF file: {filename} with strategy: {strategy}")
         
-        return self._call_unstructured_api(
+        return await self._call_unstructured_api(
             document_content, filename, strategy,
             extra_params={
                 "pdf_infer_table_structure": True,
@@ -221,24 +306,43 @@ class DocumentExtractor:
             }
         )
     
-    def _extract_generic(self, document_content: bytes, filename: str, strategy: str) -> List[Dict[str, Any]]:
+    async def _extract_generic(self, document_content: DocumentSource, filename: str, strategy: str) -> List[Dict[str, Any]]:
         """Generic extraction using Unstructured API"""
         logger.info(f"📋 Processing generic file: {filename} with strategy: {strategy}")
-        return self._call_unstructured_api(document_content, filename, strategy)
+        return await self._call_unstructured_api(document_content, filename, strategy)
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the HTTP client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=httpx.Timeout(float(self.timeout), connect=10.0))
+            self._http_clients[loop] = client
+        return client
+    
+    async def _close_http_client(self):
+        """Close the HTTP client of the running event loop"""
+        client = self._http_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
     
-    def _call_unstructured_api(self, document_content: bytes, filename: str,
-                              strategy: str, extra_params: Dict = None) -> List[Dict[str, Any]]:
-        """Call Unstructured API"""
+    def _should_extract_images(self, file_type: str) -> bool:
+        """Whether Unstructured should return images for this file type"""
+        if not self.image_extraction_enabled:
+            return False
+        if file_type == "pdf":
+            return self.extract_images_from_pdf
+        if file_type == "word":
+            return self.extract_images_from_docx
+        return False
+    
+    async def _call_unstructured_api(self, document_content: DocumentSource, filename: str,
+                                     strategy: str, extra_params: Dict = None) -> List[Dict[str, Any]]:
+        """Call Unstructured API, streaming the document as the multipart upload"""
         try:
             # Determine if we should extract images based on file type and config
             file_type = self._detect_file_type(filename)
-            should_extract_images = False
-
-            if self.image_extraction_enabled:
-                if file_type == "pdf" and self.extract_images_from_pdf:
-                    should_extract_images = True
-                elif file_type == "word" and self.extract_images_from_docx:
-                    should_extract_images = True
+            should_extract_images = self._should_extract_images(file_type)
 
             data = {
                 "strategy": strategy,
@@ -251,23 +355,22 @@ class DocumentExtractor:
             if should_extract_images:
                 data.update({
                     "extract_image_block_types": ["Image", "Figure"],
-                    "extract_image_block_to_payload": True,
-                    "extract_image_block_output_dir": None  # Return in payload, not save to disk
+                    "extract_image_block_to_payload": True
                 })
                 logger.info(f"🖼️ Image extraction enabled for {filename} ({file_type})")
             
             if extra_params:
                 data.update(extra_params)
             
-            files = {"files": (filename, document_content)}
+            # File objects are read in chunks while the request body is sent
+            files = {"files": (filename, self._as_stream(document_content))}
             
             logger.info(f"🌐 Calling Unstructured API for {filename}")
 
-            response = requests.post(
+            response = await self._get_http_client().post(
                 self.api_url,
                 files=files,
-                data=data,
-                timeout=float(self.timeout)
+                data=data
             )
 
             if response.status_code == 200:
@@ -287,17 +390,17 @@ class DocumentExtractor:
                 logger.error(f"❌ Unstructured API error: {response.status_code} - {response.text}")
                 return self._fallback_extraction(document_content, filename)
                 
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             logger.error(f"❌ Cannot connect to Unstructured API at {self.api_url}")
             return self._fallback_extraction(document_content, filename)
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.error(f"❌ Unstructured API timeout after {self.timeout}s")
             return self._fallback_extraction(document_content, filename)
         except Exception as e:
             logger.error(f"❌ API call failed: {e}")
             return self._fallback_extraction(document_content, filename)
     
-    def _fallback_extraction(self, document_content: bytes, filename: str) -> List[Dict[str, Any]]:
+    def _fallback_extraction(self, document_content: DocumentSource, filename: str) -> List[Dict[str, Any]]:
         """Fallback extraction when API is unavailable"""
         logger.warning(f"⚠️ Using fallback extraction for {filename}")
         
@@ -306,7 +409,7 @@ class DocumentExtractor:
             file_type = self._detect_file_type(filename)
             
             if file_type == "text":
-                text_content = document_content.decode('utf-8', errors='ignore')
+                text_content = self._read_source(document_content).decode('utf-8', errors='ignore')
                 logger.info(f"📝 Fallback text extraction: {len(text_content)} characters")
                 return [{
                     "type": "NarrativeText",
@@ -318,14 +421,15 @@ class DocumentExtractor:
                 return []
             else:
                 # For other types, create a meaningful placeholder
-                placeholder_text = f"Document content from {filename}. Original file size: {len(document_content)} bytes. File type: {file_type}. Content extraction requires Unstructured API service to be available."
+                original_size = self._source_size(document_content)
+                placeholder_text = f"Document content from {filename}. Original file size: {original_size} bytes. File type: {file_type}. Content extraction requires Unstructured API service to be available."
                 logger.info(f"📄 Fallback placeholder created: {len(placeholder_text)} characters")
                 return [{
                     "type": "NarrativeText", 
                     "text": placeholder_text,
                     "metadata": {
                         "source": "fallback_extraction",
-                        "original_size": len(document_content),
+                        "original_size": original_size,
                         "file_type": file_type,
                         "extraction_method": "fallback_placeholder"
                     }
@@ -340,130 +444,169 @@ class DocumentExtractor:
             }]
     
     async def _process_images_async(self, elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process extracted images with vision model asynchronously"""
+        """Describe extracted images concurrently, once per unique image content"""
         if not self.image_extraction_enabled or not self.vision_client:
             return elements
 
-        processed_elements = []
-        images_processed = 0
-        images_described = 0
+        image_indices = [i for i, element in enumerate(elements) if element.get("type", "") == "Image"]
+        if not image_indices:
+            return elements
 
-        for element in elements:
-            element_type = element.get("type", "")
-
-            # Check if this is an image element
-            if element_type == "Image":
-                images_processed += 1
-                metadata = element.get("metadata", {})
-
-                # Debug: Log all metadata keys to understand Unstructured API response format
-                logger.info(f"🔍 Image element metadata keys: {list(metadata.keys())}")
-                logger.debug(f"🔍 Full Image element: {element}")
-
-                # Get image data from metadata (Unstructured API returns base64 in metadata)
-                # Check multiple possible keys where image data might be stored
-                image_base64 = (
-                    metadata.get("image_base64") or
-                    metadata.get("image") or
-                    metadata.get("base64") or
-                    element.get("image_base64") or
-                    element.get("text")  # Sometimes image data is in the text field
-                )
-                image_path = metadata.get("image_path") or metadata.get("filename")
-
-                if image_base64:
-                    try:
-                        # Decode base64 image
-                        import base64
-                        image_bytes = base64.b64decode(image_base64)
-                        image = Image.open(BytesIO(image_bytes))
-
-                        # Get description from vision model
-                        logger.info(f"🖼️ Processing image from document...")
-                        description = await self.vision_client.describe_image(image)
-
-                        if description:
-                            images_described += 1
-                            logger.info(f"✅ Image described: {description[:100]}...")
-
-                            if self.replace_images_with_descriptions:
-                                # Replace image element with text description
-                                element["type"] = "NarrativeText"
-                                element["text"] = f"[Image Description]: {description}"
-                                element["metadata"]["original_type"] = "Image"
-                                element["metadata"]["image_described"] = True
-                                processed_elements.append(element)
-                            else:
-                                # Keep image element but add description to metadata
-                                element["metadata"]["description"] = description
-                                processed_elements.append(element)
-                        else:
-                            logger.warning(f"⚠️ Failed to describe image, skipping")
-                            if not self.replace_images_with_descriptions:
-                                processed_elements.append(element)
-
-                    except Exception as e:
-                        logger.error(f"❌ Error processing image: {e}")
-                        if not self.replace_images_with_descriptions:
-                            processed_elements.append(element)
-                elif image_path:
-                    # Handle file path based images if present
-                    try:
-                        logger.info(f"🖼️ Processing image from path: {image_path}")
-                        description = await self.vision_client.describe_image(image_path)
-
-                        if description:
-                            images_described += 1
-                            logger.info(f"✅ Image described: {description[:100]}...")
-
-                            if self.replace_images_with_descriptions:
-                                element["type"] = "NarrativeText"
-                                element["text"] = f"[Image Description]: {description}"
-                                element["metadata"]["original_type"] = "Image"
-                                element["metadata"]["image_described"] = True
-                                processed_elements.append(element)
-                            else:
-                                element["metadata"]["description"] = description
-                                processed_elements.append(element)
-                        else:
-                            if not self.replace_images_with_descriptions:
-                                processed_elements.append(element)
-
-                    except Exception as e:
-                        logger.error(f"❌ Error processing image from path: {e}")
-                        if not self.replace_images_with_descriptions:
-                            processed_elements.append(element)
+        loop = asyncio.get_running_loop()
+        # Decoding, file reads and hashing are CPU/disk work, keep them off the loop
+        images = await loop.run_in_executor(
+            None, lambda: [self._load_image_bytes(elements[i]) for i in image_indices]
+        )
+
+        # One description task per unique image hash
+        tasks: Dict[str, asyncio.Future] = {}
+        for image in images:
+            if image is not None and image[0] not in tasks:
+                tasks[image[0]] = asyncio.ensure_future(self._describe_image_cached(*image))
+
+        if tasks:
+            logger.info(f"🖼️ Describing {len(tasks)} unique images ({len(image_indices)} image elements, "
+                        f"concurrency {self.max_concurrent_descriptions})")
+            await asyncio.gather(*tasks.values())
+
+        dropped = set()
+        images_described = 0
+        for index, image in zip(image_indices, images):
+            element = elements[index]
+            description = tasks[image[0]].result() if image is not None else None
+
+            if description:
+                images_described += 1
+                metadata = element.setdefault("metadata", {})
+                if self.replace_images_with_descriptions:
+                    # Replace image element with text description
+                    element["type"] = "NarrativeText"
+                    element["text"] = f"[Image Description]: {description}"
+                    metadata["original_type"] = "Image"
+                    metadata["image_described"] = True
                 else:
-                    logger.warning(f"⚠️ Image element has no image data")
-                    if not self.replace_images_with_descriptions:
-                        processed_elements.append(element)
+                    # Keep image element but add description to metadata
+                    metadata["description"] = description
+            elif self.replace_images_with_descriptions:
+                dropped.add(index)
+
+        logger.info(f"🖼️ Processed {len(image_indices)} images, {images_described} successfully described")
+
+        if not dropped:
+            return elements
+        return [element for i, element in enumerate(elements) if i not in dropped]
+
+    def _load_image_bytes(self, element: Dict[str, Any]) -> Optional[tuple]:
+        """Raw bytes and content hash of an image element (None when it has no usable data)"""
+        metadata = element.get("metadata", {})
+
+        # Unstructured API returns base64 in metadata; check the keys it has been seen under
+        image_base64 = (
+            metadata.get("image_base64") or
+            metadata.get("image") or
+            metadata.get("base64") or
+            element.get("image_base64") or
+            element.get("text")  # Sometimes image data is in the text field
+        )
+        image_path = metadata.get("image_path") or metadata.get("filename")
+
+        try:
+            if image_base64:
+                image_bytes = base64.b64decode(image_base64)
+            elif image_path:
+                image_bytes = Path(image_path).read_bytes()
             else:
-                # Not an image element, keep as-is
-                processed_elements.append(element)
+                logger.warning(f"⚠️ Image element has no image data (metadata keys: {list(metadata.keys())})")
+                return None
+        except Exception as e:
+            logger.error(f"❌ Error loading image: {e}")
+            return None
+
+        return hashlib.sha256(image_bytes).hexdigest(), image_bytes
+
+    def _get_description_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit for vision calls on the running event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._description_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent_descriptions)
+            self._description_semaphores[loop] = semaphore
+        return semaphore
+
+    async def _describe_image_cached(self, image_hash: str, image_bytes: bytes) -> Optional[str]:
+        """Describe one image, going through the description cache"""
+        cache_key = self._get_description_cache_key(image_hash)
+        loop = asyncio.get_running_loop()
+
+        description = await loop.run_in_executor(None, self._load_description, cache_key)
+        if description is not None:
+            logger.info(f"🎯 Image description cache hit: {image_hash[:12]}")
+            return description
 
-        if images_processed > 0:
-            logger.info(f"🖼️ Processed {images_processed} images, {images_described} successfully described")
+        try:
+            async with self._get_description_semaphore():
+                description = await self.vision_client.describe_image(image_bytes)
+        except Exception as e:
+            logger.error(f"❌ Error processing image: {e}")
+            return None
 
-        return processed_elements
+        if description:
+            logger.info(f"✅ Image described: {description[:100]}...")
+            await loop.run_in_executor(None, self._save_description, cache_key, description)
+        else:
+            logger.warning(f"⚠️ Failed to describe image {image_hash[:12]}")
+        return description
 
-    def _process_images(self, elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Synchronous wrapper for async image processing"""
-        if not self.image_extraction_enabled or not self.vision_client:
-            return elements
+    def _get_description_cache_key(self, image_hash: str) -> str:
+        """Descriptions depend on the model as well as the image"""
+        model = f"{self.vision_client.provider}:{self.vision_client.model}"
+        return hashlib.sha256(f"{model}\x00{image_hash}".encode("utf-8")).hexdigest()
+
+    def _load_description(self, cache_key: str) -> Optional[str]:
+        """Look up a description in memory, then on disk"""
+        if not self.description_cache_enabled:
+            return None
+
+        with self._description_lock:
+            description = self._description_memory.get(cache_key)
+            if description is not None:
+                self._description_memory.move_to_end(cache_key)
+                return description
+
+        try:
+            cache_file = self.description_cache_dir / f"{cache_key}.txt"
+            if cache_file.exists():
+                description = cache_file.read_text(encoding="utf-8")
+                self._remember_description(cache_key, description)
+                return description
+        except Exception as e:
+            logger.warning(f"⚠️ Image description cache load failed: {e}")
+        return None
+
+    def _save_description(self, cache_key: str, description: str):
+        """Store a description in memory and on disk"""
+        if not self.description_cache_enabled:
+            return
 
-        # Run async processing
+        self._remember_description(cache_key, description)
         try:
-            return asyncio.run(self._process_images_async(elements))
+            cache_file = self.description_cache_dir / f"{cache_key}.txt"
+            tmp_file = cache_file.with_suffix(".tmp")
+            tmp_file.write_text(description, encoding="utf-8")
+            tmp_file.replace(cache_file)
         except Exception as e:
-            logger.error(f"❌ Failed to process images: {e}")
-            return elements
+            logger.warning(f"⚠️ Image description cache save failed: {e}")
+
+    def _remember_description(self, cache_key: str, description: str):
+        with self._description_lock:
+            self._description_memory[cache_key] = description
+            self._description_memory.move_to_end(cache_key)
+            while len(self._description_memory) > self.description_memory_size:
+                self._description_memory.popitem(last=False)
 
     def _post_process_elements(self, elements: List[Dict[str, Any]],
                               filename: str, file_type: str) -> List[Dict[str, Any]]:
-        """Post-process extracted elements"""
-        # First process images if enabled
-        elements = self._process_images(elements)
-
+        """Post-process extracted elements (images are described beforehand)"""
         processed = []
 
         for element in elements:
@@ -490,20 +633,21 @@ class DocumentExtractor:
         logger.info(f"📝 Post-processed {len(processed)} elements for {filename}")
         return processed
     
-    def _get_cache_key(self, content: bytes, filename: str, strategy: str) -> str:
-        """Generate cache key"""
-        content_hash = hashlib.md5(content).hexdigest()[:8]
-        safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '.'))
-        return f"{safe_filename}_{strategy}_{content_hash}"
+    def _get_cache_key(self, content_hash: str, filename: str, strategy: str) -> str:
+        """Generate cache key from the full content hash and extraction settings"""
+        file_type = self._detect_file_type(filename)
+        images = "_img" if self._should_extract_images(file_type) else ""
+        return f"{content_hash}_{file_type}_{strategy}{images}_v{EXTRACTION_CACHE_VERSION}"
+    
+    def _cache_path(self, cache_key: str) -> Path:
+        return self.cache_dir / f"{cache_key}.json.lz4"
     
     def _load_from_cache(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
-        """Load from cache"""
+        """Load from cache (LZ4-compressed JSON written by _save_to_cache)"""
         try:
-            cache_file = self.cache_dir / f"{cache_key}.json"
+            cache_file = self._cache_path(cache_key)
             if cache_file.exists():
-                import json
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return orjson.loads(lz4.frame.decompress(cache_file.read_bytes()))
         except Exception as e:
             logger.warning(f"⚠️ Cache load failed: {e}")
         return None
@@ -511,11 +655,16 @@ class DocumentExtractor:
     def _save_to_cache(self, cache_key: str, elements: List[Dict[str, Any]]):
         """Save to cache"""
         try:
-            cache_file = self.cache_dir / f"{cache_key}.json"
-            import json
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(elements, f, ensure_ascii=False, indent=2)
-            logger.info(f"💾 Saved extraction to cache: {cache_key}")
+            cache_file = self._cache_path(cache_key)
+            # Plain data only: cache files are never executed, unlike pickles
+            payload = lz4.frame.compress(
+                orjson.dumps(elements, option=orjson.OPT_SERIALIZE_NUMPY, default=str)
+            )
+            # Write then rename so concurrent readers never see a partial file
+            tmp_file = cache_file.with_suffix(".tmp")
+            tmp_file.write_bytes(payload)
+            tmp_file.replace(cache_file)
+            logger.info(f"💾 Saved extraction to cache: {cache_key} ({len(payload)} bytes)")
         except Exception as e:
             logger.warning(f"⚠️ Cache save failed: {e}")
     
@@ -524,7 +673,7 @@ class DocumentExtractor:
         from datetime import datetime
         return datetime.now().isoformat()
     
-    def extract_text_only(self, document_content: bytes, filename: str) -> str:
+    def extract_text_only(self, document_content: DocumentSource, filename: str) -> str:
         """Extract only text content for summarization"""
         elements = self.extract_content(document_content, filename, "basic")
         
@@ -541,7 +690,7 @@ class DocumentExtractor:
     
     def get_extraction_stats(self) -> Dict[str, Any]:
         """Get extraction statistics"""
-        cache_files = list(self.cache_dir.glob("*.json")) if self.cache_dir.exists() else []
+        cache_files = list(self.cache_dir.glob("*.json.lz4")) if self.cache_dir.exists() else []
         
         return {
             "cache_enabled": self.cache_enabled,
@@ -556,7 +705,11 @@ class DocumentExtractor:
         if not self.cache_dir.exists():
             return {"cleared": 0, "message": "Cache directory does not exist"}
         
-        cache_files = list(self.cache_dir.glob("*.json"))
+        # Includes pickle and JSON entries from previous cache formats
+        cache_files = [
+            cache_file for pattern in ("*.json.lz4", "*.pkl.z", "*.json")
+            for cache_file in self.cache_dir.glob(pattern)
+        ]
         cleared_count = 0
         
         for cache_file in cache_files:
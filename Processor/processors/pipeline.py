@@ -9,12 +9,13 @@ from config import config
 from models import ChunkData, SummaryData, DocumentMetadata
 from storage.database import tracker
 from storage.milvus import milvus_storage as vector_storage
-from processors.extractors import DocumentExtractor
+from processors.extractors import DocumentExtractor, DocumentSource
 from processors.chunkers import ChunkerFactory
 from processors.summarizers import SummarizerFactory
 from processors.graphrag_processor import graphrag_processor
 from processors.stp_processor import stp_processor
 from services.local_embeddings import get_model_manager
+from services.embedding_cache import get_embedding_cache, normalize_text
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,7 @@ class AsyncDocumentProcessor:
         self.embedder = AsyncEmbeddingProcessor()
         self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="processor_worker")
         
-    async def process_document(self, document_content: bytes, filename: str, bucket: str,
+    async def process_document(self, document_content: DocumentSource, filename: str, bucket: str,
                              include_chunking: bool = True, include_summarization: bool = True,
                              include_graphrag: bool = False, include_stp: bool = False) -> Dict[str, Any]:
         """Main processing pipeline with GraphRAG, STP integration and automatic LanceDB transfer"""
@@ -53,8 +54,8 @@ class AsyncDocumentProcessor:
 
             # SINGLE EXTRACTION POINT - Extract content once and share with all processors
             logger.info(f"📄 Extracting content from {filename}")
-            extracted_elements = await self._run_in_executor(
-                self.extractor.extract_content, document_content, filename, "auto"
+            extracted_elements = await self.extractor.extract_content_async(
+                document_content, filename, "auto"
             )
             
             # Convert elements to structured content format (for summary/graphrag)
@@ -174,7 +175,12 @@ class AsyncDocumentProcessor:
             
             if chunks:
                 enriched_chunks = await self.embedder.process_chunks(chunks)
-                await vector_storage.insert_chunks(enriched_chunks)
+                insert_result = await vector_storage.insert_chunks(enriched_chunks)
+
+                # Only record the chunks once the batch containing them has landed
+                if insert_result.get("status") != "success":
+                    return {"status": "failed", "message": f"Chunk storage failed: {insert_result.get('error', insert_result.get('status'))}"}
+
                 tracker.mark_done("chunks", filename, bucket, count=len(chunks))
 
                 return {
@@ -197,7 +203,12 @@ class AsyncDocumentProcessor:
             
             if summary_data:
                 enriched_summary = await self.embedder.process_summary(summary_data)
-                await vector_storage.insert_summary(enriched_summary)
+                insert_result = await vector_storage.insert_summary(enriched_summary)
+
+                # Only record the summary once the batch containing it has landed
+                if insert_result.get("status") != "success":
+                    return {"status": "failed", "message": f"Summary storage failed: {insert_result.get('error', insert_result.get('status'))}"}
+
                 tracker.mark_done("summary", filename, bucket)
 
                 return {
@@ -211,7 +222,7 @@ class AsyncDocumentProcessor:
             logger.error(f"❌ Summary processing failed for {filename}: {e}")
             return {"status": "failed", "message": f"Summary processing failed: {str(e)}"}
     
-    async def _process_news_excel(self, document_content: bytes, filename: str, bucket: str,
+    async def _process_news_excel(self, document_content: DocumentSource, filename: str, bucket: str,
                                 include_chunking: bool = True, include_summarization: bool = True,
                                 include_graphrag: bool = False, include_stp: bool = False) -> Dict[str, Any]:
         """Process news Excel files with row-by-row processing including STP"""
@@ -236,6 +247,7 @@ class AsyncDocumentProcessor:
             
             # Process chunks for each article (if enabled)
             all_chunks = []
+            chunked_articles = []
             if include_chunking:
                 logger.info(f"🔗 Creating chunks for {len(articles)} articles")
                 
@@ -257,20 +269,24 @@ class AsyncDocumentProcessor:
                             continue
                         all_chunks.extend(chunks)
                         logger.info(f"  Article {i+j+1}: {len(chunks)} chunks created")
-
-                        # Track individual news article chunks
                         if chunks:
-                            tracker.mark_done("chunks", filename, bucket,
-                                count=len(chunks),
-                                source_url=article["source_url"],
-                                article_title=article["title"],
-                                row_index=article["row_index"]
-                            )
+                            chunked_articles.append((article, len(chunks)))
                 
+                insert_result = {}
                 if all_chunks:
                     logger.info(f"🧮 Generating embeddings for {len(all_chunks)} chunks")
                     enriched_chunks = await self.embedder.process_chunks(all_chunks)
-                    await vector_storage.insert_chunks(enriched_chunks)
+                    insert_result = await vector_storage.insert_chunks(enriched_chunks)
+
+                if insert_result.get("status") == "success":
+                    # Track individual news article chunks once they have landed
+                    for article, chunk_count in chunked_articles:
+                        tracker.mark_done("chunks", filename, bucket,
+                            count=chunk_count,
+                            source_url=article["source_url"],
+                            article_title=article["title"],
+                            row_index=article["row_index"]
+                        )
 
                     tracker.mark_done("chunks", filename, bucket, count=len(all_chunks))
                     tracking_updates.append("chunks")
@@ -282,6 +298,8 @@ class AsyncDocumentProcessor:
                         "message": f"Created {len(all_chunks)} chunks from {len(articles)} articles"
                     }
                     logger.info(f"✅ Chunks completed: {len(all_chunks)} total chunks")
+                elif all_chunks:
+                    results["chunks"] = {"status": "failed", "message": f"Chunk storage failed: {insert_result.get('error', insert_result.get('status'))}"}
                 else:
                     results["chunks"] = {"status": "failed", "message": "No chunks created from articles"}
             
@@ -307,38 +325,44 @@ class AsyncDocumentProcessor:
                             logger.error(f"  Article {i+j+1}: summarization failed: {summary_data}")
                             continue
                         if summary_data:
-                            all_summaries.append(summary_data)
+                            all_summaries.append((article, summary_data))
                             logger.info(f"  Article {i+j+1}: Summary created")
-
-                            # Track individual news article summary
-                            tracker.mark_done("summary", filename, bucket,
-                                source_url=article["source_url"],
-                                article_title=article["title"],
-                                row_index=article["row_index"]
-                            )
                         else:
                             logger.warning(f"  Article {i+j+1}: Summary creation failed")
                 
+                stored_summaries = 0
                 if all_summaries:
                     logger.info(f"🧮 Generating embeddings for {len(all_summaries)} summaries")
                     
                     summary_tasks = []
-                    for summary_data in all_summaries:
+                    for _, summary_data in all_summaries:
                         task = self._process_single_summary_async(summary_data)
                         summary_tasks.append(task)
                     
-                    await asyncio.gather(*summary_tasks, return_exceptions=True)
+                    # Summaries are buffered together and land in the same batch insert
+                    insert_results = await asyncio.gather(*summary_tasks, return_exceptions=True)
 
+                    for (article, _), insert_result in zip(all_summaries, insert_results):
+                        if isinstance(insert_result, dict) and insert_result.get("status") == "success":
+                            stored_summaries += 1
+                            # Track individual news article summary once it has landed
+                            tracker.mark_done("summary", filename, bucket,
+                                source_url=article["source_url"],
+                                article_title=article["title"],
+                                row_index=article["row_index"]
+                            )
+
+                if stored_summaries > 0:
                     tracker.mark_done("summary", filename, bucket)
                     tracking_updates.append("summary")
                     
                     results["summary"] = {
                         "status": "success",
-                        "count": len(all_summaries),
+                        "count": stored_summaries,
                         "articles_processed": len(articles),
-                        "message": f"Created {len(all_summaries)} summaries from {len(articles)} articles"
+                        "message": f"Created {stored_summaries} summaries from {len(articles)} articles"
                     }
-                    logger.info(f"✅ Summaries completed: {len(all_summaries)} total summaries")
+                    logger.info(f"✅ Summaries completed: {stored_summaries} total summaries")
                 else:
                     results["summary"] = {"status": "failed", "message": "No summaries created from articles"}
             
@@ -584,13 +608,14 @@ class AsyncDocumentProcessor:
                 "non_stp_chunks": 0
             }
     
-    async def _process_single_summary_async(self, summary_data: SummaryData) -> None:
+    async def _process_single_summary_async(self, summary_data: SummaryData) -> Dict[str, Any]:
         """Process single summary with embedding and storage - async"""
         try:
             enriched_summary = await self.embedder.process_summary(summary_data)
-            await vector_storage.insert_summary(enriched_summary)
+            return await vector_storage.insert_summary(enriched_summary)
         except Exception as e:
             logger.error(f"Failed to process summary embedding: {e}")
+            return {"status": "failed", "inserted_count": 0, "error": str(e)}
     
     # Synchronous methods that run in executor
     def _process_chunks_sync(self, elements: List[Dict[str, Any]], filename: str, bucket: str) -> List[ChunkData]:
@@ -622,7 +647,7 @@ class AsyncDocumentProcessor:
             logger.error(f"Summarization failed for {filename}: {e}")
             return None
     
-    def _extract_articles_from_excel(self, document_content: bytes, filename: str, bucket: str) -> List[Dict[str, Any]]:
+    def _extract_articles_from_excel(self, document_content: DocumentSource, filename: str, bucket: str) -> List[Dict[str, Any]]:
         """Extract articles from Excel file starting from row 3 (header in row 2) - sync"""
         try:
             import pandas as pd
@@ -632,7 +657,10 @@ class AsyncDocumentProcessor:
             return []
         
         try:
-            df = pd.read_excel(io.BytesIO(document_content), engine='openpyxl', header=1)
+            if isinstance(document_content, (bytes, bytearray)):
+                document_content = io.BytesIO(document_content)
+            document_content.seek(0)
+            df = pd.read_excel(document_content, engine='openpyxl', header=1)
             
             logger.info(f"📊 Excel file {filename}: {len(df)} data rows found")
             logger.info(f"📋 Headers from row 2: {list(df.columns)}")
@@ -882,13 +910,89 @@ class AsyncEmbeddingProcessor:
                 self.external_service = None
                 logger.warning(f"   ⚠️ External API service not available")
 
+        # Persistent embedding cache, keyed by the model that actually produces the vectors
+        if self.use_local:
+            main_config = config.get('local_embeddings.main_embedding', {})
+            self.cache_model_name = main_config.get('model_name', self.model_name)
+            self.cache_dim = main_config.get('embedding_dim', self.embedding_dim)
+        else:
+            self.cache_model_name = self.model_name
+            self.cache_dim = self.embedding_dim
+
+        try:
+            self.embedding_cache = get_embedding_cache()
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache unavailable: {e}")
+            self.embedding_cache = None
+
     async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using local model or external API"""
+        """Generate embedding for text using the embedding cache, local model or external API"""
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
 
-        cleaned_text = text.strip()
+        embeddings = await self._generate_embeddings_cached([text.strip()])
+        return embeddings[0]
+
+    async def _generate_embeddings_cached(self, texts: List[str]) -> List[List[float]]:
+        """Resolve embeddings from the cache and only compute the misses (deduplicated)"""
+        if not self.embedding_cache:
+            return await self._generate_embeddings_uncached(texts)
+
+        loop = asyncio.get_event_loop()
+        embeddings = await loop.run_in_executor(
+            None, self.embedding_cache.get_many, self.cache_model_name, self.cache_dim, texts
+        )
+
+        # Group misses by normalized text so repeated boilerplate is embedded once
+        missing: Dict[str, List[int]] = {}
+        for index, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(normalize_text(texts[index]), []).append(index)
+
+        if missing:
+            miss_texts = [texts[indices[0]] for indices in missing.values()]
+            computed = await self._generate_embeddings_uncached(miss_texts)
 
+            for indices, embedding in zip(missing.values(), computed):
+                for index in indices:
+                    embeddings[index] = embedding
+
+            await loop.run_in_executor(
+                None, self.embedding_cache.put_many,
+                self.cache_model_name, self.cache_dim, miss_texts, computed
+            )
+
+        hits = len(texts) - sum(len(indices) for indices in missing.values())
+        if len(texts) > 1:
+            logger.info(f"🗄️ Embedding cache: {hits}/{len(texts)} hits, {len(missing)} unique texts embedded")
+
+        return embeddings
+
+    async def _generate_embeddings_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings with the local model or external API, bypassing the cache"""
+        if len(texts) == 1:
+            return [await self._generate_single_embedding(texts[0])]
+
+        if self.use_local:
+            # Use local model with batch encoding
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                None,
+                self.model_manager.encode,
+                'main',
+                texts,
+                False  # show_progress
+            )
+
+        # Use external API with batch encoding
+        if self.external_service:
+            return await self.external_service.generate_embeddings_batch(texts)
+
+        logger.error("No embedding service available")
+        return [[0.0] * self.embedding_dim] * len(texts)
+
+    async def _generate_single_embedding(self, cleaned_text: str) -> List[float]:
+        """Generate a single embedding using local model or external API"""
         try:
             if self.use_local:
                 # Use local model
@@ -922,26 +1026,9 @@ class AsyncEmbeddingProcessor:
         logger.info(f"🔄 Processing {len(chunks)} chunks with {mode_label}")
 
         try:
-            # Extract texts for batch encoding
+            # Extract texts for batch encoding (cached embeddings are reused)
             texts = [chunk.chunk_text.strip() for chunk in chunks]
-
-            if self.use_local:
-                # Use local model with batch encoding
-                loop = asyncio.get_event_loop()
-                embeddings = await loop.run_in_executor(
-                    None,
-                    self.model_manager.encode,
-                    'main',
-                    texts,
-                    False  # show_progress
-                )
-            else:
-                # Use external API with batch encoding
-                if self.external_service:
-                    embeddings = await self.external_service.generate_embeddings_batch(texts)
-                else:
-                    logger.error("No embedding service available")
-                    embeddings = [[0.0] * self.embedding_dim] * len(texts)
+            embeddings = await self._generate_embeddings_cached(texts)
 
             # Create enriched chunks
             enriched_chunks = []
@@ -3,17 +3,188 @@ Scientific Data Extractor
 
 Specialized extractor for scientific data files (CSV, Excel, NetCDF, HDF5, etc.)
 
+Files are read lazily: schema and metadata come from headers, samples from the
+leading rows/elements, and statistics are accumulated chunk by chunk, so peak
+memory is bounded by the chunk size rather than the file size.
 """
 
+import asyncio
+import math
 import os
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 from pathlib import Path
-import json
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+class RunningStatistics:
+    """Summary statistics accumulated over a stream of numeric chunks"""
+
+    def __init__(self, sample_size: int = 10000):
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+        self.sample_size = sample_size
+        self._sample = np.empty(0)
+        self._sample_keys = np.empty(0)
+        self._rng = np.random.default_rng(0)
+
+    def update(self, values) -> None:
+        """Fold a chunk of values (NaN counts as missing) into the statistics"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        valid = ~np.isnan(values)
+        self.missing += int(values.size - valid.sum())
+        values = values[valid]
+        n = values.size
+        if n == 0:
+            return
+
+        # Chan et al. parallel update of mean and sum of squared deviations
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        # Bottom-k sketch: the values with the smallest random keys form a uniform sample
+        sample = np.concatenate([self._sample, values])
+        keys = np.concatenate([self._sample_keys, self._rng.random(n)])
+        if keys.size > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            sample, keys = sample[keep], keys[keep]
+        self._sample, self._sample_keys = sample, keys
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas)"""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    @property
+    def median(self) -> float:
+        """Exact up to sample_size values, estimated from the uniform sample beyond that"""
+        return float(np.median(self._sample)) if self._sample.size else math.nan
+
+    def to_dict(self) -> Dict[str, Any]:
+        empty = self.count == 0
+        return {
+            "mean": math.nan if empty else self.mean,
+            "std": self.std,
+            "min": math.nan if empty else self.min,
+            "max": math.nan if empty else self.max,
+            "median": self.median,
+            "count": self.count,
+            "missing": self.missing
+        }
+
+
+class FrameSummary:
+    """Schema, sample rows and column statistics accumulated over DataFrame chunks"""
+
+    def __init__(self, sample_rows: int, include_stats: bool, stats_sample_size: int):
+        self.sample_rows = sample_rows
+        self.include_stats = include_stats
+        self.stats_sample_size = stats_sample_size
+        self.rows = 0
+        self.column_names: Optional[List[Any]] = None
+        self.dtypes: Dict[Any, Any] = {}
+        self.sample_data: List[Dict[str, Any]] = []
+        self._statistics: Dict[Any, RunningStatistics] = {}
+        self._non_numeric = set()
+
+    def add(self, df) -> None:
+        """Add a chunk: schema, sample and statistics"""
+        self.add_schema(df)
+        self.rows += len(df)
+        self.add_sample(df)
+        self.add_statistics(df)
+
+    def add_schema(self, df) -> None:
+        """Record columns, widening dtypes that differ between chunks (as a full read would)"""
+        from pandas.api.types import is_numeric_dtype
+
+        if self.column_names is None:
+            self.column_names = df.columns.tolist()
+        for col, dtype in df.dtypes.items():
+            previous = self.dtypes.get(col)
+            if previous is None or previous == dtype:
+                self.dtypes[col] = dtype
+            elif is_numeric_dtype(previous) and is_numeric_dtype(dtype):
+                self.dtypes[col] = np.result_type(previous, dtype)
+            else:
+                self.dtypes[col] = np.dtype(object)
+
+    def add_sample(self, df) -> None:
+        missing = self.sample_rows - len(self.sample_data)
+        if missing > 0:
+            self.sample_data.extend(df.head(missing).to_dict(orient='records'))
+
+    def add_statistics(self, df) -> None:
+        if not self.include_stats:
+            return
+
+        numeric_cols = set(df.select_dtypes(include=['number']).columns)
+        for col in df.columns:
+            if col in self._non_numeric:
+                continue
+            if col not in numeric_cols:
+                # Mixed columns are object dtype in a full read, so they get no statistics
+                self._non_numeric.add(col)
+                self._statistics.pop(col, None)
+                continue
+            stats = self._statistics.get(col)
+            if stats is None:
+                stats = self._statistics[col] = RunningStatistics(self.stats_sample_size)
+            stats.update(df[col].to_numpy(dtype='float64', na_value=np.nan))
+
+    @property
+    def statistics(self) -> Dict[Any, Dict[str, Any]]:
+        return {col: stats.to_dict() for col, stats in self._statistics.items()}
+
+    @property
+    def dtype_names(self) -> Dict[Any, str]:
+        return {col: str(dtype) for col, dtype in self.dtypes.items()}
+
+
+def leading_index(shape: Tuple[int, ...], max_elements: int) -> Tuple[slice, ...]:
+    """Smallest slice covering the first max_elements elements of an array in C order"""
+    index = []
+    for axis, size in enumerate(shape):
+        inner = int(np.prod(shape[axis + 1:], dtype=np.int64))
+        if inner == 0 or inner < max_elements:
+            rows = math.ceil(max_elements / inner) if inner else size
+            index.append(slice(0, min(size, rows)))
+            break
+        index.append(slice(0, 1))
+    return tuple(index)
+
+
+def iter_blocks(shape: Tuple[int, ...], max_elements: int) -> Iterator[Tuple[slice, ...]]:
+    """Slices tiling an array in C order, each holding at most max_elements elements"""
+    if not shape:
+        yield ()
+        return
+
+    inner = int(np.prod(shape[1:], dtype=np.int64))
+    if inner <= max_elements:
+        step = max(1, max_elements // max(inner, 1))
+        for start in range(0, shape[0], step):
+            yield (slice(start, min(start + step, shape[0])),)
+    else:
+        for i in range(shape[0]):
+            for rest in iter_blocks(shape[1:], max_elements):
+                yield (slice(i, i + 1),) + rest
+
+
 class ScientificDataExtractor:
     """Extract and process scientific data files for RAG."""
 
@@ -32,6 +203,11 @@ class ScientificDataExtractor:
         self.netcdf_sample_arrays = os.getenv("NETCDF_SAMPLE_ARRAYS", "True").lower() == "true"
         self.netcdf_max_sample = int(os.getenv("NETCDF_MAX_ARRAY_SAMPLE", "1000"))
 
+        # Chunked reading (bounds peak memory regardless of file size)
+        self.read_chunk_rows = int(os.getenv("SCIENTIFIC_DATA_READ_CHUNK_ROWS", "50000"))
+        self.max_chunk_elements = int(os.getenv("SCIENTIFIC_DATA_MAX_CHUNK_ELEMENTS", "1000000"))
+        self.stats_sample_size = int(os.getenv("SCIENTIFIC_DATA_STATS_SAMPLE_SIZE", "10000"))
+
         logger.info(f"📊 Scientific Data Extractor initialized - Formats: {self.supported_formats}")
 
     def is_scientific_data_file(self, filename: str) -> bool:
@@ -39,12 +215,23 @@ class ScientificDataExtractor:
         ext = Path(filename).suffix.lower().lstrip(".")
         return ext in self.supported_formats
 
+    async def _run_blocking(self, func, *args):
+        """Run file I/O and statistics off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    def _new_frame_summary(self) -> FrameSummary:
+        return FrameSummary(self.csv_sample_rows, self.csv_include_stats, self.stats_sample_size)
+
     async def extract_csv(self, file_path: str) -> Dict[str, Any]:
         """
         Extract data from CSV/TSV files.
 
         Returns structured data with schema, statistics, and samples.
         """
+        return await self._run_blocking(self._extract_csv_sync, file_path)
+
+    def _extract_csv_sync(self, file_path: str) -> Dict[str, Any]:
         import pandas as pd
 
         try:
@@ -53,44 +240,30 @@ class ScientificDataExtractor:
                 first_line = f.readline()
                 delimiter = '\t' if '\t' in first_line else ','
 
-            # Read CSV
-            df = pd.read_csv(file_path, delimiter=delimiter)
+            # Stream the CSV in row chunks
+            summary = self._new_frame_summary()
+            for chunk in pd.read_csv(file_path, delimiter=delimiter, chunksize=self.read_chunk_rows):
+                summary.add(chunk)
 
             # Extract metadata
             metadata = {
                 "format": "CSV/TSV",
                 "filename": Path(file_path).name,
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": df.columns.tolist(),
-                "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()}
+                "rows": summary.rows,
+                "columns": len(summary.column_names or []),
+                "column_names": summary.column_names or [],
+                "dtypes": summary.dtype_names
             }
 
-            # Generate statistics for numeric columns
-            statistics = {}
-            if self.csv_include_stats:
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                for col in numeric_cols:
-                    statistics[col] = {
-                        "mean": float(df[col].mean()),
-                        "std": float(df[col].std()),
-                        "min": float(df[col].min()),
-                        "max": float(df[col].max()),
-                        "median": float(df[col].median()),
-                        "count": int(df[col].count()),
-                        "missing": int(df[col].isna().sum())
-                    }
-
-            # Sample data
-            sample_data = df.head(self.csv_sample_rows).to_dict(orient='records')
+            statistics = summary.statistics
 
             # Generate semantic description
-            description = self._generate_csv_description(df, metadata, statistics)
+            description = self._generate_csv_description(None, metadata, statistics)
 
             return {
                 "metadata": metadata,
                 "statistics": statistics,
-                "sample_data": sample_data,
+                "sample_data": summary.sample_data,
                 "description": description,
                 "text_for_embedding": description
             }
@@ -101,39 +274,34 @@ class ScientificDataExtractor:
 
     async def extract_excel(self, file_path: str) -> Dict[str, Any]:
         """Extract data from Excel files (.xlsx, .xls)."""
-        import pandas as pd
+        return await self._run_blocking(self._extract_excel_sync, file_path)
 
+    def _extract_excel_sync(self, file_path: str) -> Dict[str, Any]:
         try:
-            excel_file = pd.ExcelFile(file_path)
+            all_sheet_names = self._excel_sheet_names(file_path)
             sheets_data = []
 
-            sheet_names = excel_file.sheet_names
+            sheet_names = all_sheet_names
             if not self.excel_all_sheets:
-                sheet_names = [sheet_names[0]]  # Only first sheet
+                sheet_names = sheet_names[:1]  # Only first sheet
 
             for sheet_name in sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
+                summary = self._new_frame_summary()
+                for chunk in self._iter_excel_chunks(file_path, sheet_name):
+                    summary.add(chunk)
 
                 sheet_info = {
                     "sheet_name": sheet_name,
-                    "rows": len(df),
-                    "columns": len(df.columns),
-                    "column_names": df.columns.tolist(),
-                    "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-                    "sample_data": df.head(self.csv_sample_rows).to_dict(orient='records')
+                    "rows": summary.rows,
+                    "columns": len(summary.column_names or []),
+                    "column_names": summary.column_names or [],
+                    "dtypes": summary.dtype_names,
+                    "sample_data": summary.sample_data
                 }
 
                 # Statistics
                 if self.csv_include_stats:
-                    numeric_cols = df.select_dtypes(include=['number']).columns
-                    sheet_info["statistics"] = {}
-                    for col in numeric_cols:
-                        sheet_info["statistics"][col] = {
-                            "mean": float(df[col].mean()),
-                            "std": float(df[col].std()),
-                            "min": float(df[col].min()),
-                            "max": float(df[col].max())
-                        }
+                    sheet_info["statistics"] = summary.statistics
 
                 sheets_data.append(sheet_info)
 
@@ -144,8 +312,8 @@ class ScientificDataExtractor:
                 "metadata": {
                     "format": "Excel",
                     "filename": Path(file_path).name,
-                    "total_sheets": len(excel_file.sheet_names),
-                    "sheet_names": excel_file.sheet_names
+                    "total_sheets": len(all_sheet_names),
+                    "sheet_names": all_sheet_names
                 },
                 "sheets": sheets_data,
                 "description": description,
@@ -156,62 +324,130 @@ class ScientificDataExtractor:
             logger.error(f"Error extracting Excel: {e}")
             raise
 
+    @staticmethod
+    def _excel_sheet_names(file_path: str) -> List[str]:
+        if Path(file_path).suffix.lower() == ".xlsx":
+            import openpyxl
+
+            workbook = openpyxl.load_workbook(file_path, read_only=True)
+            try:
+                return list(workbook.sheetnames)
+            finally:
+                workbook.close()
+
+        import pandas as pd
+        with pd.ExcelFile(file_path) as excel_file:
+            return list(excel_file.sheet_names)
+
+    def _iter_excel_chunks(self, file_path: str, sheet_name: str) -> Iterator[Any]:
+        """
+        Yield a sheet as DataFrame chunks.
+
+        .xlsx sheets are streamed row by row with openpyxl in read-only mode;
+        legacy .xls has no streaming reader, so it is read in one piece.
+        """
+        import pandas as pd
+
+        if Path(file_path).suffix.lower() != ".xlsx":
+            yield pd.read_excel(file_path, sheet_name=sheet_name)
+            return
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet_name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                yield pd.DataFrame()
+                return
+
+            columns = self._excel_column_names(header)
+            width = len(columns)
+            batch = []
+            emitted = False
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+                if len(batch) >= self.read_chunk_rows:
+                    yield pd.DataFrame.from_records(batch, columns=columns)
+                    batch = []
+                    emitted = True
+            if batch or not emitted:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _excel_column_names(header: Tuple[Any, ...]) -> List[str]:
+        """Header names the way pandas names them (Unnamed: i, duplicates as name.1)"""
+        names = []
+        seen: Dict[str, int] = {}
+        for i, value in enumerate(header):
+            name = f"Unnamed: {i}" if value is None else value
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            names.append(name)
+        return names
+
     async def extract_netcdf(self, file_path: str) -> Dict[str, Any]:
         """Extract data from NetCDF files."""
+        return await self._run_blocking(self._extract_netcdf_sync, file_path)
+
+    def _extract_netcdf_sync(self, file_path: str) -> Dict[str, Any]:
         try:
             import xarray as xr
 
-            # Open dataset
+            # Open lazily: variable data is only read when indexed
             ds = xr.open_dataset(file_path)
 
-            # Extract metadata
-            metadata = {
-                "format": "NetCDF",
-                "filename": Path(file_path).name,
-                "dimensions": {name: int(size) for name, size in ds.dims.items()},
-                "coordinates": list(ds.coords.keys()),
-                "variables": list(ds.data_vars.keys())
-            }
-
-            # Extract global attributes
-            if self.netcdf_extract_metadata:
-                metadata["attributes"] = {k: str(v) for k, v in ds.attrs.items()}
-
-            # Extract variable information
-            variables_info = []
-            for var_name in ds.data_vars:
-                var = ds[var_name]
-                var_info = {
-                    "name": var_name,
-                    "dimensions": list(var.dims),
-                    "shape": list(var.shape),
-                    "dtype": str(var.dtype),
-                    "attributes": {k: str(v) for k, v in var.attrs.items()}
+            try:
+                # Extract metadata
+                metadata = {
+                    "format": "NetCDF",
+                    "filename": Path(file_path).name,
+                    "dimensions": {name: int(size) for name, size in ds.sizes.items()},
+                    "coordinates": list(ds.coords.keys()),
+                    "variables": list(ds.data_vars.keys())
                 }
 
-                # Sample data if enabled
-                if self.netcdf_sample_arrays:
-                    # Get a small sample
-                    sample = var.values.flatten()[:self.netcdf_max_sample]
-                    var_info["sample_values"] = sample.tolist()
+                # Extract global attributes
+                if self.netcdf_extract_metadata:
+                    metadata["attributes"] = {k: str(v) for k, v in ds.attrs.items()}
+
+                # Extract variable information
+                variables_info = []
+                for var_name in ds.data_vars:
+                    var = ds[var_name]
+                    var_info = {
+                        "name": var_name,
+                        "dimensions": list(var.dims),
+                        "shape": list(var.shape),
+                        "dtype": str(var.dtype),
+                        "attributes": {k: str(v) for k, v in var.attrs.items()}
+                    }
+
+                    # Sample data if enabled
+                    if self.netcdf_sample_arrays:
+                        # Read only the slice holding the first elements
+                        var_info["sample_values"] = self._sample_array(var, lambda index: var[index].values)
 
-                    # Statistics
-                    try:
-                        var_info["statistics"] = {
-                            "min": float(var.min()),
-                            "max": float(var.max()),
-                            "mean": float(var.mean())
-                        }
-                    except:
-                        pass
+                        # Statistics, accumulated block by block
+                        stats = self._array_statistics(var.shape, var.dtype, lambda index: var[index].values)
+                        if stats is not None:
+                            var_info["statistics"] = stats
 
-                variables_info.append(var_info)
+                    variables_info.append(var_info)
+            finally:
+                ds.close()
 
             # Generate description
             description = self._generate_netcdf_description(metadata, variables_info)
 
-            ds.close()
-
             return {
                 "metadata": metadata,
                 "variables": variables_info,
@@ -223,8 +459,35 @@ class ScientificDataExtractor:
             logger.error(f"Error extracting NetCDF: {e}")
             raise
 
+    def _sample_array(self, array, read) -> List[Any]:
+        """First netcdf_max_sample elements (C order), reading only the leading slice"""
+        if int(np.prod(array.shape, dtype=np.int64)) == 0:
+            return []
+        values = np.asarray(read(leading_index(array.shape, self.netcdf_max_sample)))
+        return values.ravel()[:self.netcdf_max_sample].tolist()
+
+    def _array_statistics(self, shape, dtype, read) -> Optional[Dict[str, float]]:
+        """min/max/mean over an array read in bounded blocks (None for non-numeric data)"""
+        if not np.issubdtype(dtype, np.number) or np.issubdtype(dtype, np.complexfloating):
+            return None
+
+        try:
+            stats = RunningStatistics(sample_size=1)
+            for index in iter_blocks(tuple(shape), self.max_chunk_elements):
+                stats.update(read(index))
+        except Exception as e:
+            logger.debug(f"Statistics skipped: {e}")
+            return None
+
+        if stats.count == 0:
+            return None
+        return {"min": stats.min, "max": stats.max, "mean": stats.mean}
+
     async def extract_hdf5(self, file_path: str) -> Dict[str, Any]:
         """Extract data from HDF5 files."""
+        return await self._run_blocking(self._extract_hdf5_sync, file_path)
+
+    def _extract_hdf5_sync(self, file_path: str) -> Dict[str, Any]:
         try:
             import h5py
 
@@ -246,10 +509,9 @@ class ScientificDataExtractor:
                         "attributes": {k: str(v) for k, v in obj.attrs.items()}
                     }
 
-                    # Sample data
+                    # Sample data (leading slice only, never the whole dataset)
                     if self.netcdf_sample_arrays and obj.size > 0:
-                        sample = obj[...].flatten()[:self.netcdf_max_sample]
-                        info["sample_values"] = sample.tolist()
+                        info["sample_values"] = self._sample_array(obj, lambda index: obj[index])
 
                     result["datasets"].append(info)
 
@@ -280,40 +542,48 @@ class ScientificDataExtractor:
 
     async def extract_parquet(self, file_path: str) -> Dict[str, Any]:
         """Extract data from Parquet files."""
+        return await self._run_blocking(self._extract_parquet_sync, file_path)
+
+    def _extract_parquet_sync(self, file_path: str) -> Dict[str, Any]:
         try:
-            import pandas as pd
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(file_path)
 
-            df = pd.read_parquet(file_path)
+            # Schema and row count come from the footer; no data is read
+            empty = parquet_file.schema_arrow.empty_table().to_pandas()
+            summary = self._new_frame_summary()
+            summary.add_schema(empty)
+            summary.rows = parquet_file.metadata.num_rows
 
             metadata = {
                 "format": "Parquet",
                 "filename": Path(file_path).name,
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": df.columns.tolist(),
-                "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()}
+                "rows": summary.rows,
+                "columns": len(summary.column_names),
+                "column_names": summary.column_names,
+                "dtypes": summary.dtype_names
             }
 
-            # Sample and statistics (same as CSV)
-            sample_data = df.head(self.csv_sample_rows).to_dict(orient='records')
+            # Sample from the first batch only
+            first_batch = next(parquet_file.iter_batches(batch_size=max(1, self.csv_sample_rows)), None)
+            if first_batch is not None:
+                summary.add_sample(first_batch.to_pandas())
 
-            statistics = {}
+            # Statistics read only the numeric columns (column projection), batch by batch
             if self.csv_include_stats:
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                for col in numeric_cols:
-                    statistics[col] = {
-                        "mean": float(df[col].mean()),
-                        "std": float(df[col].std()),
-                        "min": float(df[col].min()),
-                        "max": float(df[col].max())
-                    }
+                numeric_cols = empty.select_dtypes(include=['number']).columns.tolist()
+                if numeric_cols:
+                    for batch in parquet_file.iter_batches(batch_size=self.read_chunk_rows, columns=numeric_cols):
+                        summary.add_statistics(batch.to_pandas())
 
-            description = self._generate_csv_description(df, metadata, statistics)
+            statistics = summary.statistics
+            description = self._generate_csv_description(None, metadata, statistics)
 
             return {
                 "metadata": metadata,
                 "statistics": statistics,
-                "sample_data": sample_data,
+                "sample_data": summary.sample_data,
                 "description": description,
                 "text_for_embedding": description
             }
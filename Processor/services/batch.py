@@ -1,5 +1,6 @@
 import logging
 import asyncio
+from itertools import islice
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
@@ -32,7 +33,8 @@ class AsyncBatchProcessor:
     async def process_all_buckets(self, skip_processed: bool = True,
                                  include_graphrag: bool = True, include_chunking: bool = True,
                                  include_summarization: bool = True, include_stp: bool = False,
-                                 max_documents_per_bucket: Optional[int] = None) -> Dict[str, Any]:
+                                 max_documents_per_bucket: Optional[int] = None,
+                                 incremental: bool = False) -> Dict[str, Any]:
         """Process all documents from all processable buckets with STP support"""
         
         self.stats["start_time"] = datetime.now()
@@ -54,7 +56,8 @@ class AsyncBatchProcessor:
             for bucket in processable_buckets:
                 task = self._process_bucket_with_semaphore(
                     semaphore, bucket, skip_processed, include_graphrag, 
-                    include_chunking, include_summarization, include_stp, max_documents_per_bucket
+                    include_chunking, include_summarization, include_stp, max_documents_per_bucket,
+                    incremental
                 )
                 bucket_tasks.append(task)
             
@@ -98,6 +101,7 @@ class AsyncBatchProcessor:
                     "include_summarization": include_summarization,
                     "include_graphrag": include_graphrag,
                     "include_stp": include_stp,
+                    "incremental": incremental,
                     "max_concurrent_tasks": self.max_concurrent_tasks
                 }
             }
@@ -116,19 +120,25 @@ class AsyncBatchProcessor:
     async def _process_bucket_with_semaphore(self, semaphore: asyncio.Semaphore, bucket: str, 
                                            skip_processed: bool, include_graphrag: bool, 
                                            include_chunking: bool, include_summarization: bool,
-                                           include_stp: bool, max_documents: Optional[int]) -> Dict[str, Any]:
+                                           include_stp: bool, max_documents: Optional[int],
+                                           incremental: bool = False) -> Dict[str, Any]:
         """Process bucket with semaphore for concurrency control"""
         async with semaphore:
             return await self.process_bucket(
                 bucket, skip_processed, include_graphrag, 
-                include_chunking, include_summarization, include_stp, max_documents
+                include_chunking, include_summarization, include_stp, max_documents, incremental
             )
     
     async def process_bucket(self, bucket: str, skip_processed: bool = True,
                            include_graphrag: bool = True, include_chunking: bool = True,
                            include_summarization: bool = True, include_stp: bool = False,
-                           max_documents: Optional[int] = None) -> Dict[str, Any]:
-        """Process all documents in a specific bucket with STP support"""
+                           max_documents: Optional[int] = None, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Process all documents in a specific bucket with STP support.
+        
+        With incremental=True only objects modified since the bucket's stored
+        watermark are listed; the watermark advances after the run.
+        """
         
         logger.info(f"📂 Starting async bucket processing: {bucket}")
         logger.info(f"⚙️ Document concurrency limit: {self.max_concurrent_tasks}")
@@ -150,33 +160,51 @@ class AsyncBatchProcessor:
             if not minio_service:
                 raise Exception("MinIO service not available")
             
-            objects = await self._run_in_executor(minio_service.list_objects, bucket)
-            logger.info(f"📄 Found {len(objects)} objects in bucket")
+            watermark_key = None
+            modified_since = None
+            if incremental:
+                watermark_key = self._watermark_key(
+                    bucket, include_chunking, include_summarization, include_graphrag, include_stp
+                )
+                modified_since = await self._run_in_executor(tracker.get_bucket_watermark, watermark_key)
+                logger.info(f"🕒 Incremental listing of {bucket} since {modified_since or 'the beginning'}")
             
-            documents = self._filter_documents(objects)
+            # Metadata comes from the listing itself; it stops early once max_documents are found
+            listed = await self._run_in_executor(
+                self._list_bucket_documents, minio_service, bucket, modified_since, max_documents
+            )
+            documents = [doc["object_name"] for doc in listed]
+            last_modified = {doc["object_name"]: doc["last_modified"] for doc in listed}
             logger.info(f"📋 Found {len(documents)} document files in bucket {bucket}")
             
-            if max_documents and len(documents) > max_documents:
-                documents = documents[:max_documents]
+            truncated = bool(max_documents) and len(documents) >= max_documents
+            if truncated:
                 logger.info(f"🔢 Limited to {max_documents} documents")
             
+            if skip_processed:
+                documents = await self._plan_unprocessed_documents(
+                    documents, bucket, include_chunking, include_summarization, include_graphrag, include_stp
+                )
+            
             semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
             
             document_tasks = []
             for i, file_path in enumerate(documents):
                 task = self._process_single_document_async(
-                    semaphore, file_path, bucket, skip_processed, 
+                    semaphore, file_path, bucket, False, 
                     include_chunking, include_summarization, include_graphrag, include_stp,
                     i + 1, len(documents)
                 )
                 document_tasks.append(task)
             
             document_results = await asyncio.gather(*document_tasks, return_exceptions=True)
+            failed_paths = []
             
             for i, result in enumerate(document_results):
                 filename = documents[i].split('/')[-1] if '/' in documents[i] else documents[i]
                 
                 if isinstance(result, Exception):
+                    failed_paths.append(documents[i])
                     bucket_stats["failed_documents"] += 1
                     bucket_stats["documents_processed"] += 1
                     bucket_stats["processing_errors"].append({
@@ -194,9 +222,13 @@ class AsyncBatchProcessor:
                         bucket_stats["successful_documents"] += 1
                         logger.info(f"✅ {filename} processed successfully")
                     else:
+                        failed_paths.append(documents[i])
                         bucket_stats["failed_documents"] += 1
                         logger.warning(f"⚠️ {filename} processing failed: {result.get('message', 'Unknown error')}")
             
+            if incremental and not truncated and last_modified:
+                await self._advance_watermark(watermark_key, last_modified, failed_paths)
+            
             success_rate = (bucket_stats["successful_documents"] / bucket_stats["documents_processed"]) * 100 if bucket_stats["documents_processed"] > 0 else 0
             logger.info(f"🏁 Bucket {bucket} async processing completed: {bucket_stats['successful_documents']}/{bucket_stats['documents_processed']} successful ({success_rate:.1f}%)")
             
@@ -226,16 +258,19 @@ class AsyncBatchProcessor:
             
             try:
                 minio_service = await self._get_minio_service_async()
-                document_content = await self._run_in_executor(
-                    minio_service.get_document, bucket, file_path
+                document_stream = await self._run_in_executor(
+                    minio_service.get_document_stream, bucket, file_path
                 )
                 
                 from processors.pipeline import processor
                 
-                result = await processor.process_document(
-                    document_content, filename, bucket,
-                    include_chunking, include_summarization, include_graphrag, include_stp
-                )
+                try:
+                    result = await processor.process_document(
+                        document_stream, filename, bucket,
+                        include_chunking, include_summarization, include_graphrag, include_stp
+                    )
+                finally:
+                    document_stream.close()
                 
                 return result
                 
@@ -326,16 +361,19 @@ class AsyncBatchProcessor:
             filename = file_identifier.split('/')[-1] if '/' in file_identifier else file_identifier
             logger.info(f"📝 Processing {doc_num}/{total_docs}: {filename} from {bucket}")
             
-            document_content = await self._run_in_executor(
-                minio_service.get_document, bucket, file_identifier
+            document_stream = await self._run_in_executor(
+                minio_service.get_document_stream, bucket, file_identifier
             )
             
             from processors.pipeline import processor
             
-            result = await processor.process_document(
-                document_content, filename, bucket,
-                include_chunking, include_summarization, include_graphrag, include_stp
-            )
+            try:
+                result = await processor.process_document(
+                    document_stream, filename, bucket,
+                    include_chunking, include_summarization, include_graphrag, include_stp
+                )
+            finally:
+                document_stream.close()
             
             return result
     
@@ -365,56 +403,102 @@ class AsyncBatchProcessor:
         
         return None
     
-    def _filter_documents(self, objects: List[str]) -> List[str]:
-        """Filter objects to include only document files"""
-        document_extensions = ['.pdf', '.docx', '.doc', '.xlsx', '.xls', '.csv', '.txt']
+    def _list_bucket_documents(self, minio_service, bucket: str, modified_since: Optional[datetime],
+                               max_documents: Optional[int]) -> List[Dict[str, Any]]:
+        """Consume the streamed bucket listing, stopping after max_documents"""
+        documents = minio_service.iter_bucket_documents(bucket, modified_since=modified_since)
+        return list(islice(documents, max_documents or None))
+    
+    @staticmethod
+    def _watermark_key(bucket: str, include_chunking: bool, include_summarization: bool,
+                       include_graphrag: bool, include_stp: bool) -> str:
+        """Watermarks are kept per bucket and set of operations, so enabling a new operation relists everything"""
+        operations = [name for name, enabled in (
+            ("chunks", include_chunking), ("summary", include_summarization),
+            ("graphrag", include_graphrag), ("stp", include_stp)
+        ) if enabled]
+        return f"{bucket}:{'+'.join(operations)}"
+    
+    async def _advance_watermark(self, watermark_key: str, last_modified: Dict[str, datetime],
+                                 failed_paths: List[str]):
+        """Move the watermark to the newest listed object, or hold it at the oldest failure"""
+        failed_times = [last_modified[path] for path in failed_paths if last_modified.get(path)]
+        listed_times = [value for value in last_modified.values() if value]
+        if not listed_times:
+            return
+        watermark = min(failed_times) if failed_times else max(listed_times)
+        
+        # Listings compare with >=, so objects at the watermark itself are seen again
+        await self._run_in_executor(tracker.set_bucket_watermark, watermark_key, watermark)
+        logger.info(f"🕒 Watermark for {watermark_key} set to {watermark}")
+    
+    async def _plan_unprocessed_documents(self, documents: List[str], bucket: str,
+                                          include_chunking: bool, include_summarization: bool,
+                                          include_graphrag: bool, include_stp: bool) -> List[str]:
+        """Drop already processed documents using one bulk tracker lookup for the whole bucket"""
+        filenames = [file_path.split('/')[-1] if '/' in file_path else file_path for file_path in documents]
+        try:
+            statuses = await self._run_in_executor(
+                tracker.get_statuses, [(filename, bucket) for filename in filenames]
+            )
+        except Exception as e:
+            logger.error(f"❌ Bulk status lookup failed for {bucket}, processing all documents: {e}")
+            return documents
+        
+        pending = [
+            file_path for file_path, filename in zip(documents, filenames)
+            if not self._status_covers(
+                statuses.get((filename, bucket), {}),
+                include_chunking, include_summarization, include_graphrag, include_stp
+            )
+        ]
+        
+        skipped = len(documents) - len(pending)
+        if skipped:
+            logger.info(f"⏭️ Skipping {skipped} already processed documents in {bucket}")
+        return pending
+    
+    @staticmethod
+    def _status_covers(status: Dict[str, Any], include_chunking: bool, include_summarization: bool,
+                       include_graphrag: bool, include_stp: bool) -> bool:
+        """Check if a tracker status covers every requested process"""
+        if not status or status.get("status") in ("not_found", "error"):
+            return False
+        
+        processes_needed = []
+        processes_done = []
+        
+        if include_chunking:
+            processes_needed.append("chunks")
+            if status.get("chunks_done", False):
+                processes_done.append("chunks")
+        
+        if include_summarization:
+            processes_needed.append("summary")
+            if status.get("summary_done", False):
+                processes_done.append("summary")
         
-        documents = []
-        for obj_path in objects:
-            if any(obj_path.lower().endswith(ext) for ext in document_extensions):
-                documents.append(obj_path)
+        if include_graphrag:
+            processes_needed.append("graphrag")
+            if status.get("graphrag_done", False):
+                processes_done.append("graphrag")
         
-        return documents
+        if include_stp:
+            processes_needed.append("stp")
+            if status.get("stp_done", False):
+                processes_done.append("stp")
+        
+        return len(processes_done) == len(processes_needed) and len(processes_needed) > 0
     
     async def _is_document_processed_async(self, filename: str, bucket: str,
                                          include_chunking: bool, include_summarization: bool,
                                          include_graphrag: bool, include_stp: bool) -> bool:
         """Check if document already processed with current configuration including STP"""
         try:
-            status = tracker.get_status(filename, bucket)
-            
-            if status.get("status") == "not_found":
-                return False
-            
-            chunks_done = status.get("chunks_done", False)
-            summary_done = status.get("summary_done", False)
-            graphrag_done = status.get("graphrag_done", False)
-            stp_done = status.get("stp_done", False)
-            
-            processes_needed = []
-            processes_done = []
-            
-            if include_chunking:
-                processes_needed.append("chunks")
-                if chunks_done:
-                    processes_done.append("chunks")
-            
-            if include_summarization:
-                processes_needed.append("summary")
-                if summary_done:
-                    processes_done.append("summary")
-            
-            if include_graphrag:
-                processes_needed.append("graphrag")
-                if graphrag_done:
-                    processes_done.append("graphrag")
-            
-            if include_stp:
-                processes_needed.append("stp")
-                if stp_done:
-                    processes_done.append("stp")
-            
-            return len(processes_done) == len(processes_needed) and len(processes_needed) > 0
+            status = await self._run_in_executor(tracker.get_status, filename, bucket)
+            return self._status_covers(
+                status, include_chunking, include_summarization, include_graphrag, include_stp
+            )
             
         except Exception as e:
             logger.error(f"❌ Error checking document status for {filename}: {e}")
@@ -0,0 +1,281 @@
+"""
+Persistent Embedding Cache for Document Processing
+Content-addressed on-disk cache so unchanged text is never embedded twice
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Size of a cache key (blake2b digest) in bytes
+KEY_SIZE = 16
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (unicode NFC, collapsed whitespace)"""
+    text = unicodedata.normalize('NFC', text or '')
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def make_cache_key(model_name: str, text: str) -> bytes:
+    """Build the content-addressed key for a model/text pair"""
+    payload = f"{model_name}\x00{normalize_text(text)}".encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=KEY_SIZE).digest()
+
+
+class _ModelStore:
+    """
+    Append-only segment store for a single (model, dimension) pair.
+
+    Each segment is two files:
+        seg_000001.vec  - raw float32 rows (dim * 4 bytes each)
+        seg_000001.keys - fixed-width 16-byte keys, row-aligned with .vec
+
+    Reads go through numpy memmaps, so cached vectors are paged in by the OS
+    instead of being held in Python memory.
+    """
+
+    def __init__(self, directory: Path, dim: int, segment_rows: int):
+        self.directory = directory
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.segment_rows = segment_rows
+        self.index: Dict[bytes, Tuple[int, int]] = {}
+        self.segment_sizes: Dict[int, int] = {}
+        self._maps: Dict[int, np.memmap] = {}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _vec_path(self, segment_id: int) -> Path:
+        return self.directory / f"seg_{segment_id:06d}.vec"
+
+    def _keys_path(self, segment_id: int) -> Path:
+        return self.directory / f"seg_{segment_id:06d}.keys"
+
+    def _load(self):
+        """Rebuild the in-memory key index from segment key files"""
+        for keys_path in sorted(self.directory.glob("seg_*.keys")):
+            try:
+                segment_id = int(keys_path.stem.split('_')[1])
+            except (IndexError, ValueError):
+                continue
+
+            vec_path = self._vec_path(segment_id)
+            if not vec_path.exists():
+                keys_path.unlink(missing_ok=True)
+                continue
+
+            key_rows = keys_path.stat().st_size // KEY_SIZE
+            vec_rows = vec_path.stat().st_size // self.row_bytes
+            rows = min(key_rows, vec_rows)
+
+            # Trim partial writes so both files stay row-aligned for appends
+            if keys_path.stat().st_size != rows * KEY_SIZE:
+                with open(keys_path, 'r+b') as f:
+                    f.truncate(rows * KEY_SIZE)
+            if vec_path.stat().st_size != rows * self.row_bytes:
+                with open(vec_path, 'r+b') as f:
+                    f.truncate(rows * self.row_bytes)
+
+            keys = keys_path.read_bytes()
+            for row in range(rows):
+                self.index[keys[row * KEY_SIZE:(row + 1) * KEY_SIZE]] = (segment_id, row)
+            self.segment_sizes[segment_id] = rows
+
+    @property
+    def active_segment(self) -> int:
+        return max(self.segment_sizes) if self.segment_sizes else 1
+
+    def size_bytes(self) -> int:
+        return sum(rows * (self.row_bytes + KEY_SIZE) for rows in self.segment_sizes.values())
+
+    def _get_map(self, segment_id: int, row: int) -> np.memmap:
+        mapped = self._maps.get(segment_id)
+        if mapped is None or row >= mapped.shape[0]:
+            rows = self.segment_sizes[segment_id]
+            mapped = np.memmap(self._vec_path(segment_id), dtype=np.float32, mode='r',
+                               shape=(rows, self.dim))
+            self._maps[segment_id] = mapped
+        return mapped
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        location = self.index.get(key)
+        if location is None:
+            return None
+        segment_id, row = location
+        return self._get_map(segment_id, row)[row].tolist()
+
+    def put_many(self, items: List[Tuple[bytes, List[float]]]):
+        """Append vectors, rolling over to a new segment when the active one is full"""
+        pending = [(key, vector) for key, vector in items if key not in self.index]
+        while pending:
+            segment_id = self.active_segment
+            used = self.segment_sizes.get(segment_id, 0)
+            if used >= self.segment_rows:
+                segment_id += 1
+                used = 0
+
+            take = pending[:self.segment_rows - used]
+            pending = pending[len(take):]
+
+            vectors = np.asarray([vector for _, vector in take], dtype=np.float32)
+            # Vectors first: a crash between the writes leaves orphan rows that _load trims
+            with open(self._vec_path(segment_id), 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._keys_path(segment_id), 'ab') as f:
+                f.write(b''.join(key for key, _ in take))
+
+            for offset, (key, _) in enumerate(take):
+                self.index[key] = (segment_id, used + offset)
+            self.segment_sizes[segment_id] = used + len(take)
+
+    def oldest_segment_mtime(self) -> Optional[float]:
+        if not self.segment_sizes:
+            return None
+        return self._vec_path(min(self.segment_sizes)).stat().st_mtime
+
+    def evict_oldest_segment(self) -> int:
+        """Drop the oldest segment and return the number of bytes freed"""
+        if not self.segment_sizes:
+            return 0
+        segment_id = min(self.segment_sizes)
+        rows = self.segment_sizes.pop(segment_id)
+        self._maps.pop(segment_id, None)
+        self.index = {key: loc for key, loc in self.index.items() if loc[0] != segment_id}
+        self._vec_path(segment_id).unlink(missing_ok=True)
+        self._keys_path(segment_id).unlink(missing_ok=True)
+        return rows * (self.row_bytes + KEY_SIZE)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache shared by all ingestion runs.
+
+    Keys are blake2b hashes of the model name plus normalized text, so the
+    same boilerplate appearing in many documents (or a document re-ingested
+    after a non-embedding pipeline change) resolves to a single stored vector.
+    Storage is size-bounded: once the total exceeds max_size_mb the oldest
+    segments are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: int = 2048, segment_rows: int = 50000):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.segment_rows = max(1, segment_rows)
+        self._stores: Dict[Tuple[str, int], _ModelStore] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"🗄️ Embedding cache at {self.cache_dir} (max {max_size_mb} MB)")
+
+    def _store_dir(self, model_name: str, dim: int) -> Path:
+        slug = re.sub(r'[^A-Za-z0-9._-]+', '_', model_name).strip('_') or 'model'
+        return self.cache_dir / f"{slug}_{dim}d"
+
+    def _get_store(self, model_name: str, dim: int) -> _ModelStore:
+        store = self._stores.get((model_name, dim))
+        if store is None:
+            store = _ModelStore(self._store_dir(model_name, dim), dim, self.segment_rows)
+            self._stores[(model_name, dim)] = store
+        return store
+
+    def get_many(self, model_name: str, dim: int, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up cached embeddings; misses are returned as None"""
+        with self._lock:
+            try:
+                store = self._get_store(model_name, dim)
+                results = [store.get(make_cache_key(model_name, text)) for text in texts]
+            except Exception as e:
+                logger.warning(f"⚠️ Embedding cache lookup failed: {e}")
+                results = [None] * len(texts)
+
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(texts) - hits
+            return results
+
+    def put_many(self, model_name: str, dim: int, texts: List[str], embeddings: List[List[float]]):
+        """Store embeddings, skipping zero vectors and dimension mismatches from failed calls"""
+        items = []
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None or len(embedding) != dim or not any(embedding):
+                continue
+            items.append((make_cache_key(model_name, text), embedding))
+
+        if not items:
+            return
+
+        with self._lock:
+            try:
+                self._get_store(model_name, dim).put_many(items)
+                self._enforce_size_limit()
+            except Exception as e:
+                logger.warning(f"⚠️ Embedding cache write failed: {e}")
+
+    def get(self, model_name: str, dim: int, text: str) -> Optional[List[float]]:
+        return self.get_many(model_name, dim, [text])[0]
+
+    def put(self, model_name: str, dim: int, text: str, embedding: List[float]):
+        self.put_many(model_name, dim, [text], [embedding])
+
+    def _enforce_size_limit(self):
+        """Evict the oldest segments across all models until under the size limit"""
+        total = sum(store.size_bytes() for store in self._stores.values())
+        while total > self.max_size_bytes:
+            candidates = [(store.oldest_segment_mtime(), store) for store in self._stores.values()
+                          if store.segment_sizes]
+            if not candidates:
+                break
+            _, oldest_store = min(candidates, key=lambda item: item[0])
+            freed = oldest_store.evict_oldest_segment()
+            total -= freed
+            logger.info(f"🗑️ Evicted embedding cache segment from {oldest_store.directory.name} ({freed} bytes)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_directory": str(self.cache_dir),
+                "models": {store.directory.name: len(store.index) for store in self._stores.values()},
+                "size_bytes": sum(store.size_bytes() for store in self._stores.values()),
+                "max_size_bytes": self.max_size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+# Global embedding cache instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get or create the global embedding cache (None when disabled)"""
+    global _embedding_cache
+    cache_config = config.get('embedding_cache', {})
+    if not cache_config.get('enabled', False):
+        return None
+
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            cache_dir=cache_config.get('cache_dir', './data/embeddings'),
+            max_size_mb=cache_config.get('max_size_mb', 2048),
+            segment_rows=cache_config.get('segment_rows', 50000)
+        )
+    return _embedding_cache
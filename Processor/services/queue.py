@@ -1,35 +1,251 @@
 import asyncio
+import heapq
+import json
 import logging
+import sqlite3
+import threading
 import uuid
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from enum import Enum
 
 from models import ProcessingTask, ProcessingStatus
 
 logger = logging.getLogger(__name__)
 
+# Statuses that still hold a slot in the backlog (deferred tasks do not)
+BACKLOG_STATUSES = {ProcessingStatus.PENDING, ProcessingStatus.PROCESSING, ProcessingStatus.RETRYING}
+OPEN_STATUSES = BACKLOG_STATUSES | {ProcessingStatus.DEFERRED}
+
+
+class QueueFullError(Exception):
+    """Raised when a submission is rejected because the backlog limit is reached"""
+    pass
+
+
+class QueueJournal:
+    """
+    SQLite journal that makes queued tasks survive restarts.
+
+    Writes are coalesced per task and committed in batches on a single
+    writer thread, so status changes never block the event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                bucket TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                seq INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                completed_at TEXT,
+                error_message TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                result TEXT
+            )
+        """)
+        self.conn.commit()
+
+        # Latest row per task (None = delete) waiting for the writer thread
+        self._pending: Dict[str, Optional[tuple]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="queue-journal")
+
+    def save(self, task: ProcessingTask, priority: int, seq: int):
+        self._enqueue(task.task_id, (
+            task.task_id, task.bucket, task.filename, task.file_path, task.status.value,
+            priority, seq, task.created_at.isoformat(),
+            task.started_at.isoformat() if task.started_at else None,
+            task.completed_at.isoformat() if task.completed_at else None,
+            task.error_message, task.attempts, task.max_attempts,
+            json.dumps(task.result, default=str) if task.result is not None else None
+        ))
+
+    def delete(self, task_ids: List[str]):
+        for task_id in task_ids:
+            self._enqueue(task_id, None)
+
+    def _enqueue(self, task_id: str, row: Optional[tuple]):
+        with self._pending_lock:
+            self._pending[task_id] = row
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._writer.submit(self._flush)
+
+    def _flush(self):
+        """Write everything queued since the last flush in one transaction"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for row in pending.values() if row is not None]
+                )
+                self.conn.executemany(
+                    "DELETE FROM tasks WHERE task_id = ?",
+                    [(task_id,) for task_id, row in pending.items() if row is None]
+                )
+        except Exception as e:
+            logger.error(f"❌ Failed to write {len(pending)} tasks to the queue journal: {e}")
+
+    def load(self) -> List[Tuple[ProcessingTask, int, int]]:
+        """Load open tasks, dropping finished rows left in the journal"""
+        open_values = [status.value for status in OPEN_STATUSES]
+        placeholders = ", ".join("?" for _ in open_values)
+        with self.conn:
+            self.conn.execute(f"DELETE FROM tasks WHERE status NOT IN ({placeholders})", open_values)
+        rows = self.conn.execute(
+            "SELECT task_id, bucket, filename, file_path, status, priority, seq, created_at, "
+            "started_at, completed_at, error_message, attempts, max_attempts, result "
+            f"FROM tasks WHERE status IN ({placeholders}) ORDER BY seq",
+            open_values
+        ).fetchall()
+
+        loaded = []
+        for row in rows:
+            task = ProcessingTask(
+                task_id=row[0],
+                bucket=row[1],
+                filename=row[2],
+                file_path=row[3],
+                status=ProcessingStatus(row[4]),
+                created_at=datetime.fromisoformat(row[7]),
+                started_at=datetime.fromisoformat(row[8]) if row[8] else None,
+                completed_at=datetime.fromisoformat(row[9]) if row[9] else None,
+                error_message=row[10],
+                attempts=row[11],
+                max_attempts=row[12],
+                result=json.loads(row[13]) if row[13] else None
+            )
+            loaded.append((task, row[5], row[6]))
+        return loaded
+
+    def close(self):
+        """Drain pending writes, then close the connection"""
+        self._writer.shutdown(wait=True)
+        self.conn.close()
+
 
 class ProcessingQueue:
-    """Simple auto-start processing queue"""
-    
-    def __init__(self, batch_processor=None, max_concurrent_tasks: int = 3):
+    """
+    Durable priority processing queue with auto-start.
+
+    Pending tasks sit in a heap ordered by (priority, submission order) and open
+    tasks are written to a SQLite journal, so queued work is recovered on
+    restart. Finished tasks are dropped from the journal and only kept in memory. The dispatcher sleeps until a task is added or a running task
+    finishes instead of polling.
+    """
+
+    def __init__(self, batch_processor=None, max_concurrent_tasks: int = 3,
+                 journal_path: Optional[str] = None, max_backlog: int = 0,
+                 backpressure_mode: str = "reject"):
         self.batch_processor = batch_processor
         self.max_concurrent_tasks = max_concurrent_tasks
+        self.max_backlog = max_backlog
+        self.backpressure_mode = backpressure_mode
         self.tasks: Dict[str, ProcessingTask] = {}
         self.active_tasks: Dict[str, asyncio.Task] = {}
         self.is_processing = False
         self._processing_task = None
-        
-    async def add_task(self, bucket: str, filename: str, file_path: str = None) -> Optional[str]:
-        """Add task and auto-start processing"""
-        
+
+        # Scheduling state: heaps of (-priority, seq, task_id), open bucket:filename -> task_id
+        self._ready: List[Tuple[int, int, str]] = []
+        self._deferred: List[Tuple[int, int, str]] = []
+        self._open_keys: Dict[str, str] = {}
+        self._priorities: Dict[str, Tuple[int, int]] = {}
+        self._backlog = 0
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+
+        self.journal = QueueJournal(journal_path) if journal_path else None
+        if self.journal:
+            self._recover()
+
+    def _recover(self):
+        """Reload journaled open tasks; tasks interrupted mid-processing are re-queued"""
+        recovered = 0
+        for task, priority, seq in self.journal.load():
+            self._seq = max(self._seq, seq)
+            self.tasks[task.task_id] = task
+            self._priorities[task.task_id] = (priority, seq)
+
+            self._open_keys[self._task_key(task.bucket, task.filename)] = task.task_id
+            if task.status == ProcessingStatus.DEFERRED:
+                heapq.heappush(self._deferred, (-priority, seq, task.task_id))
+            else:
+                task.status = ProcessingStatus.PENDING
+                task.started_at = None
+                self._backlog += 1
+                heapq.heappush(self._ready, (-priority, seq, task.task_id))
+                self._persist(task)
+                recovered += 1
+
+        if recovered or self._deferred:
+            logger.info(f"♻️ Recovered {recovered} queued and {len(self._deferred)} deferred tasks from journal")
+            try:
+                asyncio.get_running_loop().create_task(self.start_processing())
+            except RuntimeError:
+                # No running loop yet - the next add_task starts processing
+                pass
+
+    @staticmethod
+    def _task_key(bucket: str, filename: str) -> str:
+        return f"{bucket}:{filename}"
+
+    def _persist(self, task: ProcessingTask):
+        if not self.journal:
+            return
+        try:
+            if task.status not in OPEN_STATUSES:
+                # Finished tasks are not needed for recovery
+                self.journal.delete([task.task_id])
+                return
+            priority, seq = self._priorities.get(task.task_id, (0, 0))
+            self.journal.save(task, priority, seq)
+        except Exception as e:
+            logger.error(f"❌ Failed to journal task {task.task_id}: {e}")
+
+    def _backlog_full(self) -> bool:
+        return self.max_backlog > 0 and self._backlog >= self.max_backlog
+
+    async def add_task(self, bucket: str, filename: str, file_path: str = None,
+                       priority: int = 0, apply_backpressure: bool = False) -> Optional[str]:
+        """
+        Add task and auto-start processing.
+
+        Higher priority tasks are dequeued first. With apply_backpressure, a full
+        backlog either raises QueueFullError or stores the task as deferred,
+        depending on the configured backpressure mode.
+        """
+
         # Check if already exists
-        task_key = f"{bucket}:{filename}"
-        existing_task = self._find_existing_task(task_key)
+        existing_task = self._find_existing_task(self._task_key(bucket, filename))
         if existing_task:
-            return existing_task.task_id if existing_task.status == ProcessingStatus.PENDING else None
-        
+            return existing_task.task_id if existing_task.status in (ProcessingStatus.PENDING, ProcessingStatus.DEFERRED) else None
+
+        defer = False
+        if apply_backpressure and self._backlog_full():
+            if self.backpressure_mode != "defer":
+                raise QueueFullError(f"Processing backlog full ({self._backlog}/{self.max_backlog} tasks)")
+            defer = True
+
         # Create new task
         task_id = str(uuid.uuid4())
         task = ProcessingTask(
@@ -37,95 +253,152 @@ class ProcessingQueue:
             bucket=bucket,
             filename=filename,
             file_path=file_path or filename,
-            status=ProcessingStatus.PENDING,
+            status=ProcessingStatus.DEFERRED if defer else ProcessingStatus.PENDING,
             created_at=datetime.now()
         )
-        
+
+        self._seq += 1
         self.tasks[task_id] = task
+        self._priorities[task_id] = (priority, self._seq)
+        self._open_keys[self._task_key(bucket, filename)] = task_id
+        self._persist(task)
+
+        if defer:
+            heapq.heappush(self._deferred, (-priority, self._seq, task_id))
+            logger.info(f"⏸️ Deferred task {task_id} for {filename} (backlog full)")
+            return task_id
+
+        self._backlog += 1
+        heapq.heappush(self._ready, (-priority, self._seq, task_id))
         logger.info(f"Added task {task_id} for {filename} to queue")
-        
-        # Auto-start if not processing
+
+        # Auto-start if not processing, otherwise wake the dispatcher
         if not self.is_processing and self.batch_processor:
             asyncio.create_task(self.start_processing())
-        
+        self._wakeup.set()
+
         return task_id
-    
+
     def _find_existing_task(self, task_key: str) -> Optional[ProcessingTask]:
-        """Find existing task"""
-        for task in self.tasks.values():
-            if f"{task.bucket}:{task.filename}" == task_key:
-                if task.status in [ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]:
-                    return task
-        return None
-    
+        """Find existing open task"""
+        task_id = self._open_keys.get(task_key)
+        return self.tasks.get(task_id) if task_id else None
+
     async def start_processing(self):
         """Start processing queue"""
         if self.is_processing or not self.batch_processor:
             return
-        
-        pending_tasks = [task for task in self.tasks.values() if task.status == ProcessingStatus.PENDING]
-        if not pending_tasks:
+
+        self._promote_deferred()
+        if not self._ready:
             return
-        
+
         self.is_processing = True
         self._processing_task = asyncio.create_task(self._process_queue())
-        logger.info(f"Started processing queue with {len(pending_tasks)} tasks")
-    
+        logger.info(f"Started processing queue with {self._backlog} tasks")
+
     async def stop_processing(self):
         """Stop processing"""
         if not self.is_processing:
             return
-        
+
         self.is_processing = False
         if self._processing_task:
             self._processing_task.cancel()
-        
-        for active_task in self.active_tasks.values():
+
+        for task_id, active_task in self.active_tasks.items():
             active_task.cancel()
+            # Interrupted tasks go back to the queue instead of being lost
+            task = self.tasks.get(task_id)
+            if task and task.status == ProcessingStatus.PROCESSING:
+                task.status = ProcessingStatus.PENDING
+                task.started_at = None
+                self._persist(task)
+                priority, seq = self._priorities.get(task_id, (0, 0))
+                heapq.heappush(self._ready, (-priority, seq, task_id))
         self.active_tasks.clear()
         logger.info("Stopped processing queue")
-    
+
+    def _pop_ready(self) -> Optional[ProcessingTask]:
+        """Pop the highest priority runnable task, skipping stale heap entries"""
+        while self._ready:
+            _, _, task_id = heapq.heappop(self._ready)
+            task = self.tasks.get(task_id)
+            if task and task.status in (ProcessingStatus.PENDING, ProcessingStatus.RETRYING):
+                return task
+        return None
+
+    def _promote_deferred(self):
+        """Move deferred tasks into the ready queue while the backlog has room"""
+        promoted = 0
+        while self._deferred and not self._backlog_full():
+            entry = heapq.heappop(self._deferred)
+            task = self.tasks.get(entry[2])
+            if not task or task.status != ProcessingStatus.DEFERRED:
+                continue
+            task.status = ProcessingStatus.PENDING
+            self._backlog += 1
+            heapq.heappush(self._ready, entry)
+            self._persist(task)
+            promoted += 1
+        if promoted:
+            logger.info(f"▶️ Promoted {promoted} deferred tasks to the queue")
+
     async def _process_queue(self):
-        """Main processing loop - FIFO"""
+        """Main processing loop - priority order, woken by new tasks and completions"""
         try:
             while self.is_processing:
-                # Get pending tasks (FIFO order)
-                pending_tasks = [t for t in self.tasks.values() if t.status == ProcessingStatus.PENDING]
-                pending_tasks.sort(key=lambda t: t.created_at)
-                
-                # Start new tasks
-                available_slots = self.max_concurrent_tasks - len(self.active_tasks)
-                if available_slots > 0 and pending_tasks:
-                    for task in pending_tasks[:available_slots]:
-                        await self._start_task(task)
-                
+                self._wakeup.clear()
+
                 # Clean up completed tasks
                 await self._cleanup_completed_tasks()
-                
+                self._promote_deferred()
+
+                # Start new tasks
+                while len(self.active_tasks) < self.max_concurrent_tasks:
+                    task = self._pop_ready()
+                    if not task:
+                        break
+                    await self._start_task(task)
+
                 # Stop if no more work
-                remaining = [t for t in self.tasks.values() if t.status in [ProcessingStatus.PENDING, ProcessingStatus.PROCESSING]]
-                if not remaining:
+                if not self.active_tasks and not self._ready:
                     self.is_processing = False
                     break
-                
-                await asyncio.sleep(2)
-                
+
+                waiter = asyncio.ensure_future(self._wakeup.wait())
+                try:
+                    await asyncio.wait(
+                        [waiter, *self.active_tasks.values()],
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    waiter.cancel()
+
         except asyncio.CancelledError:
             pass
         except Exception as e:
             logger.error(f"Queue processing error: {e}")
         finally:
             self.is_processing = False
-    
+
     async def _start_task(self, task: ProcessingTask):
         """Start single task"""
         task.status = ProcessingStatus.PROCESSING
         task.started_at = datetime.now()
-        
+        self._persist(task)
+
         async_task = asyncio.create_task(self._process_single_task(task))
         self.active_tasks[task.task_id] = async_task
         logger.info(f"Started processing {task.filename}")
-    
+
+    def _close_task(self, task: ProcessingTask):
+        """Release the backlog slot and dedupe key of a finished task"""
+        self._backlog = max(0, self._backlog - 1)
+        key = self._task_key(task.bucket, task.filename)
+        if self._open_keys.get(key) == task.task_id:
+            del self._open_keys[key]
+
     async def _process_single_task(self, task: ProcessingTask):
         """Process single task"""
         try:
@@ -133,53 +406,65 @@ class ProcessingQueue:
                 "bucket": task.bucket,
                 "filename": task.filename
             }])
-            
+
             task.result = result
             task.status = ProcessingStatus.COMPLETED
             task.completed_at = datetime.now()
+            self._close_task(task)
             logger.info(f"Completed {task.filename}")
-            
+
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             task.error_message = str(e)
             task.attempts += 1
-            
+
             if task.attempts < task.max_attempts:
                 task.status = ProcessingStatus.RETRYING
+                # Re-queue behind tasks of the same priority
+                priority = self._priorities.get(task.task_id, (0, 0))[0]
+                self._seq += 1
+                self._priorities[task.task_id] = (priority, self._seq)
+                heapq.heappush(self._ready, (-priority, self._seq, task.task_id))
             else:
                 task.status = ProcessingStatus.FAILED
                 task.completed_at = datetime.now()
+                self._close_task(task)
             logger.error(f"Failed {task.filename}: {e}")
-    
+
+        self._persist(task)
+
     async def _cleanup_completed_tasks(self):
         """Clean up completed tasks"""
         completed_task_ids = [task_id for task_id, async_task in self.active_tasks.items() if async_task.done()]
         for task_id in completed_task_ids:
             del self.active_tasks[task_id]
-    
+
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get task status"""
         task = self.tasks.get(task_id)
         if not task:
             return None
-        
+
         return {
             "task_id": task.task_id,
             "bucket": task.bucket,
             "filename": task.filename,
             "status": task.status.value,
+            "priority": self._priorities.get(task_id, (0, 0))[0],
             "created_at": task.created_at.isoformat(),
             "started_at": task.started_at.isoformat() if task.started_at else None,
             "completed_at": task.completed_at.isoformat() if task.completed_at else None,
             "error_message": task.error_message
         }
-    
+
     def get_queue_status(self) -> Dict[str, Any]:
         """Get queue status"""
         status_counts = {}
         for task in self.tasks.values():
             status = task.status.value
             status_counts[status] = status_counts.get(status, 0) + 1
-        
+
         return {
             "is_processing": self.is_processing,
             "total_tasks": len(self.tasks),
@@ -187,22 +472,37 @@ class ProcessingQueue:
             "processing_tasks": status_counts.get("processing", 0),
             "completed_tasks": status_counts.get("completed", 0),
             "failed_tasks": status_counts.get("failed", 0),
+            "retrying_tasks": status_counts.get("retrying", 0),
+            "deferred_tasks": status_counts.get("deferred", 0),
+            "backlog": self._backlog,
+            "max_backlog": self.max_backlog,
+            "backpressure_mode": self.backpressure_mode,
+            "persistent": self.journal is not None,
             "batch_processor_available": self.batch_processor is not None
         }
-    
+
     async def clear_completed_tasks(self) -> Dict[str, Any]:
         """Clear completed tasks"""
-        initial_count = len(self.tasks)
-        active_statuses = {ProcessingStatus.PENDING, ProcessingStatus.PROCESSING, ProcessingStatus.RETRYING}
-        self.tasks = {task_id: task for task_id, task in self.tasks.items() if task.status in active_statuses}
-        cleared_count = initial_count - len(self.tasks)
-        return {"cleared_count": cleared_count, "remaining_count": len(self.tasks)}
+        cleared_ids = [task_id for task_id, task in self.tasks.items() if task.status not in OPEN_STATUSES]
+        for task_id in cleared_ids:
+            del self.tasks[task_id]
+            self._priorities.pop(task_id, None)
+        return {"cleared_count": len(cleared_ids), "remaining_count": len(self.tasks)}
+
+    async def close(self):
+        """Stop processing (re-queueing running tasks) and close the journal"""
+        await self.stop_processing()
+        if self.journal:
+            self.journal.close()
+            self.journal = None
 
 
 # Factory function
-def create_processing_queue(batch_processor=None, max_concurrent: int = 3) -> ProcessingQueue:
+def create_processing_queue(batch_processor=None, max_concurrent: int = 3,
+                            journal_path: Optional[str] = None, max_backlog: int = 0,
+                            backpressure_mode: str = "reject") -> ProcessingQueue:
     """Create processing queue"""
-    return ProcessingQueue(batch_processor, max_concurrent)
+    return ProcessingQueue(batch_processor, max_concurrent, journal_path, max_backlog, backpressure_mode)
 
 
 # Global instance
@@ -216,4 +516,4 @@ def initialize_queue(batch_processor=None, max_concurrent: int = 3) -> Processin
     if not processing_queue:
         processing_queue = create_processing_queue(batch_processor, max_concurrent)
         logger.info("Processing queue initialized with auto-start")
-    return processing_queue
\ No newline at end of file
+    return processing_queue
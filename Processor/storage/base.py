@@ -16,7 +16,7 @@ consistent interfaces and enable dependency injection throughout the application
 
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -187,6 +187,10 @@ class DocumentTrackerBackend(BaseStorage):
         """Get processing status for a document"""
         pass
 
+    def get_statuses(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Get processing status for many (doc_name, bucket) keys; backends should override with a bulk query"""
+        return {(doc_name, bucket): self.get_status(doc_name, bucket) for doc_name, bucket in keys}
+
     @abstractmethod
     def get_all_documents(self, bucket_filter: str = None) -> List[Dict[str, Any]]:
         """Get all tracked documents"""
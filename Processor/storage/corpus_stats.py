@@ -0,0 +1,130 @@
+"""
+BM25 Corpus Statistics
+Per-collection document frequencies maintained at ingest time, read by the
+Server's reranker to weight query terms by IDF
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Words of two or more characters; must stay in sync with Server/app/services/rag/bm25.py
+_TOKEN_RE = re.compile(r'\w\w+', re.UNICODE)
+
+# Upserts per bulk_write call
+_BULK_SIZE = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens used for BM25 statistics"""
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def stats_scope(data_type: str, collection_name: str) -> str:
+    """Scope key for a Milvus collection, e.g. 'chunk:News' or 'summary:Policy'"""
+    source = 'chunk' if data_type == 'chunks' else 'summary'
+    return f"{source}:{collection_name}"
+
+
+class CorpusStatistics:
+    """
+    Incremental BM25 statistics stored in MongoDB.
+
+    bm25_corpus_stats holds one document per scope (doc_count, total_tokens);
+    bm25_term_stats holds one document per (scope, term) with its document
+    frequency. Both are updated with $inc so concurrent replicas can write
+    without coordination. Deleted documents are not subtracted, so counts
+    drift upward slightly until a collection is rebuilt.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._corpus = None
+        self._terms = None
+        self._lock = threading.Lock()
+
+    def _get_collections(self):
+        """Get or create the MongoDB client and statistics collections"""
+        with self._lock:
+            if self._client is None:
+                from pymongo import ASCENDING, MongoClient
+
+                mongodb_config = config.get_mongodb_config()
+                self._client = MongoClient(
+                    mongodb_config['connection_uri'],
+                    maxPoolSize=mongodb_config.get('max_pool_size', 100),
+                    serverSelectionTimeoutMS=mongodb_config.get('server_selection_timeout_ms', 5000),
+                    connectTimeoutMS=mongodb_config.get('connect_timeout_ms', 10000),
+                )
+                db = self._client[mongodb_config['database']]
+                self._corpus = db[mongodb_config['collections']['bm25_corpus_stats']]
+                self._terms = db[mongodb_config['collections']['bm25_term_stats']]
+                self._terms.create_index([('scope', ASCENDING), ('term', ASCENDING)], unique=True)
+        return self._corpus, self._terms
+
+    def add_documents(self, scope: str, texts: Iterable[str]) -> int:
+        """Count newly inserted documents into the scope's statistics"""
+        from pymongo import UpdateOne
+
+        doc_count = 0
+        total_tokens = 0
+        document_frequency: Counter = Counter()
+
+        for text in texts:
+            tokens = tokenize(text)
+            doc_count += 1
+            total_tokens += len(tokens)
+            document_frequency.update(set(tokens))
+
+        if not doc_count:
+            return 0
+
+        corpus, terms = self._get_collections()
+
+        operations = [
+            UpdateOne({'scope': scope, 'term': term}, {'$inc': {'df': df}}, upsert=True)
+            for term, df in document_frequency.items()
+        ]
+        for start in range(0, len(operations), _BULK_SIZE):
+            terms.bulk_write(operations[start:start + _BULK_SIZE], ordered=False)
+
+        # Corpus totals last: readers never see a doc_count that includes unwritten terms
+        corpus.update_one(
+            {'_id': scope},
+            {'$inc': {'doc_count': doc_count, 'total_tokens': total_tokens}},
+            upsert=True
+        )
+
+        logger.debug(f"📚 BM25 stats {scope}: +{doc_count} docs, {len(document_frequency)} terms")
+        return doc_count
+
+    def get_scope_stats(self, scope: str) -> Optional[Dict[str, Any]]:
+        """Get document count and total tokens for a scope"""
+        corpus, _ = self._get_collections()
+        return corpus.find_one({'_id': scope})
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+# Global corpus statistics instance
+_corpus_statistics: Optional[CorpusStatistics] = None
+
+
+def get_corpus_statistics() -> Optional[CorpusStatistics]:
+    """Get or create the global corpus statistics store (None when disabled)"""
+    global _corpus_statistics
+    if not config.get('milvus.corpus_stats_enabled', True):
+        return None
+
+    if _corpus_statistics is None:
+        _corpus_statistics = CorpusStatistics()
+    return _corpus_statistics
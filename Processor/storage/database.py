@@ -5,8 +5,9 @@ Supports multi-replica deployments in Kubernetes environments
 """
 
 import logging
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
 from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
@@ -30,6 +31,10 @@ class DocumentTracker(DocumentTrackerBackend):
         self._db = None
         self._document_status = None
         self._news_articles_status = None
+        self._bucket_watermarks = None
+        self._stats_cache = None
+        self._stats_cache_time = 0.0
+        self._stats_cache_ttl = config.get('mongodb.stats_cache_ttl_seconds', 10)
         self.connect()
 
     def _get_client(self) -> MongoClient:
@@ -51,6 +56,7 @@ class DocumentTracker(DocumentTrackerBackend):
             # Get collections
             self._document_status = self._db[mongodb_config['collections']['document_status']]
             self._news_articles_status = self._db[mongodb_config['collections']['news_articles_status']]
+            self._bucket_watermarks = self._db[mongodb_config['collections']['bucket_watermarks']]
 
         return self._client
 
@@ -83,6 +89,13 @@ class DocumentTracker(DocumentTrackerBackend):
                 [("updated_at", DESCENDING)],
                 name="idx_updated_at"
             )
+            # Covers every field get_stats reads, so the stats scan is index-only
+            self._document_status.create_index(
+                [("bucket_source", ASCENDING), ("chunks_done", ASCENDING), ("summary_done", ASCENDING),
+                 ("graphrag_done", ASCENDING), ("stp_done", ASCENDING),
+                 ("stp_stp_count", ASCENDING), ("stp_non_stp_count", ASCENDING)],
+                name="idx_stats"
+            )
 
             # Create indexes for news_articles_status collection
             self._news_articles_status.create_index(
@@ -94,6 +107,10 @@ class DocumentTracker(DocumentTrackerBackend):
                 [("original_file", ASCENDING), ("bucket_source", ASCENDING)],
                 name="idx_original_file"
             )
+            self._news_articles_status.create_index(
+                [("chunks_done", ASCENDING), ("summary_done", ASCENDING), ("stp_done", ASCENDING)],
+                name="idx_news_stats"
+            )
 
             self.connected = True
             logger.info(f"MongoDB tracker initialized: {mongodb_config['host']}:{mongodb_config['port']}/{mongodb_config['database']}")
@@ -114,6 +131,7 @@ class DocumentTracker(DocumentTrackerBackend):
                 self._db = None
                 self._document_status = None
                 self._news_articles_status = None
+                self._bucket_watermarks = None
             self.connected = False
             logger.info("MongoDB tracker disconnected")
         except Exception as e:
@@ -200,6 +218,7 @@ class DocumentTracker(DocumentTrackerBackend):
                 upsert=True
             )
 
+            self._stats_cache = None
             logger.info(f"Marked {process_type} done for {doc_name}")
 
         except Exception as e:
@@ -267,6 +286,36 @@ class DocumentTracker(DocumentTrackerBackend):
             logger.error(f"Failed to mark news article {process_type} done: {e}")
             raise
 
+    @staticmethod
+    def _build_status(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Build status response from a document_status record"""
+        status = {
+            "id": str(doc.get("_id", "")),
+            "doc_name": doc.get("doc_name"),
+            "bucket_source": doc.get("bucket_source"),
+            "chunks_done": doc.get("chunks_done", False),
+            "chunks_count": doc.get("chunks_count", 0),
+            "summary_done": doc.get("summary_done", False),
+            "graphrag_done": doc.get("graphrag_done", False),
+            "graphrag_entities_count": doc.get("graphrag_entities_count", 0),
+            "graphrag_relationships_count": doc.get("graphrag_relationships_count", 0),
+            "graphrag_communities_count": doc.get("graphrag_communities_count", 0),
+            "stp_done": doc.get("stp_done", False),
+            "stp_chunks_count": doc.get("stp_chunks_count", 0),
+            "stp_stp_count": doc.get("stp_stp_count", 0),
+            "stp_non_stp_count": doc.get("stp_non_stp_count", 0),
+            "created_at": doc.get("created_at", "").isoformat() if doc.get("created_at") else None,
+            "updated_at": doc.get("updated_at", "").isoformat() if doc.get("updated_at") else None,
+        }
+
+        status['is_complete'] = (
+            status['chunks_done'] and
+            status['summary_done'] and
+            status['graphrag_done'] and
+            status['stp_done']
+        )
+        return status
+
     def get_status(self, doc_name: str, bucket: str) -> Dict[str, Any]:
         """Get processing status for a document"""
         try:
@@ -282,32 +331,7 @@ class DocumentTracker(DocumentTrackerBackend):
                     "status": "not_found"
                 }
 
-            # Build status response
-            status = {
-                "id": str(doc.get("_id", "")),
-                "doc_name": doc.get("doc_name"),
-                "bucket_source": doc.get("bucket_source"),
-                "chunks_done": doc.get("chunks_done", False),
-                "chunks_count": doc.get("chunks_count", 0),
-                "summary_done": doc.get("summary_done", False),
-                "graphrag_done": doc.get("graphrag_done", False),
-                "graphrag_entities_count": doc.get("graphrag_entities_count", 0),
-                "graphrag_relationships_count": doc.get("graphrag_relationships_count", 0),
-                "graphrag_communities_count": doc.get("graphrag_communities_count", 0),
-                "stp_done": doc.get("stp_done", False),
-                "stp_chunks_count": doc.get("stp_chunks_count", 0),
-                "stp_stp_count": doc.get("stp_stp_count", 0),
-                "stp_non_stp_count": doc.get("stp_non_stp_count", 0),
-                "created_at": doc.get("created_at", "").isoformat() if doc.get("created_at") else None,
-                "updated_at": doc.get("updated_at", "").isoformat() if doc.get("updated_at") else None,
-            }
-
-            status['is_complete'] = (
-                status['chunks_done'] and
-                status['summary_done'] and
-                status['graphrag_done'] and
-                status['stp_done']
-            )
+            status = self._build_status(doc)
 
             # For news bucket, include article-level status
             if bucket == "news":
@@ -335,6 +359,44 @@ class DocumentTracker(DocumentTrackerBackend):
             logger.error(f"Failed to get status for {doc_name}: {e}")
             return {"doc_name": doc_name, "bucket_source": bucket, "is_complete": False, "status": "error"}
 
+    def get_statuses(self, keys: List[Tuple[str, str]],
+                     page_size: int = 1000) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Get processing status for many (doc_name, bucket) keys
+
+        Answers each page of keys with one $in query on the (doc_name, bucket_source)
+        index. Keys without a record get a "not_found" status. Article-level news
+        details are not included; use get_status for those.
+        """
+        statuses = {
+            (doc_name, bucket): {
+                "doc_name": doc_name,
+                "bucket_source": bucket,
+                "is_complete": False,
+                "status": "not_found"
+            }
+            for doc_name, bucket in keys
+        }
+
+        names_by_bucket: Dict[str, List[str]] = {}
+        for doc_name, bucket in statuses:
+            names_by_bucket.setdefault(bucket, []).append(doc_name)
+
+        for bucket, names in names_by_bucket.items():
+            for start in range(0, len(names), page_size):
+                page = names[start:start + page_size]
+                try:
+                    for doc in self._document_status.find(
+                        {"doc_name": {"$in": page}, "bucket_source": bucket}
+                    ):
+                        statuses[(doc["doc_name"], bucket)] = self._build_status(doc)
+                except Exception as e:
+                    logger.error(f"Failed to get bulk status for {len(page)} documents in {bucket}: {e}")
+                    for doc_name in page:
+                        statuses[(doc_name, bucket)]["status"] = "error"
+
+        return statuses
+
     def get_all_documents(self, bucket_filter: str = None) -> List[Dict[str, Any]]:
         """Get all tracked documents"""
         try:
@@ -411,60 +473,115 @@ class DocumentTracker(DocumentTrackerBackend):
 
         return bool(status.get(field, False))
 
-    def get_stats(self) -> Dict[str, Any]:
-        """Get comprehensive processing statistics"""
+    def get_bucket_watermark(self, watermark_key: str) -> Optional[datetime]:
+        """Get the last-modified watermark of the last incremental bucket run"""
         try:
-            # Document-level stats using aggregation
-            total = self._document_status.count_documents({})
-
-            completed = self._document_status.count_documents({
-                "chunks_done": True,
-                "summary_done": True,
-                "graphrag_done": True,
-                "stp_done": True
-            })
+            doc = self._bucket_watermarks.find_one({"_id": watermark_key})
+            if not doc or not doc.get("last_modified"):
+                return None
+            # MongoDB returns naive UTC datetimes
+            return doc["last_modified"].replace(tzinfo=timezone.utc)
+        except Exception as e:
+            logger.error(f"Failed to get bucket watermark for {watermark_key}: {e}")
+            return None
 
-            chunks_done = self._document_status.count_documents({"chunks_done": True})
-            summary_done = self._document_status.count_documents({"summary_done": True})
-            graphrag_done = self._document_status.count_documents({"graphrag_done": True})
-            stp_done = self._document_status.count_documents({"stp_done": True})
-
-            # STP-specific stats using aggregation
-            stp_pipeline = [
-                {"$group": {
-                    "_id": None,
-                    "total_stp_chunks": {"$sum": "$stp_stp_count"},
-                    "total_non_stp_chunks": {"$sum": "$stp_non_stp_count"}
-                }}
-            ]
-            stp_result = list(self._document_status.aggregate(stp_pipeline))
-            total_stp_chunks = stp_result[0].get("total_stp_chunks", 0) if stp_result else 0
-            total_non_stp_chunks = stp_result[0].get("total_non_stp_chunks", 0) if stp_result else 0
-
-            # News-specific stats
-            news_articles_total = self._news_articles_status.count_documents({})
-            news_articles_completed = self._news_articles_status.count_documents({
-                "chunks_done": True,
-                "summary_done": True,
-                "stp_done": True
-            })
+    def set_bucket_watermark(self, watermark_key: str, last_modified: datetime) -> None:
+        """Store the watermark for the next incremental bucket run"""
+        try:
+            self._bucket_watermarks.update_one(
+                {"_id": watermark_key},
+                {"$set": {"last_modified": last_modified, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to set bucket watermark for {watermark_key}: {e}")
 
-            # Bucket distribution using aggregation
-            bucket_pipeline = [
-                {"$group": {"_id": "$bucket_source", "count": {"$sum": 1}}}
-            ]
-            bucket_result = list(self._document_status.aggregate(bucket_pipeline))
-            bucket_stats = {item["_id"]: item["count"] for item in bucket_result}
+    def _stats_pipeline(self) -> List[Dict[str, Any]]:
+        """Aggregation computing all tracker counters over both collections in one pass"""
+        def done(field):
+            return {"$cond": [{"$eq": [f"${field}", True]}, 1, 0]}
 
-            return {
+        doc_fields = {
+            "_id": 0, "bucket_source": 1, "chunks_done": 1, "summary_done": 1,
+            "graphrag_done": 1, "stp_done": 1, "stp_stp_count": 1, "stp_non_stp_count": 1
+        }
+
+        return [
+            {"$project": {**doc_fields, "kind": "document"}},
+            {"$unionWith": {
+                "coll": self._news_articles_status.name,
+                "pipeline": [{"$project": {
+                    "_id": 0, "chunks_done": 1, "summary_done": 1, "stp_done": 1, "kind": "news"
+                }}]
+            }},
+            {"$facet": {
+                "documents": [
+                    {"$match": {"kind": "document"}},
+                    {"$group": {
+                        "_id": None,
+                        "total": {"$sum": 1},
+                        "completed": {"$sum": {"$cond": [{"$and": [
+                            {"$eq": ["$chunks_done", True]}, {"$eq": ["$summary_done", True]},
+                            {"$eq": ["$graphrag_done", True]}, {"$eq": ["$stp_done", True]}
+                        ]}, 1, 0]}},
+                        "chunks_done": {"$sum": done("chunks_done")},
+                        "summary_done": {"$sum": done("summary_done")},
+                        "graphrag_done": {"$sum": done("graphrag_done")},
+                        "stp_done": {"$sum": done("stp_done")},
+                        "total_stp_chunks": {"$sum": "$stp_stp_count"},
+                        "total_non_stp_chunks": {"$sum": "$stp_non_stp_count"}
+                    }}
+                ],
+                "buckets": [
+                    {"$match": {"kind": "document"}},
+                    {"$group": {"_id": "$bucket_source", "count": {"$sum": 1}}}
+                ],
+                "news": [
+                    {"$match": {"kind": "news"}},
+                    {"$group": {
+                        "_id": None,
+                        "total": {"$sum": 1},
+                        "completed": {"$sum": {"$cond": [{"$and": [
+                            {"$eq": ["$chunks_done", True]}, {"$eq": ["$summary_done", True]},
+                            {"$eq": ["$stp_done", True]}
+                        ]}, 1, 0]}}
+                    }}
+                ]
+            }}
+        ]
+
+    def get_stats(self, use_cache: bool = True) -> Dict[str, Any]:
+        """Get comprehensive processing statistics (single aggregation, memoized for a short TTL)"""
+        if (use_cache and self._stats_cache is not None and self._stats_cache_ttl > 0
+                and time.monotonic() - self._stats_cache_time < self._stats_cache_ttl):
+            return self._stats_cache
+
+        try:
+            result = list(self._document_status.aggregate(self._stats_pipeline(), hint="idx_stats"))
+            facets = result[0] if result else {}
+
+            docs = facets.get("documents") or [{}]
+            docs = docs[0]
+            news = facets.get("news") or [{}]
+            news = news[0]
+
+            total = docs.get("total", 0)
+            completed = docs.get("completed", 0)
+            total_stp_chunks = docs.get("total_stp_chunks", 0)
+            total_non_stp_chunks = docs.get("total_non_stp_chunks", 0)
+            news_articles_total = news.get("total", 0)
+            news_articles_completed = news.get("completed", 0)
+            bucket_stats = {item["_id"]: item["count"] for item in facets.get("buckets", [])}
+
+            stats = {
                 "total_documents": total,
                 "completed_documents": completed,
                 "completion_rate": f"{(completed/total)*100:.1f}%" if total > 0 else "0%",
                 "process_counts": {
-                    "chunks_processed": chunks_done,
-                    "summaries_processed": summary_done,
-                    "graphrag_processed": graphrag_done,
-                    "stp_processed": stp_done
+                    "chunks_processed": docs.get("chunks_done", 0),
+                    "summaries_processed": docs.get("summary_done", 0),
+                    "graphrag_processed": docs.get("graphrag_done", 0),
+                    "stp_processed": docs.get("stp_done", 0)
                 },
                 "stp_statistics": {
                     "total_stp_chunks": total_stp_chunks,
@@ -480,6 +597,10 @@ class DocumentTracker(DocumentTrackerBackend):
                 "storage_backend": "mongodb"
             }
 
+            self._stats_cache = stats
+            self._stats_cache_time = time.monotonic()
+            return stats
+
         except Exception as e:
             logger.error(f"Failed to get stats: {e}")
             return {
@@ -506,6 +627,7 @@ class DocumentTracker(DocumentTrackerBackend):
             })
 
             total_deleted = doc_result.deleted_count + news_result.deleted_count
+            self._stats_cache = None
             logger.info(f"Cleaned up {total_deleted} old tracking records (docs: {doc_result.deleted_count}, news: {news_result.deleted_count})")
             return total_deleted
 
@@ -15,12 +15,48 @@ logger = logging.getLogger(__name__)
 
 class LanceDBStorage:
     """Enhanced LanceDB storage for GraphRAG data with direct parquet support"""
+
+    # Columns returned by queries (embedding vectors are never projected)
+    DOCUMENT_COLUMNS = ["document_id", "filename", "bucket", "source_url", "processing_timestamp",
+                        "entities_count", "relationships_count", "communities_count"]
+    ENTITY_COLUMNS = ["entity_id", "name", "type", "description", "document_id", "bucket", "degree", "rank"]
+    RELATIONSHIP_COLUMNS = ["relationship_id", "source_entity", "target_entity", "description",
+                            "strength", "document_id", "bucket", "rank"]
+    # Upper bound on rows returned by a single filtered scan
+    MAX_QUERY_ROWS = 100000
+    COMMUNITY_COLUMNS = ["community_id", "title", "summary", "member_entities", "member_count",
+                         "rating", "level"]
+
+    # Indexes maintained at ingest time
+    SCALAR_INDEX_COLUMNS = {
+        "documents": ["document_id", "filename", "source_url", "bucket"],
+        "entities": ["document_id", "bucket"],
+        "relationships": ["document_id", "bucket"],
+        "communities": ["document_id"],
+        "claims": ["document_id"],
+        "covariates": ["document_id"],
+        "text_units": ["document_id"]
+    }
+    FTS_INDEX_COLUMNS = {
+        "entities": ["name", "description"],
+        "relationships": ["source_entity", "target_entity", "description"]
+    }
+    VECTOR_INDEX_COLUMNS = {
+        "entities": "description_embedding",
+        "text_units": "text_embedding"
+    }
+    # IVF-PQ training needs a reasonable number of rows; smaller tables use flat search
+    MIN_ROWS_FOR_VECTOR_INDEX = 5000
+    # Fold newly added rows into existing indexes every N ingests
+    INDEX_OPTIMIZE_INTERVAL = 10
     
     def __init__(self, db_path: str = "./lancedb_graphrag"):
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
         self.db = None
         self.tables = {}
+        self._fts_tables: Set[str] = set()
+        self._ingests_since_optimize = 0
         self._init_db()
     
     def _init_db(self):
@@ -81,6 +117,7 @@ class LanceDBStorage:
             # Initialize all tables including new ones
             self._init_entities_table()
             self._init_relationships_table()
+            self._migrate_bucket_columns()
             self._init_communities_table()
             self._init_claims_table()
             self._init_covariates_table()
@@ -88,6 +125,9 @@ class LanceDBStorage:
 
             logger.info("✅ LanceDB tables initialized successfully")
 
+            # Build any indexes missing for data that is already stored
+            self._ensure_indexes()
+
         except Exception as e:
             logger.error(f"❌ Table initialization failed: {e}")
             raise
@@ -101,6 +141,7 @@ class LanceDBStorage:
                 self.pa.field("type", self.pa.string()),
                 self.pa.field("description", self.pa.string()),
                 self.pa.field("document_id", self.pa.string()),
+                self.pa.field("bucket", self.pa.string()),
                 self.pa.field("degree", self.pa.int32()),
                 self.pa.field("rank", self.pa.float32()),
                 # Vector embedding for semantic search (768D for nomic-embed-text)
@@ -113,6 +154,7 @@ class LanceDBStorage:
                 "type": [],
                 "description": [],
                 "document_id": [],
+                "bucket": [],
                 "degree": [],
                 "rank": [],
                 "description_embedding": []
@@ -141,6 +183,7 @@ class LanceDBStorage:
                 self.pa.field("description", self.pa.string()),
                 self.pa.field("strength", self.pa.float32()),
                 self.pa.field("document_id", self.pa.string()),
+                self.pa.field("bucket", self.pa.string()),
                 self.pa.field("rank", self.pa.float32())
             ])
             
@@ -151,6 +194,7 @@ class LanceDBStorage:
                 "description": [],
                 "strength": [],
                 "document_id": [],
+                "bucket": [],
                 "rank": []
             }, schema=relationships_schema)
             
@@ -158,6 +202,21 @@ class LanceDBStorage:
         else:
             self.tables["relationships"] = self.db.open_table("relationships")
     
+    def _migrate_bucket_columns(self):
+        """Add and backfill the bucket column on entity/relationship tables created before it existed"""
+        for table_name in ("entities", "relationships"):
+            table = self.tables[table_name]
+            if "bucket" in table.schema.names:
+                continue
+            
+            table.add_columns({"bucket": "CAST(NULL AS STRING)"})
+            document_ids_by_bucket: Dict[str, List[str]] = {}
+            for doc in self._query("documents", columns=["document_id", "bucket"]):
+                document_ids_by_bucket.setdefault(doc["bucket"], []).append(doc["document_id"])
+            for bucket, document_ids in document_ids_by_bucket.items():
+                table.update(where=self._sql_in("document_id", document_ids), values={"bucket": bucket})
+            logger.info(f"✅ Added bucket column to {table_name} for {len(document_ids_by_bucket)} buckets")
+    
     def _init_communities_table(self):
         """Initialize communities table"""
         if "communities" not in self.db.table_names():
@@ -401,7 +460,7 @@ class LanceDBStorage:
             
             # Store entities
             if entities_df is not None and not entities_df.empty:
-                entities_processed = self._process_entities_dataframe(entities_df, document_id)
+                entities_processed = self._process_entities_dataframe(entities_df, document_id, bucket)
                 if entities_processed is not None and len(entities_processed) > 0:
                     self.tables["entities"].add(entities_processed)
                     logger.info(f"✅ Stored {len(entities_processed)} entities")
@@ -412,7 +471,7 @@ class LanceDBStorage:
             
             # Store relationships
             if relationships_df is not None and not relationships_df.empty:
-                relationships_processed = self._process_relationships_dataframe(relationships_df, document_id)
+                relationships_processed = self._process_relationships_dataframe(relationships_df, document_id, bucket)
                 if relationships_processed is not None and len(relationships_processed) > 0:
                     self.tables["relationships"].add(relationships_processed)
                     logger.info(f"✅ Stored {len(relationships_processed)} relationships")
@@ -470,6 +529,9 @@ class LanceDBStorage:
             logger.info(f"✅ Complete GraphRAG data transfer completed for {filename}")
             logger.info(f"📊 Summary: {entities_count}E, {relationships_count}R, {communities_count}C, {claims_count}Claims, {covariates_count}Cov, {text_units_count}TU")
 
+            self._ingests_since_optimize += 1
+            self._ensure_indexes(optimize=self._ingests_since_optimize >= self.INDEX_OPTIMIZE_INTERVAL)
+
             return document_id
             
         except Exception as e:
@@ -490,7 +552,7 @@ class LanceDBStorage:
             logger.error(f"❌ Failed to load {file_path.name}: {e}")
             return None
     
-    def _process_entities_dataframe(self, df: Any, document_id: str) -> Any:
+    def _process_entities_dataframe(self, df: Any, document_id: str, bucket: str) -> Any:
         """Process entities dataframe for LanceDB storage"""
         try:
             logger.info(f"🔄 Processing {len(df)} entities")
@@ -536,6 +598,7 @@ class LanceDBStorage:
             processed_df['description'] = desc_series.fillna('').astype(str).str.strip()
 
             processed_df['document_id'] = document_id
+            processed_df['bucket'] = bucket
 
             # Handle community assignment from GraphRAG (entities have community_ids field)
             if 'community_ids' in df.columns:
@@ -617,7 +680,7 @@ class LanceDBStorage:
             logger.error(f"📋 Entity DataFrame shape: {df.shape if hasattr(df, 'shape') else 'N/A'}")
             return None
     
-    def _process_relationships_dataframe(self, df: Any, document_id: str) -> Any:
+    def _process_relationships_dataframe(self, df: Any, document_id: str, bucket: str) -> Any:
         """Process relationships dataframe for LanceDB storage"""
         try:
             logger.info(f"🔄 Processing {len(df)} relationships")
@@ -675,6 +738,7 @@ class LanceDBStorage:
             processed_df['strength'] = strength_series.astype(float)
             
             processed_df['document_id'] = document_id
+            processed_df['bucket'] = bucket
             
             # Handle rank - be more careful with data types
             if 'rank' in df.columns:
@@ -1186,46 +1250,178 @@ class LanceDBStorage:
             logger.error(f"❌ Failed to process text units dataframe: {e}")
             return None
     
+    # INDEX MAINTENANCE
+    def _indexed_columns(self, table) -> Dict[str, str]:
+        """Map indexed column name -> index type for a table"""
+        indexed = {}
+        try:
+            if hasattr(table, "list_indices"):
+                indices = [(index.index_type, index.columns) for index in table.list_indices()]
+            else:
+                # Older sync tables only expose indexes through the underlying Lance dataset
+                indices = [(index.get("type", ""), index.get("fields", [])) for index in table.to_lance().list_indices()]
+
+            for index_type, columns in indices:
+                for column in columns or []:
+                    indexed[column] = str(index_type).upper()
+        except Exception as e:
+            logger.debug(f"Could not list indexes: {e}")
+        return indexed
+
+    def _ensure_indexes(self, optimize: bool = False):
+        """Create missing scalar, FTS and ANN indexes; optionally fold new rows into existing ones"""
+        for table_name, table in self.tables.items():
+            try:
+                row_count = table.count_rows()
+            except Exception as e:
+                logger.debug(f"Could not count rows for {table_name}: {e}")
+                continue
+
+            if row_count == 0:
+                continue
+
+            indexed = self._indexed_columns(table)
+
+            for column in self.SCALAR_INDEX_COLUMNS.get(table_name, []):
+                if column not in indexed:
+                    try:
+                        table.create_scalar_index(column)
+                        logger.info(f"✅ Created scalar index on {table_name}.{column}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not create scalar index on {table_name}.{column}: {e}")
+
+            for column in self.FTS_INDEX_COLUMNS.get(table_name, []):
+                if column not in indexed:
+                    try:
+                        table.create_fts_index(column, use_tantivy=False)
+                        logger.info(f"✅ Created FTS index on {table_name}.{column}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not create FTS index on {table_name}.{column}: {e}")
+
+            vector_column = self.VECTOR_INDEX_COLUMNS.get(table_name)
+            if vector_column and vector_column not in indexed and row_count >= self.MIN_ROWS_FOR_VECTOR_INDEX:
+                try:
+                    table.create_index(metric="cosine", vector_column_name=vector_column)
+                    logger.info(f"✅ Created vector index on {table_name}.{vector_column}")
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not create vector index on {table_name}.{vector_column}: {e}")
+
+            if optimize:
+                try:
+                    table.optimize()
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not optimize {table_name}: {e}")
+
+        if optimize:
+            self._ingests_since_optimize = 0
+
+        # Remember which tables can serve full-text queries
+        self._fts_tables = set()
+        for table_name, columns in self.FTS_INDEX_COLUMNS.items():
+            table = self.tables.get(table_name)
+            if table is None:
+                continue
+            indexed = self._indexed_columns(table)
+            if any(column in indexed for column in columns):
+                self._fts_tables.add(table_name)
+
+    # QUERY HELPERS
+    @staticmethod
+    def _sql_literal(value: Any) -> str:
+        """Quote a value as a SQL string literal"""
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def _sql_in(self, column: str, values: List[Any]) -> str:
+        return f"{column} IN ({', '.join(self._sql_literal(value) for value in values)})"
+
+    def _query_table(self, table_name: str, where: str = None, columns: List[str] = None,
+                     limit: int = None):
+        """Run a filtered, projected scan pushed down to LanceDB; returns an Arrow table or None"""
+        table = self.tables[table_name]
+        if limit is None:
+            # Plain queries default to a small limit, so always pass an explicit bound;
+            # unfiltered scans are capped at the row count, which comes from metadata
+            limit = self.MAX_QUERY_ROWS if where else min(self.MAX_QUERY_ROWS, table.count_rows())
+        if limit <= 0:
+            return None
+
+        query = table.search()
+        if where:
+            query = query.where(where)
+        if columns:
+            query = query.select(columns)
+        return query.limit(limit).to_arrow()
+
+    def _query(self, table_name: str, where: str = None, columns: List[str] = None,
+               limit: int = None) -> List[Dict[str, Any]]:
+        """Like _query_table but returns a list of row dicts"""
+        result = self._query_table(table_name, where, columns, limit)
+        return result.to_pylist() if result is not None else []
+
+    def _text_search(self, table_name: str, query: str, text_columns: List[str],
+                     where: str = None, columns: List[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Full-text search when an FTS index exists, otherwise a pushed-down substring filter"""
+        table = self.tables[table_name]
+
+        if table_name in self._fts_tables:
+            try:
+                builder = table.search(query, query_type="fts")
+                if where:
+                    builder = builder.where(where, prefilter=True)
+                if columns:
+                    builder = builder.select(columns)
+                # An indexed miss is a real miss; don't turn it into a table scan
+                return builder.limit(limit).to_list()
+            except Exception as e:
+                logger.warning(f"⚠️ FTS search on {table_name} failed, using filter scan: {e}")
+
+        # No FTS index: substring match (case-insensitive), evaluated inside LanceDB
+        escaped = query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = self._sql_literal(f"%{escaped}%")
+        clause = "(" + " OR ".join(f"lower({column}) LIKE {pattern}" for column in text_columns) + ")"
+        if where:
+            clause = f"{clause} AND ({where})"
+        return self._query(table_name, clause, columns, limit)
+
+    def _documents_by_id(self, document_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch document records for a set of document IDs"""
+        if not document_ids:
+            return {}
+        unique_ids = sorted(set(document_ids))
+        docs = self._query("documents", self._sql_in("document_id", unique_ids),
+                           ["document_id", "filename", "bucket", "source_url"], limit=len(unique_ids))
+        return {doc["document_id"]: doc for doc in docs}
+
+    @staticmethod
+    def _document_source(doc: Dict[str, Any]) -> str:
+        return doc["source_url"] if doc["bucket"] == "news" else doc["filename"]
+
     # SEARCH AND QUERY METHODS
     def search_entities(self, query: str, bucket: str = None, limit: int = 50) -> List[Dict]:
-        """Search entities by query with JOIN to documents"""
+        """Search entities by query, joined to their documents"""
         try:
-            entities_df = self.tables["entities"].to_pandas()
-            docs_df = self.tables["documents"].to_pandas()
-            
-            if entities_df.empty or docs_df.empty:
-                return []
-            
-            # JOIN entities with documents
-            joined_df = entities_df.merge(docs_df, on='document_id', how='inner')
-            
-            # Filter by query terms
-            query_lower = query.lower()
-            mask = (
-                joined_df['name'].str.lower().str.contains(query_lower, na=False) |
-                joined_df['description'].str.lower().str.contains(query_lower, na=False)
-            )
-            
-            # Filter by bucket if specified
-            if bucket:
-                mask = mask & (joined_df['bucket'] == bucket)
-            
-            filtered_df = joined_df[mask].head(limit)
+            bucket_filter = f"bucket = {self._sql_literal(bucket)}" if bucket else None
+
+            rows = self._text_search("entities", query, ["name", "description"],
+                                     where=bucket_filter, columns=self.ENTITY_COLUMNS, limit=limit)
+            docs = self._documents_by_id([row["document_id"] for row in rows])
             
             results = []
-            for _, row in filtered_df.iterrows():
-                entity_data = {
+            for row in rows:
+                doc = docs.get(row["document_id"])
+                if doc is None:
+                    continue
+                results.append({
                     "entity_id": row['entity_id'],
                     "name": row['name'],
                     "entity_type": row['type'],
                     "description": row['description'],
                     "document_id": row['document_id'],
-                    "bucket": row['bucket'],
+                    "bucket": doc['bucket'],
                     "degree": row['degree'],
                     "rank": row['rank'],
-                    "document_source": row['source_url'] if row['bucket'] == 'news' else row['filename']
-                }
-                results.append(entity_data)
+                    "document_source": self._document_source(doc)
+                })
             
             return results
             
@@ -1234,34 +1430,20 @@ class LanceDBStorage:
             return []
     
     def search_relationships(self, query: str, bucket: str = None, limit: int = 50) -> List[Dict]:
-        """Search relationships by query with JOIN to documents"""
+        """Search relationships by query, joined to their documents"""
         try:
-            relationships_df = self.tables["relationships"].to_pandas()
-            docs_df = self.tables["documents"].to_pandas()
-            
-            if relationships_df.empty or docs_df.empty:
-                return []
-            
-            # JOIN relationships with documents
-            joined_df = relationships_df.merge(docs_df, on='document_id', how='inner')
-            
-            # Filter by query terms
-            query_lower = query.lower()
-            mask = (
-                joined_df['source_entity'].str.lower().str.contains(query_lower, na=False) |
-                joined_df['target_entity'].str.lower().str.contains(query_lower, na=False) |
-                joined_df['description'].str.lower().str.contains(query_lower, na=False)
-            )
-            
-            # Filter by bucket if specified
-            if bucket:
-                mask = mask & (joined_df['bucket'] == bucket)
-            
-            filtered_df = joined_df[mask].head(limit)
+            bucket_filter = f"bucket = {self._sql_literal(bucket)}" if bucket else None
+
+            rows = self._text_search("relationships", query, ["source_entity", "target_entity", "description"],
+                                     where=bucket_filter, columns=self.RELATIONSHIP_COLUMNS, limit=limit)
+            docs = self._documents_by_id([row["document_id"] for row in rows])
             
             results = []
-            for _, row in filtered_df.iterrows():
-                rel_data = {
+            for row in rows:
+                doc = docs.get(row["document_id"])
+                if doc is None:
+                    continue
+                results.append({
                     "relationship_id": row['relationship_id'],
                     "source_entity": row['source_entity'],
                     "target_entity": row['target_entity'],
@@ -1269,11 +1451,10 @@ class LanceDBStorage:
                     "description": row['description'],
                     "strength": row['strength'],
                     "document_id": row['document_id'],
-                    "bucket": row['bucket'],
+                    "bucket": doc['bucket'],
                     "rank": row['rank'],
-                    "document_source": row['source_url'] if row['bucket'] == 'news' else row['filename']
-                }
-                results.append(rel_data)
+                    "document_source": self._document_source(doc)
+                })
             
             return results
             
@@ -1286,21 +1467,15 @@ class LanceDBStorage:
                                include_communities: bool = True) -> Dict[str, Any]:
         """Get complete graph data for a document by filename"""
         try:
-            docs_df = self.tables["documents"].to_pandas()
-            
-            if docs_df.empty:
-                return None
-            
-            # Filter by filename and bucket
-            mask = docs_df['filename'] == filename
+            where = f"filename = {self._sql_literal(filename)}"
             if bucket:
-                mask = mask & (docs_df['bucket'] == bucket)
+                where += f" AND bucket = {self._sql_literal(bucket)}"
             
-            doc_matches = docs_df[mask]
-            if doc_matches.empty:
+            doc_matches = self._query("documents", where, self.DOCUMENT_COLUMNS, limit=1)
+            if not doc_matches:
                 return None
             
-            doc_record = doc_matches.iloc[0]
+            doc_record = doc_matches[0]
             document_id = doc_record['document_id']
             
             return self._get_graph_data_by_document_id(document_id, doc_record, max_nodes, max_edges, include_communities)
@@ -1314,21 +1489,15 @@ class LanceDBStorage:
                                             include_communities: bool = True) -> Dict[str, Any]:
         """Get complete graph data for a document by source_url"""
         try:
-            docs_df = self.tables["documents"].to_pandas()
-            
-            if docs_df.empty:
-                return None
-            
-            # Filter by source_url and bucket
-            mask = docs_df['source_url'] == source_url
+            where = f"source_url = {self._sql_literal(source_url)}"
             if bucket:
-                mask = mask & (docs_df['bucket'] == bucket)
+                where += f" AND bucket = {self._sql_literal(bucket)}"
             
-            doc_matches = docs_df[mask]
-            if doc_matches.empty:
+            doc_matches = self._query("documents", where, self.DOCUMENT_COLUMNS, limit=1)
+            if not doc_matches:
                 return None
             
-            doc_record = doc_matches.iloc[0]
+            doc_record = doc_matches[0]
             document_id = doc_record['document_id']
             
             return self._get_graph_data_by_document_id(document_id, doc_record, max_nodes, max_edges, include_communities)
@@ -1344,16 +1513,16 @@ class LanceDBStorage:
         
         """
         try:
+            doc_filter = f"document_id = {self._sql_literal(document_id)}"
+
             # First, get relationships to determine which entities to include
-            relationships_df = self.tables["relationships"].to_pandas()
-            relationships_mask = relationships_df['document_id'] == document_id
-            relationships_filtered = relationships_df[relationships_mask].head(max_edges)
+            relationship_rows = self._query("relationships", doc_filter, self.RELATIONSHIP_COLUMNS, limit=max_edges)
             
             # Build set of entity names that appear in relationships
             connected_entity_names: Set[str] = set()
             relationships = []
             
-            for _, row in relationships_filtered.iterrows():
+            for row in relationship_rows:
                 source_entity = str(row['source_entity']).strip()
                 target_entity = str(row['target_entity']).strip()
                 
@@ -1372,25 +1541,17 @@ class LanceDBStorage:
             
             logger.info(f"🔍 Found {len(connected_entity_names)} unique connected entities from {len(relationships)} relationships")
             
-            # Now get entities, but only those that appear in relationships
-            entities_df = self.tables["entities"].to_pandas()
-            entities_mask = entities_df['document_id'] == document_id
-            entities_filtered = entities_df[entities_mask]
-            
-            # Filter entities to only include those with relationships
+            # Now get this document's entities, but only those that appear in relationships
             # Normalize entity names for comparison (case-insensitive, strip whitespace)
-            entities_filtered['name_normalized'] = entities_filtered['name'].str.strip().str.lower()
+            entity_rows = self._query("entities", doc_filter, self.ENTITY_COLUMNS)
             connected_entity_names_normalized = {name.lower().strip() for name in connected_entity_names}
             
-            entities_with_relationships = entities_filtered[
-                entities_filtered['name_normalized'].isin(connected_entity_names_normalized)
-            ]
-            
-            # Apply max_nodes limit after filtering
-            entities_with_relationships = entities_with_relationships.head(max_nodes)
-            
             entities = []
-            for _, row in entities_with_relationships.iterrows():
+            for row in entity_rows:
+                if len(entities) >= max_nodes:
+                    break
+                if str(row['name'] or '').strip().lower() not in connected_entity_names_normalized:
+                    continue
                 entities.append({
                     "entity_id": row['entity_id'],
                     "name": str(row['name']).strip(),  # Use original case
@@ -1400,16 +1561,12 @@ class LanceDBStorage:
                     "rank": row['rank']
                 })
             
-            logger.info(f"✅ Filtered to {len(entities)} entities that have relationships (from {len(entities_filtered)} total entities)")
+            logger.info(f"✅ Filtered to {len(entities)} entities that have relationships (from {len(entity_rows)} total entities)")
             
             # Get communities
             communities = []
             if include_communities:
-                communities_df = self.tables["communities"].to_pandas()
-                communities_mask = communities_df['document_id'] == document_id
-                communities_filtered = communities_df[communities_mask]
-                
-                for _, row in communities_filtered.iterrows():
+                for row in self._query("communities", doc_filter, self.COMMUNITY_COLUMNS):
                     try:
                         member_entities = json.loads(row['member_entities'])
                     except:
@@ -1436,14 +1593,14 @@ class LanceDBStorage:
                 "metadata": {
                     "document_id": document_id,
                     "filename": doc_record['filename'],
-                    "source_identifier": doc_record['source_url'] if doc_record['bucket'] == 'news' else doc_record['filename'],
+                    "source_identifier": self._document_source(doc_record),
                     "bucket": doc_record['bucket'],
                     "processing_timestamp": timestamp_str,
                     "processing_duration": 0,
                     "entities_count": len(entities),
                     "relationships_count": len(relationships),
                     "communities_count": len(communities),
-                    "total_entities_in_db": int(doc_record['entities_count']),
+                    "total_entities_in_db": int(doc_record['entities_count'] or 0),
                     "connected_entities_returned": len(entities)
                 },
                 "entities": entities,
@@ -1458,23 +1615,11 @@ class LanceDBStorage:
     def get_available_documents(self, bucket: str = None) -> List[str]:
         """Get list of available documents"""
         try:
-            docs_df = self.tables["documents"].to_pandas()
-            
-            if docs_df.empty:
-                return []
-            
-            if bucket:
-                docs_df = docs_df[docs_df['bucket'] == bucket]
+            where = f"bucket = {self._sql_literal(bucket)}" if bucket else None
+            docs = self._query("documents", where, ["filename", "bucket", "source_url"])
             
             # Return source_url for news, filename for others
-            result = []
-            for _, row in docs_df.iterrows():
-                if row['bucket'] == 'news':
-                    result.append(row['source_url'])
-                else:
-                    result.append(row['filename'])
-            
-            return list(set(result))
+            return list({self._document_source(doc) for doc in docs})
             
         except Exception as e:
             logger.error(f"❌ Failed to get available documents: {e}")
@@ -1483,9 +1628,15 @@ class LanceDBStorage:
     def get_document_stats(self, bucket: str = None) -> Dict[str, Any]:
         """Get system statistics"""
         try:
-            docs_df = self.tables["documents"].to_pandas()
+            import pyarrow.compute as pc
+
+            where = f"bucket = {self._sql_literal(bucket)}" if bucket else None
+            docs = self._query_table(
+                "documents", where,
+                ["filename", "bucket", "source_url", "entities_count", "relationships_count", "communities_count"]
+            )
             
-            if docs_df.empty:
+            if docs is None or docs.num_rows == 0:
                 return {
                     "total_documents": 0,
                     "total_entities": 0,
@@ -1494,24 +1645,16 @@ class LanceDBStorage:
                     "recent_documents": []
                 }
             
-            if bucket:
-                docs_df = docs_df[docs_df['bucket'] == bucket]
-            
-            total_entities = docs_df['entities_count'].sum()
-            total_relationships = docs_df['relationships_count'].sum()
-            total_communities = docs_df['communities_count'].sum()
+            total_entities = pc.sum(docs['entities_count']).as_py() or 0
+            total_relationships = pc.sum(docs['relationships_count']).as_py() or 0
+            total_communities = pc.sum(docs['communities_count']).as_py() or 0
             
             # Get recent documents
-            recent_docs_df = docs_df.tail(5)
-            recent_documents = []
-            for _, row in recent_docs_df.iterrows():
-                if row['bucket'] == 'news':
-                    recent_documents.append(row['source_url'])
-                else:
-                    recent_documents.append(row['filename'])
+            recent_docs = docs.slice(max(0, docs.num_rows - 5)).to_pylist()
+            recent_documents = [self._document_source(doc) for doc in recent_docs]
             
             return {
-                "total_documents": len(docs_df),
+                "total_documents": docs.num_rows,
                 "total_entities": int(total_entities),
                 "total_relationships": int(total_relationships),
                 "total_communities": int(total_communities),
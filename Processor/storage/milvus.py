@@ -7,18 +7,130 @@ Manages 3 separate Milvus databases:
 - STP_MILVUS_DATABASE (STP chunks with special schema)
 """
 
+import asyncio
 import logging
 import uuid
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from urllib.parse import urlparse
 
 from storage.base import VectorStorageBackend
+from storage.corpus_stats import get_corpus_statistics, stats_scope
 from config import config
 
 logger = logging.getLogger(__name__)
 
 
+class MilvusWriteBuffer:
+    """
+    Write buffer that accumulates rows across documents and inserts them in large batches.
+
+    Rows are grouped per (data_type, bucket) collection. When no batch is being
+    written, rows are inserted right away; rows arriving while a write is in flight
+    accumulate and are written when they reach max_rows or max_latency_seconds after
+    the first of them, whichever comes first. No explicit flush is issued per insert - Milvus
+    acknowledges inserts once they are persisted to its log and seals segments via
+    auto-flush, so bulk ingestion produces a few large segments instead of many tiny
+    ones. Each caller awaits the batch containing its rows, so the DocumentTracker is
+    only updated after the data has actually landed.
+    """
+
+    def __init__(self, writer: Callable[[str, str, List[Dict[str, Any]]], int],
+                 max_rows: int = 1000, max_latency_seconds: float = 0.2):
+        self._writer = writer
+        self.max_rows = max(1, max_rows)
+        self.max_latency_seconds = max_latency_seconds
+        self._pending: Dict[Tuple[str, str], List[Tuple[List[Dict[str, Any]], asyncio.Future]]] = {}
+        self._pending_rows: Dict[Tuple[str, str], int] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight = 0
+        # Single writer thread keeps database switching and inserts serialized
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="milvus_writer")
+        self.batches_written = 0
+        self.rows_written = 0
+
+    async def add(self, data_type: str, bucket: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Queue rows and wait until the batch containing them has been inserted"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (data_type, bucket)
+
+        self._pending.setdefault(key, []).append((rows, future))
+        self._pending_rows[key] = self._pending_rows.get(key, 0) + len(rows)
+
+        if self._pending_rows[key] >= self.max_rows or self._inflight == 0:
+            # Full batch, or the writer is idle: nothing to gain by waiting
+            await self._flush_key(key)
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._flush_after_delay())
+
+        return await future
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(self.max_latency_seconds)
+        await self.flush()
+
+    async def flush(self):
+        """Write every pending batch, including rows queued while flushing"""
+        while self._pending:
+            await self._flush_key(next(iter(self._pending)))
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run func on the writer thread, serialized with inserts"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def close(self):
+        """Write all pending rows, then stop the writer thread"""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()
+        self._executor.shutdown(wait=True)
+
+    async def _flush_key(self, key: Tuple[str, str]):
+        entries = self._pending.pop(key, [])
+        self._pending_rows.pop(key, None)
+        if not entries:
+            return
+
+        data_type, bucket = key
+        rows = [row for batch, _ in entries for row in batch]
+        loop = asyncio.get_running_loop()
+
+        self._inflight += 1
+        try:
+            await loop.run_in_executor(self._executor, self._writer, data_type, bucket, rows)
+            self.batches_written += 1
+            self.rows_written += len(rows)
+            logger.info(f"✅ Batched insert of {len(rows)} {data_type} rows into {bucket} "
+                        f"({len(entries)} requests)")
+            results = [{"status": "success", "inserted_count": len(batch)} for batch, _ in entries]
+        except Exception as e:
+            logger.error(f"❌ Batched insert into {bucket} {data_type} failed: {e}")
+            results = [{"status": "failed", "inserted_count": 0, "error": str(e)} for _ in entries]
+        finally:
+            self._inflight -= 1
+
+        for (_, future), result in zip(entries, results):
+            if not future.done():
+                future.set_result(result)
+
+    def pending_rows(self, data_type: str, bucket: str) -> int:
+        """Rows queued for a collection but not inserted yet"""
+        return self._pending_rows.get((data_type, bucket), 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer statistics"""
+        return {
+            "max_rows": self.max_rows,
+            "max_latency_seconds": self.max_latency_seconds,
+            "pending_rows": sum(self._pending_rows.values()),
+            "batches_written": self.batches_written,
+            "rows_written": self.rows_written
+        }
+
+
 class MilvusStorage(VectorStorageBackend):
     """
     Unified Milvus vector storage for chunks, summaries, and STP data
@@ -33,6 +145,14 @@ class MilvusStorage(VectorStorageBackend):
         # Embedding dimension (Qwen3-Embedding-0.6B: 1024)
         self.embedding_dim = config.get('ollama.embedding_dim', 1024)
         self._pymilvus_available = False
+        self._written_collections = set()
+
+        write_buffer_config = self.config.get('write_buffer', {})
+        self.write_buffer = MilvusWriteBuffer(
+            self._insert_rows_sync,
+            max_rows=write_buffer_config.get('max_rows', 1000),
+            max_latency_seconds=write_buffer_config.get('max_latency_seconds', 0.2)
+        )
 
         logger.info(f"📊 Milvus embedding dimension: {self.embedding_dim}")
 
@@ -98,6 +218,22 @@ class MilvusStorage(VectorStorageBackend):
             return
         try:
             from pymilvus import connections
+
+            pending_rows = self.write_buffer.get_stats()["pending_rows"]
+            if pending_rows:
+                logger.warning(f"⚠️ Disconnecting with {pending_rows} buffered rows not written; "
+                               f"await close_write_buffer() first")
+
+            # Seal segments written since startup once, instead of after every insert
+            for data_type, bucket in self._written_collections:
+                collection = self.collections.get(data_type, {}).get(bucket)
+                if collection:
+                    try:
+                        collection.flush()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Final flush failed for {bucket} {data_type}: {e}")
+            self._written_collections.clear()
+
             connections.disconnect("default")
             self.connected = False
             logger.info("✅ Disconnected from Milvus")
@@ -267,100 +403,90 @@ class MilvusStorage(VectorStorageBackend):
 
     # Chunk storage methods
     async def insert_chunks(self, chunks_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Insert chunks into appropriate collection (async)"""
+        """Insert chunks into appropriate collection via the write buffer (async)"""
         if not self._pymilvus_available or not chunks_data:
             logger.warning("⚠️ Pymilvus not available or no chunks data")
             return {"status": "skipped", "inserted_count": 0}
 
-        # Ensure connection is established
-        if not self.connected:
-            logger.info("🔌 Establishing Milvus connection...")
-            self.connect()
-            if not self.connected:
-                return {"status": "failed", "inserted_count": 0, "error": "Connection failed"}
-
-        bucket = chunks_data[0]["bucket_source"]
-
-        try:
-            from pymilvus import db, connections
-
-            # Ensure connection exists before switching database
-            if not connections.has_connection("default"):
-                logger.warning("⚠️ Connection lost, reconnecting...")
-                self.connect()
-
-            # Switch to chunks database
-            db.using_database(self.chunks_database)
-            logger.info(f"🔄 Switched to chunks database: {self.chunks_database}")
-
-            collection = self.collections.get("chunks", {}).get(bucket)
-
-            if not collection:
-                logger.error(f"❌ No chunks collection for bucket: {bucket}")
-                return {"status": "failed", "inserted_count": 0, "error": f"No collection for bucket {bucket}"}
-
-            # Prepare data for insertion
-            entities = self._prepare_chunk_entities(chunks_data, bucket)
-
-            logger.info(f"📝 Inserting {len(chunks_data)} chunks into {bucket} chunks collection")
-
-            result = collection.insert(entities)
-            collection.flush()
-
-            logger.info(f"✅ Inserted {len(chunks_data)} chunks into {bucket} collection")
-            return {"status": "success", "inserted_count": len(chunks_data)}
-
-        except Exception as e:
-            logger.error(f"❌ Failed to insert chunks into {bucket}: {e}")
-            return {"status": "failed", "inserted_count": 0, "error": str(e)}
+        return await self._buffered_insert("chunks", chunks_data[0]["bucket_source"], chunks_data)
 
     async def insert_summary(self, summary_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Insert summary into appropriate collection (async)"""
+        """Insert summary into appropriate collection via the write buffer (async)"""
         if not self._pymilvus_available:
             logger.warning("⚠️ Pymilvus not available")
             return {"status": "skipped", "inserted_count": 0}
 
+        return await self._buffered_insert("summaries", summary_data["bucket_source"], [summary_data])
+
+    async def flush_write_buffer(self):
+        """Insert all buffered rows immediately"""
+        await self.write_buffer.flush()
+
+    async def close_write_buffer(self):
+        """Insert all buffered rows and stop the writer thread (call before disconnect)"""
+        await self.write_buffer.close()
+
+    async def _buffered_insert(self, data_type: str, bucket: str,
+                               rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate the target collection and queue rows for a batched insert"""
         # Ensure connection is established
         if not self.connected:
             logger.info("🔌 Establishing Milvus connection...")
-            self.connect()
+            # connect() switches databases, so it must not interleave with an insert on the writer thread
+            await self.write_buffer.run(self.connect)
             if not self.connected:
                 return {"status": "failed", "inserted_count": 0, "error": "Connection failed"}
 
-        bucket = summary_data["bucket_source"]
+        if not self.collections.get(data_type, {}).get(bucket):
+            logger.error(f"❌ No {data_type} collection for bucket: {bucket}")
+            return {"status": "failed", "inserted_count": 0, "error": f"No collection for bucket {bucket}"}
 
-        try:
-            from pymilvus import db, connections
+        logger.info(f"📝 Queued {len(rows)} {data_type} rows for {bucket} collection")
+        return await self.write_buffer.add(data_type, bucket, rows)
 
-            # Ensure connection exists before switching database
-            if not connections.has_connection("default"):
-                logger.warning("⚠️ Connection lost, reconnecting...")
-                self.connect()
+    def _insert_rows_sync(self, data_type: str, bucket: str, rows: List[Dict[str, Any]]) -> int:
+        """Insert a batch of rows without flushing (runs on the write buffer thread)"""
+        from pymilvus import db, connections
 
-            # Switch to summaries database
-            db.using_database(self.summaries_database)
-            logger.info(f"🔄 Switched to summaries database: {self.summaries_database}")
+        # Ensure connection exists before switching database
+        if not connections.has_connection("default"):
+            logger.warning("⚠️ Connection lost, reconnecting...")
+            self.connect()
 
-            collection = self.collections.get("summaries", {}).get(bucket)
+        db.using_database(self.chunks_database if data_type == "chunks" else self.summaries_database)
 
-            if not collection:
-                logger.error(f"❌ No summaries collection for bucket: {bucket}")
-                return {"status": "failed", "inserted_count": 0, "error": f"No collection for bucket {bucket}"}
+        collection = self.collections.get(data_type, {}).get(bucket)
+        if not collection:
+            raise RuntimeError(f"No {data_type} collection for bucket {bucket}")
+
+        prepare = self._prepare_chunk_entities if data_type == "chunks" else self._prepare_summary_entities
+        max_rows = self.write_buffer.max_rows
 
-            # Prepare data for insertion
-            entities = self._prepare_summary_entities([summary_data], bucket)
+        # A single caller may hand over more rows than one batch should carry
+        for start in range(0, len(rows), max_rows):
+            collection.insert(prepare(rows[start:start + max_rows], bucket))
 
-            logger.info(f"📝 Inserting summary into {bucket} summaries collection")
+        self._written_collections.add((data_type, bucket))
+        self._record_corpus_statistics(data_type, bucket, rows)
+        return len(rows)
 
-            result = collection.insert(entities)
-            collection.flush()
+    def _record_corpus_statistics(self, data_type: str, bucket: str, rows: List[Dict[str, Any]]) -> None:
+        """Add inserted rows to the BM25 statistics used by the Server's reranker"""
+        corpus_statistics = get_corpus_statistics()
+        if corpus_statistics is None:
+            return
 
-            logger.info(f"✅ Inserted summary into {bucket} collection")
-            return {"status": "success", "inserted_count": 1}
+        text_field = "chunk_text" if data_type == "chunks" else "abstractive_summary"
+        collection_name = self.config['collections'][data_type][bucket]
 
+        try:
+            corpus_statistics.add_documents(
+                stats_scope(data_type, collection_name),
+                (row.get(text_field, "") for row in rows)
+            )
         except Exception as e:
-            logger.error(f"❌ Failed to insert summary into {bucket}: {e}")
-            return {"status": "failed", "inserted_count": 0, "error": str(e)}
+            # Statistics only tune ranking; never fail the insert over them
+            logger.warning(f"⚠️ Failed to update BM25 statistics for {collection_name}: {e}")
 
     def _prepare_chunk_entities(self, chunks_data: List[Dict], bucket: str) -> List[List]:
         """Prepare chunk data for Milvus insertion"""
@@ -479,7 +605,8 @@ class MilvusStorage(VectorStorageBackend):
             "databases": {
                 "chunks_database": self.chunks_database,
                 "summaries_database": self.summaries_database
-            }
+            },
+            "write_buffer": self.write_buffer.get_stats()
         }
 
         if not self._pymilvus_available or not self.connected:
@@ -493,6 +620,8 @@ class MilvusStorage(VectorStorageBackend):
                         count = collection.num_entities
                         stats["collections"][data_type][bucket] = {
                             "count": count,
+                            # Buffered rows not yet inserted, so count + pending is the full total
+                            "pending_rows": self.write_buffer.pending_rows(data_type, bucket),
                             "collection_name": collection.name,
                             "status": "loaded" if collection.is_loaded else "not_loaded",
                             "schema_type": "source_url" if bucket == "news" else "doc_name"
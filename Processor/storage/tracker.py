@@ -4,7 +4,7 @@ Helper functions and utilities for tracking document processing
 """
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
 
 from storage.database import tracker
@@ -54,6 +54,10 @@ class ProcessingTracker:
         """Get processing status for a document"""
         return self.tracker.get_status(doc_name, bucket_source)
 
+    def get_document_statuses(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Get processing status for many (doc_name, bucket_source) keys in bulk"""
+        return self.tracker.get_statuses(keys)
+
     def get_all_documents(self, bucket_filter: str = None) -> List[Dict[str, Any]]:
         """Get all processed documents"""
         return self.tracker.get_all_documents(bucket_filter)
@@ -319,49 +319,25 @@ async def clear_log_file():
 async def cleanup_expired_sessions(
     session_manager: SessionManager = Depends(get_session_manager)
 ):
-    """
-    Cleanup all sessions from Redis.
-    
-    WARNING: This executes FLUSHALL and clears ALL Redis data!
-    """
-    
+    """Sweep expired and corrupted sessions from Redis, verifying every session key."""
+
     try:
-        logger.warning("ADMIN ACTION: FLUSHALL - Clearing ALL Redis data")
-        
-        if not session_manager.is_connected:
-            await session_manager.initialize()
-        
-        # Execute FLUSHALL command - clears ALL Redis data
-        await session_manager.redis_client.flushall()
-        
-        # Clear local cache
-        session_manager.session_cache.clear()
-        
-        # Reset performance stats
-        session_manager.performance_stats = {
-            "total_sessions_created": 0,
-            "total_sessions_deleted": 0,
-            "total_messages_stored": 0,
-            "cache_hits": 0,
-            "cache_misses": 0,
-            "avg_session_duration": 0.0,
-            "cleanup_runs": 0,
-            "last_cleanup": None
-        }
+        logger.info("ADMIN ACTION: Cleaning up expired sessions")
+
+        cleaned_count = await session_manager.cleanup_expired_sessions(verify_all=True)
 
-        logger.warning("ADMIN ACTION: FLUSHALL executed - ALL Redis data cleared")
-        
         return {
             "success": True,
-            "message": "ALL Redis data has been cleared (FLUSHALL executed)",
-            "action": "flushall"
+            "message": f"Cleaned up {cleaned_count} expired or corrupted sessions",
+            "cleaned_sessions": cleaned_count,
+            "action": "cleanup_expired_sessions"
         }
-        
+
     except Exception as e:
-        logger.error(f"Error clearing Redis data: {e}")
+        logger.error(f"Error cleaning up sessions: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to clear Redis data: {str(e)}"
+            detail=f"Failed to clean up sessions: {str(e)}"
         )
 
 @router.post("/feedback/clear")
@@ -21,6 +21,7 @@ from app.schemas.chat import (
 )
 from app.services.conversation.orchestrator import get_conversation_orchestrator
 from app.services.memory.session import get_session_manager
+from app.services.memory.session_events import get_session_event_bus
 from app.services.tracing import is_langfuse_enabled
 from app.api.v1.helpers.translation import (
     process_with_translation,
@@ -267,7 +268,8 @@ async def session_status_websocket(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint for real-time session status updates.
 
-    Sends countdown updates every second and handles session timeout.
+    Pushes countdown state when the session changes (via Redis pub/sub) or
+    crosses the warning/critical thresholds, and handles session timeout.
     Client can send activity pings to reset the timer.
     """
     await websocket.accept()
@@ -303,61 +305,79 @@ async def session_status_websocket(websocket: WebSocket, session_id: str):
             "timeout_seconds": SESSION_TIMEOUT_SECONDS
         })
 
-        # Start monitoring loop
-        async def send_status_updates():
-            """Send session status updates every second"""
-            while True:
-                try:
-                    # Get fresh session data
-                    session = await session_manager.get_session(session_uuid)
-
-                    if not session:
-                        # Session was deleted
-                        await websocket.send_json({
-                            "type": "session_expired",
-                            "message": "Session no longer exists"
-                        })
-                        break
-
-                    # Calculate remaining time
-                    elapsed = (datetime.now() - session.last_activity_time).total_seconds()
-                    remaining_seconds = max(0, SESSION_TIMEOUT_SECONDS - elapsed)
-
-                    # Check if session expired
-                    if remaining_seconds <= 0:
-                        # Delete the session
-                        await session_manager.delete_session(session_uuid)
+        event_bus = get_session_event_bus()
+
+        def status_message(last_activity: datetime) -> dict:
+            """Countdown state; the client ticks it down locally between messages"""
+            elapsed = (datetime.now() - last_activity).total_seconds()
+            remaining_seconds = max(0, SESSION_TIMEOUT_SECONDS - elapsed)
+            return {
+                "type": "status_update",
+                "remaining_seconds": int(remaining_seconds),
+                "minutes": int(remaining_seconds // 60),
+                "seconds": int(remaining_seconds % 60),
+                # Determine warning level (configurable from .env)
+                "is_warning": remaining_seconds <= SESSION_WARNING_SECONDS,
+                "is_critical": remaining_seconds <= 60,  # 1 minute
+                "last_activity": last_activity.isoformat()
+            }
 
-                        await websocket.send_json({
-                            "type": "session_expired",
-                            "message": "Session timed out due to inactivity"
-                        })
-                        break
-
-                    # Send status update
-                    minutes = int(remaining_seconds // 60)
-                    seconds = int(remaining_seconds % 60)
-
-                    # Determine warning level (configurable from .env)
-                    is_warning = remaining_seconds <= SESSION_WARNING_SECONDS
-                    is_critical = remaining_seconds <= 60  # 1 minute
-
-                    await websocket.send_json({
-                        "type": "status_update",
-                        "remaining_seconds": int(remaining_seconds),
-                        "minutes": minutes,
-                        "seconds": seconds,
-                        "is_warning": is_warning,
-                        "is_critical": is_critical,
-                        "last_activity": session.last_activity_time.isoformat()
-                    })
-
-                    # Wait 1 second before next update
-                    await asyncio.sleep(1)
-
-                except Exception as e:
-                    logger.error(f"Error in status update loop: {e}")
-                    break
+        # Push status only when the session changes or crosses a warning/expiry boundary
+        async def send_status_updates():
+            """Send session status updates driven by session change events"""
+            last_activity = session.last_activity_time
+            try:
+                async with event_bus.subscribe(session_uuid) as events:
+                    await websocket.send_json(status_message(last_activity))
+
+                    while True:
+                        remaining = SESSION_TIMEOUT_SECONDS - (datetime.now() - last_activity).total_seconds()
+                        boundaries = [b for b in (remaining - SESSION_WARNING_SECONDS, remaining - 60, remaining) if b > 0]
+                        wait_seconds = min(boundaries) + 0.05 if boundaries else 0
+
+                        try:
+                            event = await asyncio.wait_for(events.get(), timeout=wait_seconds)
+                        except asyncio.TimeoutError:
+                            event = None
+
+                        event_type = event.get("type") if event else None
+                        if event_type == "deleted":
+                            await websocket.send_json({
+                                "type": "session_expired",
+                                "message": "Session no longer exists"
+                            })
+                            break
+
+                        if event_type == "updated":
+                            last_activity = datetime.fromisoformat(event["last_activity"])
+                        elif event_type == "resync" or remaining <= wait_seconds:
+                            # Events may have been missed; confirm against Redis before expiring
+                            fresh = await session_manager.get_session(session_uuid, use_cache=False)
+                            if not fresh:
+                                await websocket.send_json({
+                                    "type": "session_expired",
+                                    "message": "Session no longer exists"
+                                })
+                                break
+                            last_activity = fresh.last_activity_time
+
+                            elapsed = (datetime.now() - last_activity).total_seconds()
+                            if elapsed >= SESSION_TIMEOUT_SECONDS:
+                                # Delete the session
+                                await session_manager.delete_session(session_uuid)
+
+                                await websocket.send_json({
+                                    "type": "session_expired",
+                                    "message": "Session timed out due to inactivity"
+                                })
+                                break
+
+                        await websocket.send_json(status_message(last_activity))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in status update loop: {e}")
 
         # Start status update task
         update_task = asyncio.create_task(send_status_updates())
@@ -126,6 +126,8 @@ class FeaturesConfig(BaseSettings):
     SUMMARY_MIN_MESSAGES: int = 8
     SUMMARY_MAX_LENGTH: int = 500
     SUMMARY_TIMEOUT: int = 15
+    SUMMARY_LOCK_SECONDS: int = 60  # Per-session Redis lease; must exceed SUMMARY_TIMEOUT
+    SUMMARY_CACHE_SIZE: int = 1000  # Summaries kept in process memory (LRU)
 
     # =============================================================================
     # Connection Timeouts
@@ -168,6 +168,7 @@ class IntegrationsConfig(BaseSettings):
     MINIO_MAX_CONCURRENT_OPERATIONS: int = 8
     MINIO_PATH_CACHE_DURATION_HOURS: int = 1
     MINIO_ENABLE_PATH_CACHING: bool = True
+    MINIO_URL_CACHE_MINUTES: int = 15  # Capped at half the URL expiry
 
     # =============================================================================
     # STP Service Configuration
@@ -66,6 +66,27 @@ class RAGConfig(BaseSettings):
     RERANKER_PHRASE_MATCH_WEIGHT: float = 0.1
     RERANKER_SOURCE_BOOST_WEIGHT: float = 0.03
 
+    # BM25 lexical scoring (IDF from the Processor's per-collection ingest statistics)
+    RERANKER_BM25_WEIGHT: float = Field(
+        default=0.15,
+        description="Weight of the normalised BM25 score added to the similarity score"
+    )
+    RERANKER_BM25_K1: float = 1.2
+    RERANKER_BM25_B: float = 0.75
+    RERANKER_BM25_STATS_DATABASE: str = Field(
+        default="neuroclimabot",
+        description="MongoDB database where the Processor writes BM25 statistics"
+    )
+    RERANKER_BM25_STATS_REFRESH_SECONDS: int = 600
+    RERANKER_BM25_STATS_TIMEOUT: float = Field(
+        default=0.2,
+        description="Max seconds to wait for uncached term statistics before using candidate-set IDF"
+    )
+
+    # Optional CPU cross-encoder over the reranked top-k (needs sentence-transformers)
+    RERANKER_CROSS_ENCODER_ENABLED: bool = False
+    RERANKER_CROSS_ENCODER_WEIGHT: float = 0.5
+
     # Enhanced Response Generation
     MAX_RESPONSE_LENGTH: int = Field(
         default=4000,
@@ -115,8 +136,47 @@ class RAGConfig(BaseSettings):
     )
     MAX_CONTEXT_LENGTH: int = Field(
         default=8000,
-        description="Maximum total context length in characters"
+        description="Maximum total context length in characters (superseded by MAX_CONTEXT_TOKENS)"
+    )
+
+    # Token-budgeted Context Assembly
+    MAX_CONTEXT_TOKENS: int = Field(
+        default=3000,
+        description="Token budget for retrieved context plus conversation memory in the prompt"
+    )
+    MAX_MEMORY_TOKENS: int = Field(
+        default=400,
+        description="Share of MAX_CONTEXT_TOKENS reserved for recent conversation memory"
+    )
+    CONTEXT_TOKENIZER: str = Field(
+        default="auto",
+        description="Tokenizer of the generation model: 'auto' (bundled, matched to the active model), a tokenizer.json path or Hugging Face hub id; empty to estimate"
+    )
+    CONTEXT_TOKEN_CACHE_SIZE: int = Field(
+        default=10000,
+        description="Cached token counts of retrieved items"
+    )
+
+    # Local query classifier (skips LLM analysis/rewrite calls when confident)
+    QUERY_CLASSIFIER_ENABLED: bool = Field(
+        default=False,
+        description="Opt-in: stores raw user queries with their LLM outcomes in MongoDB query_outcomes for QUERY_CLASSIFIER_RETENTION_DAYS"
+    )
+    QUERY_CLASSIFIER_MIN_CONFIDENCE: float = Field(
+        default=0.9,
+        description="Posterior probability a local prediction needs to replace the LLM call"
+    )
+    QUERY_CLASSIFIER_MIN_PRECISION: float = Field(
+        default=0.95,
+        description="Held-out precision of confident predictions required before a label is trusted"
+    )
+    QUERY_CLASSIFIER_MIN_EXAMPLES: int = Field(
+        default=300,
+        description="Logged LLM outcomes needed before a model is trained"
     )
+    QUERY_CLASSIFIER_MAX_EXAMPLES: int = 20000
+    QUERY_CLASSIFIER_RETRAIN_EVERY: int = 200
+    QUERY_CLASSIFIER_RETENTION_DAYS: int = 90
 
     class Config:
         env_file = ".env"
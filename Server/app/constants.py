@@ -213,7 +213,6 @@ RERANKER_PHRASE_MATCH_WEIGHT = 0.1      # Phrase match weight
 RERANKER_SOURCE_BOOST_WEIGHT = 0.03     # Source boost weight
 
 # Boost values for reranking (from reranker.py)
-TITLE_EXACT_MATCH_BOOST = 0.15          # Boost for exact title match
 TITLE_PARTIAL_MATCH_BOOST = 0.10        # Boost for partial title match
 SOURCE_EXACT_MATCH_BOOST = 0.05         # Boost for exact source match
 QUERY_TERM_MATCH_BOOST = 0.02           # Boost for query term in content
@@ -148,6 +148,12 @@ async def shutdown_event():
     if hasattr(milvus_client, 'close'):
         await milvus_client.close()
 
+    try:
+        from app.services.memory.session_events import get_session_event_bus
+        await get_session_event_bus().close()
+    except Exception as e:
+        logger.warning(f"Error shutting down session event bus: {e}")
+
     if hasattr(session_manager, 'close'):
         await session_manager.close()
 
@@ -229,6 +235,7 @@ async def initialize_session_manager():
     """Initialize session manager."""
     try:
         await session_manager.initialize()
+        session_manager.start_cleanup_task()
         logger.info("✅ Session manager initialized")
     except Exception as e:
         logger.error(f"❌ Failed to initialize session manager: {e}")
@@ -3,8 +3,11 @@ Updated MinIO object storage client with public shareable URLs for references.
 Handles different buckets with 30-minute expiry and folder path resolution.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from minio import Minio
@@ -47,6 +50,21 @@ class MinIOClient:
         self.cache_expiry = {}
         self.cache_duration = timedelta(hours=1)  # Cache paths for 1 hour
         
+        # Path lookups run on executor threads; caches are only touched under this lock
+        self._cache_lock = threading.Lock()
+        
+        # Generated URLs are reused for at most half their validity, so every
+        # URL handed out stays usable for at least half its lifetime.
+        # Least recently used entries are evicted beyond url_cache_max_size.
+        self.url_cache: OrderedDict[Tuple[str, str], Tuple[str, datetime]] = OrderedDict()
+        self.url_cache_max_size = 1000
+        self.url_cache_duration = min(
+            timedelta(minutes=self.settings.MINIO_URL_CACHE_MINUTES),
+            self.presigned_url_expiry / 2
+        )
+        self._url_requests: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._lookup_semaphore: Optional[asyncio.Semaphore] = None
+        
         logger.info(f"MinIO configured: {self.endpoint} (secure: {self.secure}) - 30min URL expiry")
     
     async def initialize(self):
@@ -84,7 +102,64 @@ class MinIOClient:
             except S3Error as e:
                 logger.warning(f"Could not check bucket {bucket_name}: {e}")
     
+    async def generate_shareable_reference_urls(
+        self,
+        documents: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Optional[str]]:
+        """Resolve (doc_name, bucket_source) pairs in one batch, each distinct pair once."""
+        unique = list(dict.fromkeys(documents))
+        urls = await asyncio.gather(
+            *(self.generate_shareable_reference_url(doc_name, bucket_source) for doc_name, bucket_source in unique)
+        )
+        return dict(zip(unique, urls))
+    
     async def generate_shareable_reference_url(self, doc_name: str, bucket_source: str = "") -> Optional[str]:
+        """Cached shareable URL; concurrent requests for one document share a single lookup."""
+        cache_key = ((bucket_source or "").lower(), doc_name)
+        
+        cached = self._get_cached_url(cache_key)
+        if cached:
+            return cached
+        
+        request = self._url_requests.get(cache_key)
+        if request is None:
+            request = asyncio.ensure_future(self._lookup_shareable_url(doc_name, bucket_source))
+            self._url_requests[cache_key] = request
+            request.add_done_callback(lambda _: self._url_requests.pop(cache_key, None))
+        
+        url = await asyncio.shield(request)
+        if url:
+            self._cache_url(cache_key, url)
+        return url
+    
+    def _get_cached_url(self, cache_key: Tuple[str, str]) -> Optional[str]:
+        with self._cache_lock:
+            cached = self.url_cache.get(cache_key)
+            if not cached:
+                return None
+            if datetime.now() >= cached[1]:
+                del self.url_cache[cache_key]
+                return None
+            self.url_cache.move_to_end(cache_key)
+            return cached[0]
+    
+    def _cache_url(self, cache_key: Tuple[str, str], url: str):
+        with self._cache_lock:
+            self.url_cache[cache_key] = (url, datetime.now() + self.url_cache_duration)
+            self.url_cache.move_to_end(cache_key)
+            while len(self.url_cache) > self.url_cache_max_size:
+                self.url_cache.popitem(last=False)
+    
+    async def _lookup_shareable_url(self, doc_name: str, bucket_source: str) -> Optional[str]:
+        """Run the blocking bucket search on the default executor, bounded by MINIO_MAX_CONCURRENT_OPERATIONS."""
+        if self._lookup_semaphore is None:
+            self._lookup_semaphore = asyncio.Semaphore(self.settings.MINIO_MAX_CONCURRENT_OPERATIONS)
+        
+        async with self._lookup_semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._generate_shareable_url, doc_name, bucket_source)
+    
+    def _generate_shareable_url(self, doc_name: str, bucket_source: str = "") -> Optional[str]:
         """
         Generate public shareable URL for references with 30-minute expiry.
         Handles folder structures and provides URLs that work without authentication.
@@ -119,7 +194,7 @@ class MinIOClient:
                     continue
 
                 # Find the actual file path (handles folders)
-                actual_file_path = await self._find_document_path(doc_name, bucket_name)
+                actual_file_path = self._find_document_path(doc_name, bucket_name)
 
                 if actual_file_path:
                     # Generate public shareable presigned URL with 30-minute expiry
@@ -140,7 +215,7 @@ class MinIOClient:
             logger.error(f"Failed to generate shareable URL for {doc_name}: {e}")
             return None
     
-    async def _find_document_path(self, doc_name: str, bucket_name: str) -> Optional[str]:
+    def _find_document_path(self, doc_name: str, bucket_name: str) -> Optional[str]:
         """
         Find the actual path of a document in MinIO bucket, handling folder structures.
         Uses caching to improve performance for repeated requests.
@@ -150,11 +225,12 @@ class MinIOClient:
         cache_key = f"{bucket_name}:{doc_name}"
         now = datetime.now()
         
-        if (cache_key in self.path_cache and 
-            cache_key in self.cache_expiry and 
-            now < self.cache_expiry[cache_key]):
+        with self._cache_lock:
+            cached_path = self.path_cache.get(cache_key)
+            cached_expiry = self.cache_expiry.get(cache_key)
+        if cached_path is not None and cached_expiry is not None and now < cached_expiry:
             logger.debug(f"Using cached path for {doc_name}")
-            return self.path_cache[cache_key]
+            return cached_path
         
         try:
             # First, try direct access (file might be in root)
@@ -164,8 +240,7 @@ class MinIOClient:
                 logger.debug(f"Found {doc_name} in bucket root")
                 
                 # Cache the result
-                self.path_cache[cache_key] = actual_path
-                self.cache_expiry[cache_key] = now + self.cache_duration
+                self._cache_path(cache_key, actual_path, now)
                 
                 return actual_path
                 
@@ -182,8 +257,7 @@ class MinIOClient:
                         # logger.info(f"Found {doc_name} at path: {object_name}")
                         
                         # Cache the result
-                        self.path_cache[cache_key] = object_name
-                        self.cache_expiry[cache_key] = now + self.cache_duration
+                        self._cache_path(cache_key, object_name, now)
                         
                         return object_name
                     
@@ -192,8 +266,7 @@ class MinIOClient:
                         # logger.info(f"Found {doc_name} (case-insensitive) at path: {object_name}")
                         
                         # Cache the result
-                        self.path_cache[cache_key] = object_name
-                        self.cache_expiry[cache_key] = now + self.cache_duration
+                        self._cache_path(cache_key, object_name, now)
                         
                         return object_name
                 
@@ -205,20 +278,30 @@ class MinIOClient:
             return None
     
     
+    def _cache_path(self, cache_key: str, object_name: str, now: datetime):
+        with self._cache_lock:
+            self.path_cache[cache_key] = object_name
+            self.cache_expiry[cache_key] = now + self.cache_duration
+    
     def _clean_path_cache(self):
         """Clean expired entries from path cache."""
         now = datetime.now()
-        expired_keys = [
-            key for key, expiry_time in self.cache_expiry.items() 
-            if now >= expiry_time
-        ]
-        
-        for key in expired_keys:
-            self.path_cache.pop(key, None)
-            self.cache_expiry.pop(key, None)
+        with self._cache_lock:
+            expired_keys = [
+                key for key, expiry_time in self.cache_expiry.items() 
+                if now >= expiry_time
+            ]
+            
+            for key in expired_keys:
+                self.path_cache.pop(key, None)
+                self.cache_expiry.pop(key, None)
+            
+            expired_urls = [key for key, (_, expires_at) in self.url_cache.items() if now >= expires_at]
+            for key in expired_urls:
+                self.url_cache.pop(key, None)
         
-        if expired_keys:
-            logger.debug(f"Cleaned {len(expired_keys)} expired cache entries")
+        if expired_keys or expired_urls:
+            logger.debug(f"Cleaned {len(expired_keys) + len(expired_urls)} expired cache entries")
     
     async def list_documents_in_bucket(self, bucket_source: str, prefix: str = "") -> List[Dict[str, Any]]:
         """List all documents in a bucket for debugging."""
@@ -346,7 +429,8 @@ class MinIOClient:
                 "buckets": buckets,
                 "cache_stats": {
                     "path_cache_size": len(self.path_cache),
-                    "cache_expiry_entries": len(self.cache_expiry)
+                    "cache_expiry_entries": len(self.cache_expiry),
+                    "url_cache_size": len(self.url_cache)
                 }
             }
             
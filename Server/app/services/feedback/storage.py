@@ -11,6 +11,9 @@ from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Keys per SCAN step and values per MGET when walking feedback records
+_SCAN_BATCH = 500
+
 
 class SimpleFeedbackService:
     """Simple Redis-based service for thumbs up/down feedback."""
@@ -24,6 +27,8 @@ class SimpleFeedbackService:
         self.feedback_key = "feedback:{feedback_id}"
         self.response_feedback_key = "response_feedback:{response_id}"
         self.daily_stats_key = "daily_feedback:{date}"
+        self.hourly_stats_key = "hourly_feedback"
+        self.hourly_backfill_key = "hourly_feedback_backfilled"
         self.global_stats_key = "global_feedback_stats"
         
         # Simple duplicate prevention
@@ -108,8 +113,8 @@ class SimpleFeedbackService:
         """Update aggregated statistics."""
         
         try:
-            today = datetime.now().strftime("%Y-%m-%d")
-            daily_key = self.daily_stats_key.format(date=today)
+            now = datetime.now()
+            daily_key = self.daily_stats_key.format(date=now.strftime("%Y-%m-%d"))
             
             pipe = self.redis_client.pipeline()
             
@@ -119,6 +124,9 @@ class SimpleFeedbackService:
             pipe.hincrby(daily_key, f"language_{feedback.response_language}", 1)
             pipe.hincrby(daily_key, f"conversation_{feedback.conversation_type}", 1)
             
+            # Hour-of-day distribution
+            pipe.hincrby(self.hourly_stats_key, str(now.hour), 1)
+            
             # Global counters
             pipe.hincrby(self.global_stats_key, "total_feedback", 1)
             pipe.hincrby(self.global_stats_key, f"total_thumbs_{feedback.feedback.value}", 1)
@@ -137,8 +145,15 @@ class SimpleFeedbackService:
             await self.initialize()
         
         try:
-            # Get global stats
-            global_data = await self.redis_client.hgetall(self.global_stats_key)
+            # Global stats and every day in the range in one round trip
+            end_date = datetime.now()
+            dates = [(end_date - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hgetall(self.global_stats_key)
+            for date_str in dates:
+                pipe.hgetall(self.daily_stats_key.format(date=date_str))
+            global_data, *daily_results = await pipe.execute()
             
             total_up = int(global_data.get("total_thumbs_up", 0))
             total_down = int(global_data.get("total_thumbs_down", 0))
@@ -150,14 +165,7 @@ class SimpleFeedbackService:
             
             # Get daily breakdown
             daily_stats = {}
-            end_date = datetime.now()
-            
-            for i in range(days):
-                date = end_date - timedelta(days=i)
-                date_str = date.strftime("%Y-%m-%d")
-                daily_key = self.daily_stats_key.format(date=date_str)
-                
-                daily_data = await self.redis_client.hgetall(daily_key)
+            for date_str, daily_data in zip(dates, daily_results):
                 if daily_data:
                     daily_stats[date_str] = {
                         "up": int(daily_data.get("thumbs_up", 0)),
@@ -196,6 +204,37 @@ class SimpleFeedbackService:
             logger.error(f"Failed to get feedback stats: {e}")
             return FeedbackStats()
     
+    async def _scan_keys(self, pattern: str) -> List[str]:
+        """Collect keys matching pattern with SCAN instead of blocking KEYS."""
+        return [key async for key in self.redis_client.scan_iter(match=pattern, count=_SCAN_BATCH)]
+    
+    async def _load_feedback_records(self, days: Optional[int] = None) -> List[Dict]:
+        """Read feedback records in MGET batches, optionally only the last days."""
+        
+        feedback_pattern = self.feedback_key.format(feedback_id="*")
+        cutoff_date = datetime.now() - timedelta(days=days) if days else None
+        records = []
+        batch = []
+        
+        async def flush():
+            for feedback_data in await self.redis_client.mget(batch):
+                if not feedback_data:
+                    continue
+                feedback_record = json.loads(feedback_data)
+                if cutoff_date and datetime.fromisoformat(feedback_record['created_at']) < cutoff_date:
+                    continue
+                records.append(feedback_record)
+        
+        async for key in self.redis_client.scan_iter(match=feedback_pattern, count=_SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= _SCAN_BATCH:
+                await flush()
+                batch = []
+        if batch:
+            await flush()
+        
+        return records
+    
     async def get_response_feedback_count(self, response_id: str) -> Dict[str, int]:
         """Get feedback count for a specific response."""
         
@@ -206,10 +245,8 @@ class SimpleFeedbackService:
             up_count = 0
             down_count = 0
             
-            for feedback_id in feedback_ids:
-                feedback_key = self.feedback_key.format(feedback_id=feedback_id)
-                feedback_data = await self.redis_client.get(feedback_key)
-                
+            feedback_keys = [self.feedback_key.format(feedback_id=feedback_id) for feedback_id in feedback_ids]
+            for feedback_data in (await self.redis_client.mget(feedback_keys) if feedback_keys else []):
                 if feedback_data:
                     feedback_json = json.loads(feedback_data)
                     if feedback_json.get("feedback") == "up":
@@ -238,26 +275,9 @@ class SimpleFeedbackService:
                 stats = await self.get_all_time_stats()
             
             # Get all individual feedback records
-            all_feedback = []
+            all_feedback = await self._load_feedback_records(days)
             
-            feedback_pattern = self.feedback_key.format(feedback_id="*").replace("{feedback_id}", "*")
-            feedback_keys = await self.redis_client.keys(feedback_pattern)
-            
-            logger.info(f"Exporting {len(feedback_keys)} feedback records")
-            
-            for key in feedback_keys:
-                feedback_data = await self.redis_client.get(key)
-                if feedback_data:
-                    feedback_record = json.loads(feedback_data)
-                    
-                    # Filter by date if days is specified
-                    if days:
-                        feedback_date = datetime.fromisoformat(feedback_record['created_at'])
-                        cutoff_date = datetime.now() - timedelta(days=days)
-                        if feedback_date < cutoff_date:
-                            continue
-                    
-                    all_feedback.append(feedback_record)
+            logger.info(f"Exporting {len(all_feedback)} feedback records")
             
             # Sort by creation date
             all_feedback.sort(key=lambda x: x['created_at'])
@@ -287,24 +307,15 @@ class SimpleFeedbackService:
         try:
             logger.warning("ADMIN ACTION: Clearing ALL feedback data")
             
-            # Get all feedback keys
-            feedback_pattern = self.feedback_key.format(feedback_id="*").replace("{feedback_id}", "*")
-            feedback_keys = await self.redis_client.keys(feedback_pattern)
-            
-            # Get all response feedback keys
-            response_pattern = self.response_feedback_key.format(response_id="*").replace("{response_id}", "*")
-            response_keys = await self.redis_client.keys(response_pattern)
-            
-            # Get all daily stats keys
-            daily_pattern = self.daily_stats_key.format(date="*").replace("{date}", "*")
-            daily_keys = await self.redis_client.keys(daily_pattern)
-            
-            # Get all session feedback keys
-            session_pattern = self.session_feedback_key.format(session_id="*", response_id="*").replace("{session_id}", "*").replace("{response_id}", "*")
-            session_keys = await self.redis_client.keys(session_pattern)
-            
-            # Collect all keys to delete
-            all_keys = feedback_keys + response_keys + daily_keys + session_keys + [self.global_stats_key]
+            # Collect all feedback, response, stats and session feedback keys
+            all_keys = [self.global_stats_key, self.hourly_stats_key]
+            for pattern in (
+                self.feedback_key.format(feedback_id="*"),
+                self.response_feedback_key.format(response_id="*"),
+                self.daily_stats_key.format(date="*"),
+                self.session_feedback_key.format(session_id="*", response_id="*")
+            ):
+                all_keys.extend(await self._scan_keys(pattern))
             
             # Delete all keys
             if all_keys:
@@ -332,26 +343,9 @@ class SimpleFeedbackService:
                 stats = await self.get_all_time_stats()
             
             # Get all feedback records
-            all_feedback = []
+            all_feedback = await self._load_feedback_records(days)
             
-            feedback_pattern = self.feedback_key.format(feedback_id="*").replace("{feedback_id}", "*")
-            feedback_keys = await self.redis_client.keys(feedback_pattern)
-            
-            logger.info(f"Found {len(feedback_keys)} total feedback records")
-            
-            for key in feedback_keys:
-                feedback_data = await self.redis_client.get(key)
-                if feedback_data:
-                    feedback_record = json.loads(feedback_data)
-                    
-                    # Filter by date if days is specified
-                    if days:
-                        feedback_date = datetime.fromisoformat(feedback_record['created_at'])
-                        cutoff_date = datetime.now() - timedelta(days=days)
-                        if feedback_date < cutoff_date:
-                            continue
-                    
-                    all_feedback.append(feedback_record)
+            logger.info(f"Found {len(all_feedback)} feedback records")
             
             # Sort by creation date
             all_feedback.sort(key=lambda x: x['created_at'])
@@ -376,16 +370,19 @@ class SimpleFeedbackService:
         """Get complete statistics since data collection began."""
         
         try:
-            daily_pattern = self.daily_stats_key.format(date="*").replace("{date}", "*")
-            daily_keys = await self.redis_client.keys(daily_pattern)
+            daily_keys = await self._scan_keys(self.daily_stats_key.format(date="*"))
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in daily_keys:
+                pipe.hgetall(key)
+            daily_results = await pipe.execute() if daily_keys else []
             
             all_days_data = {}
             total_up = 0
             total_down = 0
             
-            for key in daily_keys:
+            for key, daily_data in zip(daily_keys, daily_results):
                 date_str = key.split(":")[-1]
-                daily_data = await self.redis_client.hgetall(key)
                 
                 if daily_data:
                     day_up = int(daily_data.get("thumbs_up", 0))
@@ -464,27 +461,48 @@ class SimpleFeedbackService:
         """Get feedback distribution by hour of day."""
         
         try:
-            hourly_counts = {}
-            
-            # Get all feedback records and analyze by hour
-            feedback_pattern = self.feedback_key.format(feedback_id="*").replace("{feedback_id}", "*")
-            feedback_keys = await self.redis_client.keys(feedback_pattern)
-            
-            for key in feedback_keys[:1000]:  # Limit to prevent performance issues
-                feedback_data = await self.redis_client.get(key)
-                if feedback_data:
-                    feedback_record = json.loads(feedback_data)
-                    created_at = datetime.fromisoformat(feedback_record['created_at'])
-                    hour = created_at.hour
-                    
-                    hourly_counts[str(hour)] = hourly_counts.get(str(hour), 0) + 1
+            await self._backfill_hourly_stats()
             
-            return hourly_counts
+            # Maintained at write time
+            hourly_data = await self.redis_client.hgetall(self.hourly_stats_key)
+            return {hour: int(count) for hour, count in hourly_data.items()}
             
         except Exception as e:
             logger.error(f"Failed to get hourly distribution: {e}")
             return {}
     
+    async def _backfill_hourly_stats(self):
+        """Rebuild the hourly counters once from all stored records, for feedback older than the counters.
+        
+        The hash is reset before the scan and the scanned counts are merged in with
+        HINCRBY, so feedback submitted while the backfill runs keeps its live count.
+        """
+        
+        if not await self.redis_client.set(self.hourly_backfill_key, "1", nx=True):
+            return
+        
+        try:
+            backfill_start = datetime.now()
+            await self.redis_client.delete(self.hourly_stats_key)
+            
+            hourly_counts = {}
+            for feedback_record in await self._load_feedback_records():
+                created_at = datetime.fromisoformat(feedback_record['created_at'])
+                if created_at >= backfill_start:
+                    continue  # Counted live by _update_stats
+                hour = str(created_at.hour)
+                hourly_counts[hour] = hourly_counts.get(hour, 0) + 1
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for hour, count in hourly_counts.items():
+                pipe.hincrby(self.hourly_stats_key, hour, count)
+            await pipe.execute()
+            logger.info(f"📊 Backfilled hourly feedback counters from {sum(hourly_counts.values())} records")
+            
+        except Exception:
+            await self.redis_client.delete(self.hourly_backfill_key)
+            raise
+    
     async def _get_response_time_correlation(self) -> Dict[str, float]:
         """Get correlation between response time and feedback."""
         
@@ -0,0 +1,171 @@
+"""
+Token counting for prompt budgeting.
+
+Uses the target model's Hugging Face tokenizer when it can be loaded and a
+conservative regex estimate otherwise. Counts are cached by text hash, so
+retrieved items that recur across requests are only tokenized once.
+
+Tokenizers for the default Mistral models ship in templates/tokenizers,
+converted from the SentencePiece models in mistral-common (Apache-2.0), so
+exact counts need no Hugging Face access at startup.
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.config import get_settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_BUNDLED_DIR = Path(__file__).parent.parent.parent / "templates" / "tokenizers"
+
+# Generation model name patterns -> bundled tokenizer file, first match wins
+_BUNDLED_TOKENIZERS = [
+    (re.compile(r"mistral.*7b.*v0[.:_]?[12]\b", re.IGNORECASE), "mistral-7b-v0.2.json"),
+    (re.compile(r"mistral.*7b.*v0[.:_]?3\b", re.IGNORECASE), "mistral-7b-v0.3.json"),
+    # Ollama's mistral / mistral:7b / mistral:latest tags are v0.3
+    (re.compile(r"^mistral(:(7b|latest|7b-instruct))?$", re.IGNORECASE), "mistral-7b-v0.3.json"),
+]
+
+# Word pieces and punctuation; sentencepiece/BPE vocabularies average ~1.3 tokens per piece
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_ESTIMATE_TOKENS_PER_PIECE = 1.3
+
+
+def active_generation_model() -> str:
+    """Model name of the configured default LLM provider."""
+    provider = settings.DEFAULT_LLM_PROVIDER
+    if provider in ("ollama", "mixtral"):
+        return settings.OLLAMA_MODEL
+    if provider == "openai":
+        return settings.OPENAI_MODEL
+    return settings.LLM_MODEL
+
+
+def resolve_tokenizer(name: str, model: str) -> str:
+    """Resolve CONTEXT_TOKENIZER; "auto" picks the bundled tokenizer of model ("" if none)."""
+    if name.strip().lower() != "auto":
+        return name
+    for pattern, filename in _BUNDLED_TOKENIZERS:
+        if pattern.search(model or ""):
+            return str(_BUNDLED_DIR / filename)
+    return ""
+
+
+class TokenCounter:
+    """Counts and truncates text in tokens of the generation model."""
+
+    def __init__(self, tokenizer_name: str, cache_size: int = 10000):
+        self.tokenizer_name = tokenizer_name
+        self.cache_size = cache_size
+        self._tokenizer = None
+        self._loaded = False
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> bool:
+        """Load the tokenizer (blocking; may download tokenizer.json once)."""
+        if self._loaded:
+            return self._tokenizer is not None
+        self._loaded = True
+
+        if not self.tokenizer_name:
+            logger.warning("⚠️ No tokenizer for the generation model, token budgets use estimated counts")
+            return False
+
+        try:
+            from tokenizers import Tokenizer
+
+            if Path(self.tokenizer_name).is_file():
+                self._tokenizer = Tokenizer.from_file(self.tokenizer_name)
+            else:
+                self._tokenizer = Tokenizer.from_pretrained(self.tokenizer_name)
+            logger.info(f"✅ Loaded tokenizer for context budgeting: {self.tokenizer_name}")
+            return True
+        except ImportError:
+            logger.error("❌ tokenizers not installed, token budgets use estimated counts")
+        except Exception as e:
+            logger.error(f"❌ Could not load tokenizer {self.tokenizer_name}: {e}, token budgets use estimated counts")
+        return False
+
+    @property
+    def is_exact(self) -> bool:
+        return self._tokenizer is not None
+
+    def _count_uncached(self, text: str) -> int:
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+        return math.ceil(len(_PIECE_RE.findall(text)) * _ESTIMATE_TOKENS_PER_PIECE)
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text (cached by content hash)."""
+        if not text:
+            return 0
+
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+
+        tokens = self._count_uncached(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tokens
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        """Cut text to at most max_tokens tokens (keeping the start, or the end if keep_end)."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+
+        if self._tokenizer is not None:
+            offsets = self._tokenizer.encode(text, add_special_tokens=False).offsets
+            if keep_end:
+                return text[offsets[-max_tokens][0]:].lstrip()
+            return text[:offsets[max_tokens - 1][1]].rstrip()
+
+        pieces = list(_PIECE_RE.finditer(text))
+        keep = max(1, int(max_tokens / _ESTIMATE_TOKENS_PER_PIECE))
+        if keep_end:
+            return text[pieces[-keep].start():].lstrip()
+        return text[:pieces[keep - 1].end()].rstrip()
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "tokenizer": self.tokenizer_name,
+            "exact": self.is_exact,
+            "cached_counts": len(self._cache),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# Global instance
+_token_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the token counter for the configured generation model."""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter(
+            tokenizer_name=resolve_tokenizer(settings.CONTEXT_TOKENIZER, active_generation_model()),
+            cache_size=settings.CONTEXT_TOKEN_CACHE_SIZE
+        )
+    return _token_counter
@@ -5,9 +5,11 @@ Maintains context even after 100+ messages by creating rolling summaries.
 """
 
 import asyncio
+import json
 import re
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 from dataclasses import dataclass
 
@@ -20,6 +22,14 @@ from app.utils.logger import get_logger
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Delete the lease only if this replica still holds it
+_RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 
 @dataclass
 class ConversationSummary:
@@ -43,11 +53,13 @@ class ConversationSummarizer:
         self.min_messages = settings.SUMMARY_MIN_MESSAGES
         self.max_summary_length = settings.SUMMARY_MAX_LENGTH
         self.summary_timeout = settings.SUMMARY_TIMEOUT
+        self.lock_seconds = max(settings.SUMMARY_LOCK_SECONDS, settings.SUMMARY_TIMEOUT + 5)
+        self.cache_size = settings.SUMMARY_CACHE_SIZE
         
-        # Cache summaries to avoid repeated DB reads
-        self.summaries = {}
+        # LRU cache of summaries to avoid repeated Redis reads
+        self.summaries: "OrderedDict[UUID, ConversationSummary]" = OrderedDict()
         
-        # Track ongoing summarizations to avoid duplicates
+        # Track ongoing summarizations in this process; the Redis lease covers other replicas
         self.pending_summaries = set()
         
         # Performance tracking
@@ -57,7 +69,9 @@ class ConversationSummarizer:
             "total_summary_requests": 0,
             "avg_summary_time": 0.0,
             "cache_hits": 0,
-            "cache_misses": 0
+            "cache_misses": 0,
+            "lease_contended": 0,
+            "already_current": 0
         }
     
     async def initialize(self):
@@ -70,22 +84,18 @@ class ConversationSummarizer:
             logger.error(f"Failed to initialize conversation summarizer: {e}")
             raise
     
-    async def get_or_create_summary(self, session_id: UUID) -> Optional[ConversationSummary]:
+    async def get_or_create_summary(self, session_id: UUID, refresh: bool = False) -> Optional[ConversationSummary]:
         """Get existing summary or return None if not yet available."""
         
         # Check cache first
-        if session_id in self.summaries:
+        if not refresh and session_id in self.summaries:
             self.stats["cache_hits"] += 1
+            self.summaries.move_to_end(session_id)
             return self.summaries[session_id]
         
         self.stats["cache_misses"] += 1
         
-        # Load from session metadata
-        session = await self.session_manager.get_session(session_id)
-        if not session:
-            return None
-        
-        summary_data = session.metadata.get("conversation_summary")
+        summary_data = await self._load_summary_data(session_id)
         if not summary_data:
             return None
         
@@ -100,13 +110,77 @@ class ConversationSummarizer:
             )
             
             # Cache it
-            self.summaries[session_id] = summary
+            self._cache_summary(session_id, summary)
             return summary
             
         except Exception as e:
             logger.error(f"Error loading summary for session {session_id}: {e}")
             return None
     
+    async def _load_summary_data(self, session_id: UUID) -> Optional[Dict[str, Any]]:
+        """Read the summary key, falling back to summaries stored in session metadata."""
+        redis_client = await self._get_redis()
+        
+        # Reading a summary keeps it alive as long as the session is in use
+        summary_json = await redis_client.getex(
+            self.session_manager._get_summary_key(session_id), ex=self._summary_ttl()
+        )
+        if summary_json:
+            return json.loads(summary_json)
+        
+        # Sessions summarized before summaries had their own key
+        session = await self.session_manager.get_session(session_id)
+        if not session:
+            return None
+        return session.metadata.get("conversation_summary")
+    
+    async def _save_summary(self, summary: ConversationSummary):
+        """Write the summary under its own key; the session blob is left untouched."""
+        redis_client = await self._get_redis()
+        summary_json = json.dumps({
+            "summary": summary.summary,
+            "key_topics": summary.key_topics,
+            "important_facts": summary.important_facts,
+            "last_updated_message_count": summary.last_updated_message_count,
+            "last_updated_at": summary.last_updated_at.isoformat()
+        })
+        await redis_client.set(
+            self.session_manager._get_summary_key(summary.session_id), summary_json, ex=self._summary_ttl()
+        )
+    
+    def _cache_summary(self, session_id: UUID, summary: ConversationSummary):
+        """Cache a summary, evicting the least recently used ones."""
+        self.summaries[session_id] = summary
+        self.summaries.move_to_end(session_id)
+        while len(self.summaries) > self.cache_size:
+            self.summaries.popitem(last=False)
+    
+    def _summary_ttl(self) -> int:
+        """Outlive the session so an idle session does not lose its summary first."""
+        return self.session_manager.session_timeout * 2
+    
+    async def _get_redis(self):
+        if not self.session_manager.is_connected:
+            await self.session_manager.initialize()
+        return self.session_manager.redis_client
+    
+    async def _acquire_lease(self, session_id: UUID) -> Optional[str]:
+        """Take the per-session summarization lease; returns its token, or None if held elsewhere."""
+        redis_client = await self._get_redis()
+        token = uuid4().hex
+        acquired = await redis_client.set(
+            f"summary_lock:{session_id}", token, nx=True, ex=self.lock_seconds
+        )
+        return token if acquired else None
+    
+    async def _release_lease(self, session_id: UUID, token: str):
+        try:
+            redis_client = await self._get_redis()
+            await redis_client.eval(_RELEASE_LEASE_SCRIPT, 1, f"summary_lock:{session_id}", token)
+        except Exception as e:
+            # The lease expires on its own
+            logger.warning(f"Failed to release summary lease for {session_id}: {e}")
+    
     async def should_update_summary(self, session_id: UUID, current_message_count: int) -> bool:
         """Check if summary needs updating."""
         
@@ -163,9 +237,15 @@ class ConversationSummarizer:
         
         import time
         start_time = time.perf_counter()
+        lease_token = None
         
         try:
-            self.stats["total_summary_requests"] += 1
+            # One replica summarizes a session at a time
+            lease_token = await self._acquire_lease(session_id)
+            if not lease_token:
+                self.stats["lease_contended"] += 1
+                logger.debug(f"Summary for {session_id} is being updated by another worker")
+                return None
             
             session = await self.session_manager.get_session(session_id)
             if not session:
@@ -180,8 +260,14 @@ class ConversationSummarizer:
                 logger.debug(f"Not enough messages ({current_count}) for summary")
                 return None
             
-            # Get existing summary
-            existing_summary = await self.get_or_create_summary(session_id)
+            # Get the latest summary; another worker may have just written it
+            existing_summary = await self.get_or_create_summary(session_id, refresh=True)
+            if existing_summary and current_count - existing_summary.last_updated_message_count < self.summary_threshold:
+                self.stats["already_current"] += 1
+                logger.debug(f"Summary for {session_id} is already current")
+                return existing_summary
+            
+            self.stats["total_summary_requests"] += 1
             
             # Get messages since last summary
             if existing_summary:
@@ -221,18 +307,11 @@ class ConversationSummarizer:
                 last_updated_at=datetime.now()
             )
             
-            # Save to session metadata
-            session.metadata["conversation_summary"] = {
-                "summary": new_summary.summary,
-                "key_topics": new_summary.key_topics,
-                "important_facts": new_summary.important_facts,
-                "last_updated_message_count": new_summary.last_updated_message_count,
-                "last_updated_at": new_summary.last_updated_at.isoformat()
-            }
-            await self.session_manager.update_session(session_id, session)
+            # Save under the summary key
+            await self._save_summary(new_summary)
             
             # Cache it
-            self.summaries[session_id] = new_summary
+            self._cache_summary(session_id, new_summary)
             
             # Update stats
             if existing_summary:
@@ -252,6 +331,9 @@ class ConversationSummarizer:
         except Exception as e:
             logger.error(f"Failed to update summary for session {session_id}: {e}")
             return None
+        finally:
+            if lease_token:
+                await self._release_lease(session_id, lease_token)
     
     def _format_messages_for_summary(self, messages) -> str:
         """Format messages for summarization."""
@@ -384,6 +466,7 @@ class ConversationSummarizer:
             "min_messages": self.min_messages,
             "max_summary_length": self.max_summary_length,
             "cached_summaries": len(self.summaries),
+            "summary_cache_size": self.cache_size,
             "pending_summaries": len(self.pending_summaries),
             "recent_messages_in_context": 2
         }
@@ -2,6 +2,7 @@
 Session management with Redis backend and Prometheus metrics integration.
 """
 
+import asyncio
 import json
 import time
 from datetime import datetime, timedelta
@@ -17,6 +18,36 @@ from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Keys fetched per SCAN step and pipelined read during maintenance sweeps
+_SCAN_BATCH = 500
+
+# Deletes indexed sessions still inactive at the cutoff, so a session touched
+# between the range read and the delete survives
+_SWEEP_INACTIVE_SCRIPT = """
+local removed = 0
+for i = 2, #ARGV do
+    local score = redis.call("zscore", KEYS[1], ARGV[i])
+    if score and tonumber(score) <= tonumber(ARGV[1]) then
+        redis.call("del", "session:" .. ARGV[i], "conversation_summary:" .. ARGV[i])
+        redis.call("zrem", KEYS[1], ARGV[i])
+        removed = removed + 1
+    end
+end
+if removed > 0 then
+    redis.call("hincrby", KEYS[2], "sessions_expired", removed)
+end
+return removed
+"""
+
+# Drops index entries whose session key has already expired by TTL, counting them
+_TRIM_EXPIRED_SCRIPT = """
+local removed = redis.call("zremrangebyscore", KEYS[1], "-inf", "(" .. ARGV[1])
+if removed > 0 then
+    redis.call("hincrby", KEYS[2], "sessions_expired", removed)
+end
+return removed
+"""
+
 
 class ChatMessage(BaseModel):
     """Individual chat message with fixed metadata handling."""
@@ -138,6 +169,10 @@ class SessionManager:
         self.session_cache = {}
         self.cache_max_size = 100
         self.cache_ttl = 300  # 5 minutes
+
+        # Periodic sweep of expired sessions
+        self.cleanup_interval = self.config.SESSION_CLEANUP_INTERVAL_MINUTES * 60
+        self._cleanup_task: Optional[asyncio.Task] = None
     
     async def initialize(self):
         """Initialize Redis connection and metrics."""
@@ -184,15 +219,18 @@ class SessionManager:
                 metadata={}
             )
             
-            # Store session in Redis using model_dump_json for proper serialization
+            # Store session, user list entry, activity index and counters in one round trip
             session_key = self._get_session_key(session_id)
             session_json = session_data.model_dump_json()
-            await self.redis_client.setex(session_key, self.session_timeout, session_json)
-            
-            # Add to user session list
             user_sessions_key = self._get_user_sessions_key(user_id)
-            await self.redis_client.lpush(user_sessions_key, str(session_id))
-            await self.redis_client.expire(user_sessions_key, self.session_timeout * 2)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(session_key, self.session_timeout, session_json)
+                pipe.lpush(user_sessions_key, str(session_id))
+                pipe.expire(user_sessions_key, self.session_timeout * 2)
+                pipe.zadd(self._get_activity_index_key(), {str(session_id): now.timestamp()})
+                pipe.hincrby(self._get_counters_key(), "sessions_created", 1)
+                self._trim_expired(pipe, now.timestamp())
+                await pipe.execute()
             
             # Cache the session locally
             self._cache_session(session_id, session_data)
@@ -216,14 +254,14 @@ class SessionManager:
             logger.error(f"Failed to create session: {e}")
             raise SessionError(f"Failed to create session: {str(e)}")
     
-    async def get_session(self, session_id: UUID) -> Optional[SessionData]:
+    async def get_session(self, session_id: UUID, use_cache: bool = True) -> Optional[SessionData]:
         """Get session by ID with caching and fixed validation."""
         if not self.is_connected:
             await self.initialize()
         
         try:
             # Check local cache first
-            cached_session = self._get_cached_session(session_id)
+            cached_session = self._get_cached_session(session_id) if use_cache else None
             if cached_session:
                 self.performance_stats["cache_hits"] += 1
                 return cached_session
@@ -285,11 +323,24 @@ class SessionManager:
             # Update in Redis using model_dump_json
             session_key = self._get_session_key(session_id)
             session_json = session_data.model_dump_json()
-            await self.redis_client.setex(session_key, self.session_timeout, session_json)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(session_key, self.session_timeout, session_json)
+                pipe.zadd(
+                    self._get_activity_index_key(),
+                    {str(session_id): session_data.last_activity_time.timestamp()}
+                )
+                self._trim_expired(pipe, now.timestamp())
+                await pipe.execute()
 
             # Update cache
             self._cache_session(session_id, session_data)
 
+            await self._publish_event(session_id, {
+                "type": "updated",
+                "last_activity": session_data.last_activity_time.isoformat(),
+                "message_count": session_data.message_count
+            })
+
             return True
 
         except Exception as e:
@@ -379,7 +430,13 @@ class SessionManager:
                 logger.warning(f"Error during session cleanup for {session_id}: {cleanup_error}")
             
             # Delete session from Redis
-            result = await self.redis_client.delete(session_key)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(session_key)
+                pipe.delete(self._get_summary_key(session_id))
+                pipe.zrem(self._get_activity_index_key(), str(session_id))
+                result, _, _ = await pipe.execute()
+            if result:
+                await self.redis_client.hincrby(self._get_counters_key(), "sessions_deleted", 1)
             
             # Remove from cache
             self._remove_from_cache(session_id)
@@ -387,6 +444,7 @@ class SessionManager:
             # Update performance stats
             if result:
                 self.performance_stats["total_sessions_deleted"] += 1
+                await self._publish_event(session_id, {"type": "deleted"})
             
             
             if result:
@@ -460,10 +518,34 @@ class SessionManager:
         """Get Redis key for session."""
         return f"session:{session_id}"
     
+    def _get_summary_key(self, session_id: UUID) -> str:
+        """Get Redis key for the session's conversation summary."""
+        return f"conversation_summary:{session_id}"
+    
+    def _get_events_channel(self, session_id: UUID) -> str:
+        """Get Redis pub/sub channel for session change events."""
+        return f"session_events:{session_id}"
+    
+    async def _publish_event(self, session_id: UUID, event: Dict[str, Any]):
+        """Notify websocket handlers on every replica that a session changed."""
+        try:
+            await self.redis_client.publish(self._get_events_channel(session_id), json.dumps(event))
+        except Exception as e:
+            # Handlers re-read the session before acting on a timeout, so a lost event only delays an update
+            logger.warning(f"Failed to publish event for session {session_id}: {e}")
+    
     def _get_user_sessions_key(self, user_id: str) -> str:
         """Get Redis key for user sessions list."""
         return f"user_sessions:{user_id}"
     
+    def _get_activity_index_key(self) -> str:
+        """Get Redis key for the sorted set of session IDs scored by last activity."""
+        return "session_activity"
+    
+    def _get_counters_key(self) -> str:
+        """Get Redis key for cluster-wide session counters."""
+        return "session_counters"
+    
     def _cache_session(self, session_id: UUID, session: SessionData):
         """Cache session locally."""
         try:
@@ -528,10 +610,12 @@ class SessionManager:
                 return {"error": "Redis not connected"}
         
         try:
-            # Count active sessions
-            pattern = self._get_session_key("*").replace(str(uuid4()), "*")
-            session_keys = await self.redis_client.keys(pattern)
-            active_sessions = len(session_keys)
+            # Count sessions active within the timeout from the activity index
+            cutoff = time.time() - self.session_timeout
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.zcount(self._get_activity_index_key(), f"({cutoff}", "+inf")
+                pipe.hgetall(self._get_counters_key())
+                active_sessions, counters = await pipe.execute()
 
             # Calculate cache hit rate
             total_requests = self.performance_stats["cache_hits"] + self.performance_stats["cache_misses"]
@@ -543,6 +627,7 @@ class SessionManager:
             return {
                 "active_sessions": active_sessions,
                 "redis_connected": True,
+                "cluster_counters": {name: int(value) for name, value in counters.items()},
                 "performance_stats": self.performance_stats.copy(),
                 "cache_stats": {
                     "hit_rate": cache_hit_rate,
@@ -580,136 +665,28 @@ class SessionManager:
             logger.error(f"Session manager health check failed: {e}")
             return False
     
-    async def cleanup_expired_sessions(self) -> int:
-        """Clean up expired sessions with better error handling."""
+    async def cleanup_expired_sessions(self, verify_all: bool = False) -> int:
+        """Clean up expired sessions from the activity index.
+
+        With verify_all, or when the index does not exist yet, every session
+        key is also walked with SCAN to drop corrupted sessions and index
+        sessions written before the index existed.
+        """
         if not self.is_connected:
             await self.initialize()
         
         try:
             cleanup_start = time.perf_counter()
-            cleaned_count = 0
+            index_key = self._get_activity_index_key()
 
-            # Get all session keys
-            pattern = "session:*"
-            session_keys = await self.redis_client.keys(pattern)
-            
-            logger.info(f"Starting cleanup of {len(session_keys)} session keys")
-            
-            for key in session_keys:
-                try:
-                    # Check if key still exists (might have expired)
-                    exists = await self.redis_client.exists(key)
-                    if not exists:
-                        cleaned_count += 1
-                        continue
-                    
-                    # Check if session is old and corrupted
-                    session_data = await self.redis_client.get(key)
-                    if session_data:
-                        try:
-                            session_dict = json.loads(session_data)
-                            
-                            # Try to validate the session structure
-                            if session_dict.get('metadata') is None:
-                                session_dict['metadata'] = {}
-                            
-                            # Fix messages metadata
-                            messages = session_dict.get('messages', [])
-                            for msg in messages:
-                                if isinstance(msg, dict) and msg.get('metadata') is None:
-                                    msg['metadata'] = {}
-                            
-                            # Test if we can create a valid SessionData
-                            SessionData.model_validate(session_dict)
-                            
-                            # Check if session is inactive based on last_activity_time
-                            last_activity_str = session_dict.get('last_activity_time')
-                            if last_activity_str:
-                                try:
-                                    last_activity = datetime.fromisoformat(last_activity_str.replace('Z', '+00:00'))
-                                    inactive_time = (datetime.now() - last_activity).total_seconds()
-
-                                    # Delete if inactive longer than session timeout
-                                    if inactive_time > self.session_timeout:
-                                        await self.redis_client.delete(key)
-                                        cleaned_count += 1
-
-                                        # Extract session_id and remove from cache
-                                        session_id_str = key.split(':')[-1]
-                                        try:
-                                            session_id = UUID(session_id_str)
-                                            self._remove_from_cache(session_id)
-                                        except ValueError:
-                                            pass
-                                except ValueError:
-                                    # Invalid timestamp, delete the session
-                                    await self.redis_client.delete(key)
-                                    cleaned_count += 1
-                            else:
-                                # No last_activity_time, fall back to updated_at
-                                updated_at_str = session_dict.get('updated_at')
-                                if updated_at_str:
-                                    try:
-                                        updated_at = datetime.fromisoformat(updated_at_str.replace('Z', '+00:00'))
-                                        age = (datetime.now() - updated_at).total_seconds()
-
-                                        # Delete if older than timeout
-                                        if age > self.session_timeout:
-                                            await self.redis_client.delete(key)
-                                            cleaned_count += 1
-
-                                            # Extract session_id and remove from cache
-                                            session_id_str = key.split(':')[-1]
-                                            try:
-                                                session_id = UUID(session_id_str)
-                                                self._remove_from_cache(session_id)
-                                            except ValueError:
-                                                pass
-                                    except ValueError:
-                                        # Invalid timestamp, delete the session
-                                        await self.redis_client.delete(key)
-                                        cleaned_count += 1
-                            
-                        except Exception as validation_error:
-                            # Session is corrupted, delete it
-                            logger.warning(f"Deleting corrupted session {key}: {validation_error}")
-                            await self.redis_client.delete(key)
-                            cleaned_count += 1
-                            
-                            # Remove from cache if present
-                            session_id_str = key.split(':')[-1]
-                            try:
-                                session_id = UUID(session_id_str)
-                                self._remove_from_cache(session_id)
-                            except ValueError:
-                                pass
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing session key {key}: {e}")
-                    continue
-            
-            # Clean up user session lists
-            user_pattern = self._get_user_sessions_key("*").replace("*", "*")
-            user_keys = await self.redis_client.keys(user_pattern)
-            
-            for user_key in user_keys:
-                try:
-                    # Remove expired session IDs from user lists
-                    session_ids = await self.redis_client.lrange(user_key, 0, -1)
-                    for session_id_str in session_ids:
-                        try:
-                            session_id = UUID(session_id_str)
-                            session_key = self._get_session_key(session_id)
-                            exists = await self.redis_client.exists(session_key)
-                            if not exists:
-                                await self.redis_client.lrem(user_key, 0, session_id_str)
-                        except (ValueError, TypeError):
-                            # Invalid UUID, remove it
-                            await self.redis_client.lrem(user_key, 0, session_id_str)
-                            
-                except Exception as e:
-                    logger.warning(f"Error cleaning user key {user_key}: {e}")
-                    continue
+            if not verify_all and not await self.redis_client.exists(index_key):
+                verify_all = True
+
+            cleaned_count = 0
+            if verify_all:
+                cleaned_count += await self._verify_session_keys()
+            cleaned_count += await self._sweep_inactive_sessions()
+            await self._cleanup_user_session_lists()
             
             # Clean local cache
             self._cleanup_local_cache()
@@ -731,6 +708,165 @@ class SessionManager:
             logger.error(f"Error during session cleanup: {e}")
             return 0
     
+    async def _sweep_inactive_sessions(self) -> int:
+        """Delete sessions whose last activity is older than the timeout (range query on the index)."""
+        index_key = self._get_activity_index_key()
+        cutoff = time.time() - self.session_timeout
+        removed = 0
+
+        while True:
+            session_ids = await self.redis_client.zrangebyscore(index_key, "-inf", cutoff, start=0, num=_SCAN_BATCH)
+            if not session_ids:
+                break
+
+            removed += await self.redis_client.eval(
+                _SWEEP_INACTIVE_SCRIPT, 2, index_key, self._get_counters_key(), cutoff, *session_ids
+            )
+            for session_id_str in session_ids:
+                self._remove_session_id_from_cache(session_id_str)
+
+            if len(session_ids) < _SCAN_BATCH:
+                break
+
+        return removed
+    
+    def _trim_expired(self, pipe, now_ts: float):
+        """Queue removal of index entries past the session timeout on a write pipeline."""
+        pipe.eval(
+            _TRIM_EXPIRED_SCRIPT, 2,
+            self._get_activity_index_key(), self._get_counters_key(),
+            now_ts - self.session_timeout
+        )
+
+    def start_cleanup_task(self):
+        """Start the periodic expired-session sweep (no-op when disabled or already running)."""
+        if self.cleanup_interval <= 0:
+            return
+        if self._cleanup_task is not None and not self._cleanup_task.done():
+            return
+        self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        logger.info(f"🧹 Session cleanup scheduled every {self.cleanup_interval}s")
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            await self.cleanup_expired_sessions()
+
+    async def stop_cleanup_task(self):
+        """Cancel the periodic sweep and wait for it to finish."""
+        task, self._cleanup_task = self._cleanup_task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _verify_session_keys(self) -> int:
+        """Walk session keys with SCAN, deleting corrupted ones and indexing the rest."""
+        index_key = self._get_activity_index_key()
+        deleted = 0
+        batch: List[str] = []
+
+        async def process(keys: List[str]) -> int:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(key)
+                values = await pipe.execute()
+
+            corrupted = []
+            activity = {}
+            for key, session_data in zip(keys, values):
+                if not session_data:
+                    continue  # Expired since the scan returned it
+                last_activity = self._parse_session_activity(key, session_data)
+                if last_activity is None:
+                    corrupted.append(key)
+                else:
+                    activity[key.split(':', 1)[-1]] = last_activity.timestamp()
+
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                if corrupted:
+                    pipe.delete(*corrupted)
+                if activity:
+                    # Never move a score back past a concurrent update; the sweep that follows drops expired ones
+                    pipe.zadd(index_key, activity, gt=True)
+                await pipe.execute()
+
+            for key in corrupted:
+                self._remove_session_id_from_cache(key.split(':', 1)[-1])
+            return len(corrupted)
+
+        async for key in self.redis_client.scan_iter(match="session:*", count=_SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= _SCAN_BATCH:
+                deleted += await process(batch)
+                batch = []
+        if batch:
+            deleted += await process(batch)
+
+        return deleted
+    
+    def _parse_session_activity(self, key: str, session_data: str) -> Optional[datetime]:
+        """Last activity of a stored session, or None if it is corrupted."""
+        try:
+            session_dict = json.loads(session_data)
+            
+            # Try to validate the session structure
+            if session_dict.get('metadata') is None:
+                session_dict['metadata'] = {}
+            
+            # Fix messages metadata
+            messages = session_dict.get('messages', [])
+            for msg in messages:
+                if isinstance(msg, dict) and msg.get('metadata') is None:
+                    msg['metadata'] = {}
+            
+            # Test if we can create a valid SessionData
+            SessionData.model_validate(session_dict)
+            
+            # Fall back to updated_at for sessions without last_activity_time
+            timestamp = session_dict.get('last_activity_time') or session_dict.get('updated_at')
+            if not timestamp:
+                return datetime.now()
+            return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            
+        except Exception as validation_error:
+            logger.warning(f"Deleting corrupted session {key}: {validation_error}")
+            return None
+    
+    async def _cleanup_user_session_lists(self):
+        """Remove IDs of sessions that no longer exist from user session lists."""
+        async for user_key in self.redis_client.scan_iter(match=self._get_user_sessions_key("*"), count=_SCAN_BATCH):
+            try:
+                session_ids = await self.redis_client.lrange(user_key, 0, -1)
+                if not session_ids:
+                    continue
+
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for session_id_str in session_ids:
+                        pipe.exists(self._get_session_key(session_id_str))
+                    exists = await pipe.execute()
+
+                stale = [session_id_str for session_id_str, found in zip(session_ids, exists) if not found]
+                if stale:
+                    async with self.redis_client.pipeline(transaction=False) as pipe:
+                        for session_id_str in stale:
+                            pipe.lrem(user_key, 0, session_id_str)
+                        await pipe.execute()
+                        
+            except Exception as e:
+                logger.warning(f"Error cleaning user key {user_key}: {e}")
+                continue
+    
+    def _remove_session_id_from_cache(self, session_id_str: str):
+        """Remove a session given as a string ID from local cache."""
+        try:
+            self._remove_from_cache(UUID(session_id_str))
+        except ValueError:
+            pass
+    
     def _cleanup_local_cache(self):
         """Clean up expired entries from local cache."""
         try:
@@ -751,7 +887,8 @@ class SessionManager:
             logger.warning(f"Error cleaning local cache: {e}")
     
     async def close(self):
-        """Close Redis connection."""
+        """Stop the cleanup sweep and close the Redis connection."""
+        await self.stop_cleanup_task()
         try:
             if self.redis_client:
                 await self.redis_client.close()
@@ -0,0 +1,140 @@
+"""
+Session change notifications over Redis pub/sub.
+
+SessionManager publishes to session_events:<id> whenever a session is
+updated or deleted. Each process keeps a single pub/sub connection and
+subscribes only to sessions with a websocket open locally, fanning events
+out to per-connection queues, so idle websockets cost no Redis traffic.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from uuid import UUID
+
+from app.services.memory.session import get_session_manager
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Delivered to every local subscriber when events may have been missed
+RESYNC_EVENT: Dict[str, Any] = {"type": "resync"}
+
+# Events queued per websocket before the oldest are dropped
+_QUEUE_SIZE = 32
+
+
+class SessionEventBus:
+    """Fans session events from one shared pub/sub connection out to local subscribers."""
+
+    def __init__(self):
+        self.session_manager = get_session_manager()
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._active: Optional[asyncio.Event] = None
+        self.stats = {"events_received": 0, "events_dropped": 0, "reconnects": 0}
+
+    async def _ensure_listener(self):
+        if self._listener is not None and not self._listener.done():
+            return
+        if not self.session_manager.is_connected:
+            await self.session_manager.initialize()
+        self._pubsub = self.session_manager.redis_client.pubsub()
+        self._listener = asyncio.create_task(self._listen())
+
+    @asynccontextmanager
+    async def subscribe(self, session_id: UUID) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving this session's events for as long as the context is open."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._active = asyncio.Event()
+
+        channel = self.session_manager._get_events_channel(session_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+
+        async with self._lock:
+            await self._ensure_listener()
+            queues = self._subscribers.setdefault(channel, set())
+            if not queues:
+                await self._pubsub.subscribe(channel)
+            queues.add(queue)
+            self._active.set()
+
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                queues = self._subscribers.get(channel, set())
+                queues.discard(queue)
+                if not queues:
+                    self._subscribers.pop(channel, None)
+                    try:
+                        await self._pubsub.unsubscribe(channel)
+                    except Exception as e:
+                        logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+                if not self._subscribers:
+                    self._active.clear()
+
+    async def _listen(self):
+        """Read the shared connection while any local websocket is subscribed."""
+        while True:
+            await self._active.wait()
+            try:
+                # Short timeout so an emptied subscription set is noticed
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read; anything published meanwhile is lost
+                logger.warning(f"⚠️ Session event connection error, resubscribing: {e}")
+                self.stats["reconnects"] += 1
+                await asyncio.sleep(1)
+                for channel in list(self._subscribers):
+                    self._dispatch(channel, RESYNC_EVENT)
+                continue
+
+            if message and message.get("type") == "message":
+                try:
+                    event = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+                self.stats["events_received"] += 1
+                self._dispatch(message["channel"], event)
+
+    def _dispatch(self, channel: str, event: Dict[str, Any]):
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                # A slow client only needs the latest state
+                queue.get_nowait()
+                self.stats["events_dropped"] += 1
+            queue.put_nowait(event)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "subscribed_sessions": len(self._subscribers),
+            "local_subscribers": sum(len(queues) for queues in self._subscribers.values())
+        }
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing session event connection: {e}")
+            self._pubsub = None
+
+
+# Global instance
+session_event_bus = SessionEventBus()
+
+
+def get_session_event_bus() -> SessionEventBus:
+    """Get the session event bus instance."""
+    return session_event_bus
@@ -0,0 +1,222 @@
+"""
+Vectorized BM25 scoring for reranking.
+
+Term statistics per Milvus collection are maintained by the Processor at
+ingest time (MongoDB bm25_corpus_stats / bm25_term_stats); only the
+document frequencies of query terms are fetched, and they are cached.
+"""
+
+import asyncio
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.config.database import get_mongodb_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Words of two or more characters; must stay in sync with Processor/storage/corpus_stats.py
+_TOKEN_RE = re.compile(r"\w\w+", re.UNICODE)
+
+# Punctuation that separates tokens in retrieved text
+_PUNCTUATION_TO_SPACE = str.maketrans({
+    char: " " for char in "!\"#$%&'()*+,-./:;<=>?@[\\]^`{|}~\t\n\r\u2018\u2019\u201c\u201d\u2013\u2014\u2026\u00ab\u00bb"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens, as counted by the Processor at ingest."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def stats_scope(result: Dict) -> Optional[str]:
+    """Statistics scope of a retrieved item, e.g. 'chunk:News' (None for graph items)."""
+    source = result.get("source")
+    collection = result.get("collection")
+    if source in ("chunk", "summary") and collection:
+        return f"{source}:{collection}"
+    return None
+
+
+def term_frequencies(texts: Sequence[str], query_terms: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Build the (documents x query terms) frequency matrix and document lengths.
+
+    texts must already be lowercased. Punctuation is mapped to spaces so that
+    whole-token matches become C-level substring counts of " term "; document
+    length is the whitespace word count, which is all BM25 length
+    normalisation needs.
+    """
+    tf = np.zeros((len(texts), len(query_terms)), dtype=np.float32)
+    doc_lengths = np.fromiter((text.count(" ") + 1 for text in texts), dtype=np.float32, count=len(texts))
+    if not query_terms:
+        return tf, doc_lengths
+
+    patterns = [f" {term} " for term in query_terms]
+    for row, text in enumerate(texts):
+        padded = f" {text.translate(_PUNCTUATION_TO_SPACE)} "
+        tf[row] = [padded.count(pattern) for pattern in patterns]
+    return tf, doc_lengths
+
+
+def idf(doc_count: float, document_frequency: np.ndarray) -> np.ndarray:
+    """BM25 inverse document frequency (non-negative variant)."""
+    return np.log1p((doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+def bm25_scores(
+    tf: np.ndarray,
+    doc_lengths: np.ndarray,
+    idf_matrix: np.ndarray,
+    k1: float = 1.2,
+    b: float = 0.75
+) -> np.ndarray:
+    """Score all documents at once; idf_matrix is per document row (documents x terms)."""
+    if tf.size == 0:
+        return np.zeros(tf.shape[0], dtype=np.float32)
+
+    avg_length = float(doc_lengths.mean()) or 1.0
+    norm = k1 * (1.0 - b + b * doc_lengths / avg_length)
+    saturated = tf * (k1 + 1.0) / (tf + norm[:, None])
+    return (idf_matrix * saturated).sum(axis=1)
+
+
+class CorpusStatsStore:
+    """Cached reader for the Processor's per-collection BM25 statistics."""
+
+    def __init__(self, database: str, refresh_seconds: int = 600, cache_size: int = 50000):
+        self.database = database
+        self.refresh_seconds = refresh_seconds
+        self.cache_size = cache_size
+        self._client = None
+        self._corpus = None
+        self._terms = None
+        self._retry_at = 0.0
+        self._doc_counts: Dict[str, Tuple[int, float]] = {}
+        self._document_frequencies: "OrderedDict[Tuple[str, str], Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> bool:
+        if self._client is not None:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+
+        try:
+            from pymongo import MongoClient
+
+            mongodb_config = get_mongodb_config()
+            self._client = MongoClient(
+                mongodb_config.connection_uri,
+                maxPoolSize=10,
+                serverSelectionTimeoutMS=mongodb_config.SERVER_SELECTION_TIMEOUT,
+                connectTimeoutMS=mongodb_config.CONNECT_TIMEOUT,
+            )
+            db = self._client[self.database or mongodb_config.DATABASE]
+            self._corpus = db["bm25_corpus_stats"]
+            self._terms = db["bm25_term_stats"]
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ BM25 statistics unavailable, using candidate-set IDF: {e}")
+            self._client = None
+            self._retry_at = time.monotonic() + self.refresh_seconds
+            return False
+
+    def _fetch(self, scopes: List[str], terms: List[str]) -> None:
+        """Load missing or stale doc counts and document frequencies in two queries."""
+        now = time.monotonic()
+        stale_scopes = [
+            scope for scope in scopes
+            if now - self._doc_counts.get(scope, (0, -math.inf))[1] > self.refresh_seconds
+        ]
+        missing_pairs = [
+            (scope, term) for scope in scopes for term in terms
+            if now - self._document_frequencies.get((scope, term), (0, -math.inf))[1] > self.refresh_seconds
+        ]
+        if not stale_scopes and not missing_pairs:
+            return
+        if not self._connect():
+            return
+
+        try:
+            if stale_scopes:
+                found = {doc["_id"]: doc.get("doc_count", 0)
+                         for doc in self._corpus.find({"_id": {"$in": stale_scopes}})}
+                for scope in stale_scopes:
+                    self._doc_counts[scope] = (found.get(scope, 0), now)
+
+            if missing_pairs:
+                missing_scopes = sorted({scope for scope, _ in missing_pairs})
+                missing_terms = sorted({term for _, term in missing_pairs})
+                found = {
+                    (doc["scope"], doc["term"]): doc.get("df", 0)
+                    for doc in self._terms.find(
+                        {"scope": {"$in": missing_scopes}, "term": {"$in": missing_terms}},
+                        {"_id": 0, "scope": 1, "term": 1, "df": 1}
+                    )
+                }
+                for pair in missing_pairs:
+                    self._document_frequencies[pair] = (found.get(pair, 0), now)
+                    self._document_frequencies.move_to_end(pair)
+                while len(self._document_frequencies) > self.cache_size:
+                    self._document_frequencies.popitem(last=False)
+        except Exception as e:
+            logger.warning(f"⚠️ BM25 statistics lookup failed: {e}")
+            self._client = None
+            self._retry_at = now + self.refresh_seconds
+
+    def get_idf(self, scopes: List[str], terms: List[str]) -> Dict[str, np.ndarray]:
+        """IDF vector over terms for every scope with statistics (blocking)."""
+        with self._lock:
+            self._fetch(scopes, terms)
+
+            idf_by_scope = {}
+            for scope in scopes:
+                doc_count = self._doc_counts.get(scope, (0, 0.0))[0]
+                if doc_count <= 0:
+                    continue
+                frequencies = np.array(
+                    [self._document_frequencies.get((scope, term), (0, 0.0))[0] for term in terms],
+                    dtype=np.float32
+                )
+                idf_by_scope[scope] = idf(doc_count, np.minimum(frequencies, doc_count))
+            return idf_by_scope
+
+    async def get_idf_async(self, scopes: List[str], terms: List[str], timeout: float) -> Dict[str, np.ndarray]:
+        """Non-blocking get_idf; returns {} if statistics cannot be read in time."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(None, self.get_idf, scopes, terms), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.debug("BM25 statistics lookup timed out, using candidate-set IDF")
+            return {}
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "scopes": len(self._doc_counts),
+            "cached_terms": len(self._document_frequencies)
+        }
+
+
+# Global instance
+_corpus_stats_store: Optional[CorpusStatsStore] = None
+
+
+def get_corpus_stats_store() -> CorpusStatsStore:
+    """Get the BM25 corpus statistics store."""
+    global _corpus_stats_store
+    if _corpus_stats_store is None:
+        _corpus_stats_store = CorpusStatsStore(
+            database=settings.RERANKER_BM25_STATS_DATABASE,
+            refresh_seconds=settings.RERANKER_BM25_STATS_REFRESH_SECONDS
+        )
+    return _corpus_stats_store
@@ -487,15 +487,20 @@ class CleanRAGService:
         
         preprocessor = await get_llm_query_preprocessor()
         
-        # Only get context for CONTINUE conversations
-        conversation_context = None
+        # Only get context for CONTINUE conversations, and only once pattern
+        # matching has failed so greetings and identity questions skip the lookup
+        context_loader = None
         if session_id and conversation_type == "continue":
-            conversation_context = await self._get_conversation_context(session_id)
-            logger.debug(f"📝 Loaded conversation context for continue conversation")
+            async def context_loader():
+                conversation_context = await self._get_conversation_context(session_id)
+                logger.debug(f"📝 Loaded conversation context for continue conversation")
+                return conversation_context
         elif conversation_type == "start":
             logger.debug(f"🆕 Start conversation - no context loaded")
         
-        analysis = await preprocessor.analyze_query(question, conversation_context, language)
+        analysis = await preprocessor.analyze_query(
+            question, user_language=language, context_loader=context_loader
+        )
         return analysis
     
     async def _generate_sources(self, reference_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -4,15 +4,16 @@ Enhanced LLM Query Preprocessor with exact/fuzzy matching before LLM analysis
 
 import json
 import re
-from typing import Dict, Optional, List
+from typing import Awaitable, Callable, Dict, Optional, List
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from difflib import SequenceMatcher
 
 from app.config import get_settings
 from app.services.llm.factory import get_llm
 from app.services.prompts.manager import get_prompt_manager
+from app.services.rag.intent_index import IntentIndex, iter_patterns
+from app.services.rag.query_classifier import get_query_classifier
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -59,6 +60,13 @@ class CleanLLMQueryPreprocessor:
         self.bot_identity_data = None
         self.conversational_data = None
         
+        # Pattern indexes compiled from the JSON data
+        self.bot_identity_index = IntentIndex({})
+        self.conversational_index = IntentIndex({})
+        
+        # Local classifier consulted before LLM analysis and rewrites
+        self.query_classifier = get_query_classifier()
+        
         # Statistics
         self.stats = {
             "total_queries": 0,
@@ -73,7 +81,9 @@ class CleanLLMQueryPreprocessor:
             "start_basic_fixes": 0,
             "continue_full_processing": 0,
             "llm_generated_conversational": 0,
-            "llm_generated_bot_identity": 0
+            "llm_generated_bot_identity": 0,
+            "classifier_analyses": 0,
+            "skipped_rewrites": 0
         }
     
     async def initialize(self):
@@ -85,6 +95,13 @@ class CleanLLMQueryPreprocessor:
             # Load JSON data
             self._load_json_data()
             
+            # Train the local classifier from logged outcomes, seeded with the JSON patterns
+            self.query_classifier.set_seed_patterns(
+                [(pattern, QueryCategory.BOT_IDENTITY.value) for _, pattern, _ in iter_patterns(self.bot_identity_data)] +
+                [(pattern, QueryCategory.CONVERSATIONAL.value) for _, pattern, _ in iter_patterns(self.conversational_data)]
+            )
+            await self.query_classifier.initialize()
+            
             self.is_initialized = True
             logger.info("✅ Clean LLM Query Preprocessor initialized with JSON matching")
         except Exception as e:
@@ -116,76 +133,84 @@ class CleanLLMQueryPreprocessor:
             logger.error(f"Error loading JSON data: {e}")
             self.bot_identity_data = {}
             self.conversational_data = {}
+        
+        self.bot_identity_index = IntentIndex(self.bot_identity_data)
+        self.conversational_index = IntentIndex(self.conversational_data)
+        logger.info(
+            f"✅ Compiled intent pattern indexes ({len(self.bot_identity_index)} bot identity, "
+            f"{len(self.conversational_index)} conversational patterns)"
+        )
     
-    def _calculate_similarity(self, str1: str, str2: str) -> float:
-        """Calculate similarity between two strings using SequenceMatcher."""
-        return SequenceMatcher(None, str1.lower().strip(), str2.lower().strip()).ratio()
-    
-    def _find_exact_or_fuzzy_match(self, query: str, json_data: Dict, threshold: float = 0.8) -> Optional[tuple]:
+    def match_json_intent(self, query: str, threshold: float = 0.8) -> Optional[LLMQueryAnalysis]:
         """
-        Find exact or fuzzy match in JSON data.
-        Returns: (matched_pattern, response, similarity_score) or None
+        Match the query against the bot identity, then conversational patterns.
+        Exact matches are a hash lookup; fuzzy matches use the precompiled index.
         """
-        if not json_data:
-            return None
         
-        query_lower = query.lower().strip()
-        best_match = None
-        best_score = 0.0
+        bot_match = self.bot_identity_index.lookup(query, threshold=threshold)
+        if bot_match:
+            if bot_match.similarity == 1.0:
+                self.stats["exact_json_matches"] += 1
+                logger.info(f"✅ Exact match found in bot_identity.json: '{bot_match.pattern}'")
+            else:
+                self.stats["fuzzy_json_matches"] += 1
+                logger.info(f"✅ Fuzzy match found in bot_identity.json: '{bot_match.pattern}' (similarity: {bot_match.similarity:.2f})")
+            
+            self.stats["bot_identity_queries"] += 1
+            
+            return LLMQueryAnalysis(
+                original_query=query,
+                category=QueryCategory.BOT_IDENTITY,
+                confidence=bot_match.similarity,
+                should_retrieve=False,
+                suggested_response=bot_match.response,
+                enhanced_query=None,
+                reasoning=f"Matched in bot_identity.json with {bot_match.similarity:.2%} similarity",
+                language_detected="en",
+                bot_identity_type="matched_from_json",
+                matched_from_json=True
+            )
         
-        # Check all categories in JSON
-        for category_name, category_data in json_data.items():
-            # Handle nested structure (e.g., conversational_samples -> greetings -> samples)
-            if isinstance(category_data, dict):
-                # Check if this is a top-level category container (like "conversational_samples")
-                if "samples" in category_data:
-                    # Direct samples in category
-                    samples = category_data["samples"]
-                else:
-                    # Nested categories (like greetings, farewells inside conversational_samples)
-                    for subcategory_name, subcategory_data in category_data.items():
-                        if isinstance(subcategory_data, dict) and "samples" in subcategory_data:
-                            samples = subcategory_data["samples"]
-                            
-                            for sample in samples:
-                                if isinstance(sample, dict):
-                                    # Get patterns and response
-                                    patterns = sample.get("patterns", [])
-                                    response = sample.get("response", "")
-                                    
-                                    # Check each pattern
-                                    for pattern in patterns:
-                                        if isinstance(pattern, str):
-                                            pattern_lower = pattern.lower().strip()
-                                            
-                                            # Exact match (highest priority)
-                                            if pattern_lower == query_lower:
-                                                logger.debug(f"✅ Exact match: '{pattern}' == '{query}'")
-                                                return (pattern, response, 1.0)
-                                            
-                                            # Fuzzy match
-                                            similarity = self._calculate_similarity(query, pattern)
-                                            if similarity >= threshold and similarity > best_score:
-                                                best_score = similarity
-                                                best_match = (pattern, response, similarity)
-                                                logger.debug(f"🔍 Fuzzy match candidate: '{pattern}' ~ '{query}' (score: {similarity:.2f})")
-        
-        if best_match:
-            logger.debug(f"✅ Best fuzzy match: '{best_match[0]}' (score: {best_match[2]:.2f})")
-        
-        return best_match if best_score >= threshold else None
+        conv_match = self.conversational_index.lookup(query, threshold=threshold)
+        if conv_match:
+            if conv_match.similarity == 1.0:
+                self.stats["exact_json_matches"] += 1
+                logger.info(f"✅ Exact match found in conversational.json: '{conv_match.pattern}'")
+            else:
+                self.stats["fuzzy_json_matches"] += 1
+                logger.info(f"✅ Fuzzy match found in conversational.json: '{conv_match.pattern}' (similarity: {conv_match.similarity:.2f})")
+            
+            self.stats["conversational_queries"] += 1
+            
+            return LLMQueryAnalysis(
+                original_query=query,
+                category=QueryCategory.CONVERSATIONAL,
+                confidence=conv_match.similarity,
+                should_retrieve=False,
+                suggested_response=conv_match.response,
+                enhanced_query=None,
+                reasoning=f"Matched in conversational.json with {conv_match.similarity:.2%} similarity",
+                language_detected="en",
+                matched_from_json=True
+            )
+        
+        return None
     
     async def analyze_query(
         self, 
         query: str, 
         conversation_context: Optional[str] = None,
-        user_language: str = "en"
+        user_language: str = "en",
+        context_loader: Optional[Callable[[], Awaitable[Optional[str]]]] = None
     ) -> LLMQueryAnalysis:
         """
         Analyze query with new flow:
         1. Check exact/fuzzy match in bot_identity_responses.json (>80%)
         2. Check exact/fuzzy match in conversational_samples.json (>80%)
         3. If no match, use LLM analysis
+        
+        context_loader, if given, is awaited for the conversation context only
+        when the query reaches LLM analysis.
         """
         
         if not self.is_initialized:
@@ -194,72 +219,32 @@ class CleanLLMQueryPreprocessor:
         self.stats["total_queries"] += 1
         
         try:
-            # STEP 1: Check bot identity JSON for exact/fuzzy match
-            bot_match = self._find_exact_or_fuzzy_match(query, self.bot_identity_data, threshold=0.8)
-            
-            if bot_match:
-                matched_query, response, similarity = bot_match
-                
-                if similarity == 1.0:
-                    self.stats["exact_json_matches"] += 1
-                    logger.info(f"✅ Exact match found in bot_identity.json: '{matched_query}'")
-                else:
-                    self.stats["fuzzy_json_matches"] += 1
-                    logger.info(f"✅ Fuzzy match found in bot_identity.json: '{matched_query}' (similarity: {similarity:.2f})")
-                
-                self.stats["bot_identity_queries"] += 1
+            # STEP 1-2: Bot identity and conversational patterns
+            json_analysis = self.match_json_intent(query)
+            if json_analysis:
+                return json_analysis
+            
+            # STEP 3: Local classifier when it is confident
+            in_conversation = conversation_context is not None or context_loader is not None
+            analysis = self._classify_locally(query, in_conversation)
+            
+            if conversation_context is None and context_loader is not None and (
+                analysis is None or not analysis.should_retrieve
+            ):
+                conversation_context = await context_loader()
+            
+            # STEP 4: No JSON match or confident prediction - Use LLM analysis
+            if analysis is None:
+                logger.info(f"🔍 No JSON match found for '{query}' - using LLM analysis")
+                self.stats["llm_analysis_calls"] += 1
                 
-                return LLMQueryAnalysis(
-                    original_query=query,
-                    category=QueryCategory.BOT_IDENTITY,
-                    confidence=similarity,
-                    should_retrieve=False,
-                    suggested_response=response,
-                    enhanced_query=None,
-                    reasoning=f"Matched in bot_identity.json with {similarity:.2%} similarity",
-                    language_detected="en",
-                    bot_identity_type="matched_from_json",
-                    matched_from_json=True
+                analysis_prompt = self._create_enhanced_analysis_prompt(
+                    query=query,
+                    conversation_context=conversation_context
                 )
-            
-            # STEP 2: Check conversational JSON for exact/fuzzy match
-            conv_match = self._find_exact_or_fuzzy_match(query, self.conversational_data, threshold=0.8)
-            
-            if conv_match:
-                matched_query, response, similarity = conv_match
-                
-                if similarity == 1.0:
-                    self.stats["exact_json_matches"] += 1
-                    logger.info(f"✅ Exact match found in conversational.json: '{matched_query}'")
-                else:
-                    self.stats["fuzzy_json_matches"] += 1
-                    logger.info(f"✅ Fuzzy match found in conversational.json: '{matched_query}' (similarity: {similarity:.2f})")
                 
-                self.stats["conversational_queries"] += 1
-                
-                return LLMQueryAnalysis(
-                    original_query=query,
-                    category=QueryCategory.CONVERSATIONAL,
-                    confidence=similarity,
-                    should_retrieve=False,
-                    suggested_response=response,
-                    enhanced_query=None,
-                    reasoning=f"Matched in conversational.json with {similarity:.2%} similarity",
-                    language_detected="en",
-                    matched_from_json=True
-                )
-            
-            # STEP 3: No JSON match found - Use LLM analysis
-            logger.info(f"🔍 No JSON match found for '{query}' - using LLM analysis")
-            self.stats["llm_analysis_calls"] += 1
-            
-            analysis_prompt = self._create_enhanced_analysis_prompt(
-                query=query,
-                conversation_context=conversation_context
-            )
-            
-            llm_response = await self._call_llm(analysis_prompt)
-            analysis = self._parse_llm_analysis(llm_response, query, conversation_context)
+                llm_response = await self._call_llm(analysis_prompt)
+                analysis = self._parse_llm_analysis(llm_response, query, conversation_context)
             
             # If LLM says conversational, generate response using LLM
             if analysis.category == QueryCategory.CONVERSATIONAL:
@@ -299,6 +284,29 @@ class CleanLLMQueryPreprocessor:
             logger.error(f"Error in query analysis: {e}")
             return self._create_fallback_analysis(query)
     
+    def _classify_locally(self, query: str, in_conversation: bool) -> Optional[LLMQueryAnalysis]:
+        """Analysis from the local classifier, or None if the LLM should decide."""
+        prediction = self.query_classifier.predict_category(query, in_conversation)
+        if not prediction:
+            return None
+        
+        category_name, confidence = prediction
+        category = self._parse_category(category_name)
+        self.stats["classifier_analyses"] += 1
+        logger.info(f"🧠 Local classifier: '{query}' -> {category.value} ({confidence:.2f})")
+        
+        return LLMQueryAnalysis(
+            original_query=query,
+            category=category,
+            confidence=confidence,
+            should_retrieve=category not in (QueryCategory.CONVERSATIONAL, QueryCategory.BOT_IDENTITY),
+            suggested_response=None,
+            enhanced_query=None,
+            reasoning=f"Local classifier with {confidence:.2%} confidence",
+            language_detected="en",
+            matched_from_json=False
+        )
+    
     def _create_enhanced_analysis_prompt(
         self, query: str, conversation_context: Optional[str]
     ) -> str:
@@ -341,6 +349,9 @@ class CleanLLMQueryPreprocessor:
                 elif category in [QueryCategory.CLIMATE_QUESTION, QueryCategory.GENERAL_QUESTION, QueryCategory.UNCLEAR]:
                     should_retrieve = True
                 
+                # Learn from the LLM's decision
+                self.query_classifier.record_category(original_query, category.value)
+                
                 return LLMQueryAnalysis(
                     original_query=original_query,
                     category=category,
@@ -514,6 +525,11 @@ class CleanLLMQueryPreprocessor:
         if not self.is_initialized:
             await self.initialize()
         
+        if self.query_classifier.is_well_formed(query, "start"):
+            self.stats["skipped_rewrites"] += 1
+            logger.debug(f"Start query predicted well-formed, skipping LLM fixes: {query}")
+            return query
+        
         try:
             self.stats["start_basic_fixes"] += 1
             
@@ -525,6 +541,7 @@ class CleanLLMQueryPreprocessor:
             
             enhanced_query = await self._call_llm(prompt)
             processed_query = enhanced_query.strip().strip('"\'')
+            self.query_classifier.record_rewrite(query, "start", processed_query != query)
             
             if processed_query == query:
                 logger.debug(f"Start query needs no fixes: {query}")
@@ -545,6 +562,11 @@ class CleanLLMQueryPreprocessor:
         if not self.is_initialized:
             await self.initialize()
         
+        if self.query_classifier.is_well_formed(query, "continue"):
+            self.stats["skipped_rewrites"] += 1
+            logger.debug(f"Continue query predicted self-contained, skipping LLM processing: {query}")
+            return query
+        
         try:
             self.stats["continue_full_processing"] += 1
             
@@ -556,6 +578,7 @@ class CleanLLMQueryPreprocessor:
             
             enhanced_query = await self._call_llm(prompt)
             processed_query = enhanced_query.strip().strip('"\'')
+            self.query_classifier.record_rewrite(query, "continue", processed_query != query)
             
             logger.debug(f"Continue query processed: '{query}' -> '{processed_query}'")
             return processed_query
@@ -578,6 +601,8 @@ class CleanLLMQueryPreprocessor:
             "general_question_rate": self.stats["general_questions"] / total if total > 0 else 0,
             "llm_generated_conversational_rate": self.stats["llm_generated_conversational"] / total if total > 0 else 0,
             "llm_generated_bot_identity_rate": self.stats["llm_generated_bot_identity"] / total if total > 0 else 0,
+            "classifier_analysis_rate": self.stats["classifier_analyses"] / total if total > 0 else 0,
+            "query_classifier": self.query_classifier.get_stats(),
             "processing_language": "english_only",
             "json_matching_enabled": True
         }
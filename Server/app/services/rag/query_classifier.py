@@ -0,0 +1,473 @@
+"""
+Local query classifier for pre-retrieval routing.
+
+A hashed-feature multinomial Naive Bayes model trained on CPU from the
+outcomes of earlier LLM query analyses and rewrites (MongoDB collection
+query_outcomes, shared by all replicas) plus the canned bot identity and
+conversational patterns. It predicts the query category and whether the
+LLM rewrite would leave a query unchanged. A label is only trusted when
+held-out outcomes show its confident predictions are precise enough;
+everything else still goes to the LLM.
+
+Disabled by default: logging outcomes stores raw user queries, which the
+TTL index keeps for QUERY_CLASSIFIER_RETENTION_DAYS.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.config.database import get_mongodb_config
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_N_FEATURES = 1 << 17
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Words that need the conversation to resolve; continue turns containing them always go to the LLM
+_REFERRING_RE = re.compile(
+    r"\b(it|its|they|them|their|this|that|these|those|he|she|him|her|there|then|"
+    r"former|latter|same|above|previous|earlier|else|more|also)\b",
+    re.IGNORECASE
+)
+
+# Outcomes buffered in memory before one insert_many
+_FLUSH_SIZE = 20
+
+# Confident held-out predictions a label needs before it is trusted
+_MIN_TRUST_SUPPORT = 10
+
+# Share of a query's words the category model must have seen in training;
+# Naive Bayes is confidently wrong on queries unlike anything it has seen
+_MIN_KNOWN_WORDS = 0.75
+
+
+def _words(text: str) -> List[str]:
+    return [token for token in _WORD_RE.findall((text or "").lower()) if token[0].isalnum()]
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % _N_FEATURES
+
+
+def features(text: str) -> np.ndarray:
+    """Hashed word, word-bigram and character-trigram features."""
+    tokens = _WORD_RE.findall((text or "").lower())
+    names = [f"w:{token}" for token in tokens]
+    names.extend(f"b:{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    for token in tokens:
+        padded = f"<{token}>"
+        names.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return np.fromiter((_hash(name) for name in names), dtype=np.int64, count=len(names))
+
+
+def surface_features(text: str, vocabulary: Set[str]) -> np.ndarray:
+    """Cues for whether a grammar/spelling rewrite would change the query."""
+    stripped = (text or "").strip()
+    words = _words(stripped)
+    unknown = sum(word not in vocabulary for word in words if not word.isdigit())
+    return np.array([
+        1.0,
+        unknown / max(len(words), 1),
+        float(unknown > 0),
+        float(bool(stripped) and stripped[0].isupper()),
+        float(stripped.endswith(("?", ".", "!"))),
+        float(stripped == stripped.lower()),
+        float("  " in stripped),
+        float(bool(re.search(r"(\w)\1\1", stripped))),
+        float(bool(re.search(r"[,.;:?!][^\s\d\"')]", stripped))),
+        float(bool(re.search(r"\b(\w+) \1\b", stripped.lower()))),
+        float(bool(re.search(r"\bi\b", stripped))),
+        min(len(words), 30) / 30.0,
+    ], dtype=np.float64)
+
+
+class NaiveBayesModel:
+    """Multinomial Naive Bayes over hashed n-gram features (query categories)."""
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.labels: List[str] = []
+        self._vocabulary: Set[str] = set()
+        self._log_prior = None
+        self._log_likelihood = None
+
+    def fit(self, examples: Sequence[Tuple[str, str]]) -> "NaiveBayesModel":
+        self.labels = sorted({label for _, label in examples})
+        ids_by_label = defaultdict(list)
+        for text, label in examples:
+            ids_by_label[label].append(features(text))
+            self._vocabulary.update(_words(text))
+
+        counts = np.full((len(self.labels), _N_FEATURES), self.alpha, dtype=np.float32)
+        priors = np.zeros(len(self.labels), dtype=np.float64)
+        for row, label in enumerate(self.labels):
+            ids = ids_by_label[label]
+            counts[row] += np.bincount(np.concatenate(ids), minlength=_N_FEATURES)
+            priors[row] = len(ids)
+
+        self._log_likelihood = np.log(counts / counts.sum(axis=1, keepdims=True)).astype(np.float32)
+        self._log_prior = np.log(priors / priors.sum())
+        return self
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Most likely label and its posterior probability (0 for mostly unseen words)."""
+        words = _words(text)
+        if not words or sum(word in self._vocabulary for word in words) < _MIN_KNOWN_WORDS * len(words):
+            return self.labels[0], 0.0
+
+        scores = self._log_prior + self._log_likelihood[:, features(text)].sum(axis=1)
+        scores = np.exp(scores - scores.max())
+        posterior = scores / scores.sum()
+        best = int(posterior.argmax())
+        return self.labels[best], float(posterior[best])
+
+
+class RewriteModel:
+    """Logistic regression predicting whether the LLM rewrite leaves a query unchanged."""
+
+    def __init__(self, l2: float = 1e-3, iterations: int = 500, learning_rate: float = 0.5):
+        self.l2 = l2
+        self.iterations = iterations
+        self.learning_rate = learning_rate
+        self._vocabulary: Set[str] = set()
+        self._weights = None
+
+    def fit(self, examples: Sequence[Tuple[str, str]]) -> "RewriteModel":
+        # Words the LLM left alone are taken as correctly spelled
+        self._vocabulary = {
+            word for text, label in examples if label == "unchanged" for word in _words(text)
+        }
+        x = np.stack([surface_features(text, self._vocabulary) for text, _ in examples])
+        y = np.array([label == "unchanged" for _, label in examples], dtype=np.float64)
+
+        weights = np.zeros(x.shape[1])
+        for _ in range(self.iterations):
+            predictions = 1.0 / (1.0 + np.exp(-(x @ weights)))
+            gradient = x.T @ (predictions - y) / len(y) + self.l2 * weights
+            weights -= self.learning_rate * gradient
+        self._weights = weights
+        return self
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        probability = 1.0 / (1.0 + np.exp(-(surface_features(text, self._vocabulary) @ self._weights)))
+        if probability >= 0.5:
+            return "unchanged", float(probability)
+        return "rewritten", float(1.0 - probability)
+
+
+class _GatedModel:
+    """A model plus the labels whose confident predictions held up on held-out data."""
+
+    def __init__(self, model, trusted: Dict[str, float]):
+        self.model = model
+        self.trusted = trusted
+
+
+def _train_gated(
+    model_factory: Callable,
+    logged: List[Tuple[str, str]],
+    seeds: List[Tuple[str, str]],
+    min_confidence: float,
+    min_precision: float
+) -> Optional[_GatedModel]:
+    """Fit on 80% of the logged outcomes, pick trusted labels on the rest, refit on everything."""
+    if len({label for _, label in logged + seeds}) < 2:
+        return None
+
+    shuffled = list(logged)
+    random.Random(0).shuffle(shuffled)
+    split = int(len(shuffled) * 0.8)
+    train, holdout = shuffled[:split], shuffled[split:]
+    if len({label for _, label in train + seeds}) < 2:
+        return None
+
+    model = model_factory().fit(train + seeds)
+    confident = defaultdict(lambda: [0, 0])
+    for text, label in holdout:
+        predicted, confidence = model.predict(text)
+        if confidence >= min_confidence:
+            confident[predicted][0] += 1
+            confident[predicted][1] += predicted == label
+
+    trusted = {
+        label: correct / total
+        for label, (total, correct) in confident.items()
+        if total >= _MIN_TRUST_SUPPORT and correct / total >= min_precision
+    }
+    if not trusted:
+        return None
+    return _GatedModel(model_factory().fit(logged + seeds), trusted)
+
+
+class QueryClassifier:
+    """Routes queries locally when a trusted model is confident, and logs LLM outcomes to learn from."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_confidence: float = 0.9,
+        min_precision: float = 0.95,
+        min_examples: int = 300,
+        max_examples: int = 20000,
+        retrain_every: int = 200,
+        retention_days: int = 90
+    ):
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.min_precision = min_precision
+        self.min_examples = min_examples
+        self.max_examples = max_examples
+        self.retrain_every = retrain_every
+        self.retention_days = retention_days
+
+        self._collection = None
+        self._retry_at: Optional[datetime] = None
+        self._seeds: List[Tuple[str, str]] = []
+        self._category_model: Optional[_GatedModel] = None
+        self._rewrite_models: Dict[str, _GatedModel] = {}
+        self._buffer: List[Dict] = []
+        self._since_training = 0
+        self._training = False
+        self._lock = threading.Lock()
+        self.stats = {
+            "trainings": 0,
+            "training_examples": 0,
+            "outcomes_logged": 0,
+            "category_predictions": 0,
+            "rewrites_skipped": 0
+        }
+
+    def _get_collection(self):
+        if self._collection is not None:
+            return self._collection
+        if self._retry_at and datetime.utcnow() < self._retry_at:
+            return None
+
+        try:
+            from pymongo import ASCENDING, MongoClient
+
+            mongodb_config = get_mongodb_config()
+            client = MongoClient(
+                mongodb_config.connection_uri,
+                maxPoolSize=5,
+                serverSelectionTimeoutMS=mongodb_config.SERVER_SELECTION_TIMEOUT,
+                connectTimeoutMS=mongodb_config.CONNECT_TIMEOUT,
+            )
+            collection = client[mongodb_config.DATABASE]["query_outcomes"]
+            collection.create_index(
+                [("created_at", ASCENDING)], expireAfterSeconds=self.retention_days * 86400
+            )
+            self._collection = collection
+            return collection
+        except Exception as e:
+            logger.warning(f"⚠️ Query outcome store unavailable, classifier stays untrained: {e}")
+            self._retry_at = datetime.utcnow() + timedelta(minutes=10)
+            return None
+
+    def set_seed_patterns(self, patterns: Iterable[Tuple[str, str]]):
+        """Use canned (pattern, category) pairs as always-present training examples."""
+        self._seeds = list(patterns)
+
+    # ------------------------------------------------------------------
+    # Training
+    # ------------------------------------------------------------------
+
+    def train(self) -> bool:
+        """Retrain from the logged outcomes (blocking)."""
+        collection = self._get_collection()
+        if collection is None:
+            return False
+
+        try:
+            outcomes = list(
+                collection.find({}, {"_id": 0, "kind": 1, "query": 1, "label": 1, "conversation_type": 1})
+                .sort("created_at", -1)
+                .limit(self.max_examples)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load query outcomes: {e}")
+            return False
+
+        categories = []
+        rewrites = defaultdict(list)
+        for outcome in outcomes:
+            example = (outcome.get("query", ""), outcome.get("label"))
+            if outcome.get("kind") == "category":
+                categories.append(example)
+            elif outcome.get("kind") == "rewrite":
+                rewrites[outcome.get("conversation_type", "start")].append(example)
+
+        category_model = None
+        if len(categories) >= self.min_examples:
+            category_model = _train_gated(
+                NaiveBayesModel, categories, self._seeds, self.min_confidence, self.min_precision
+            )
+
+        rewrite_models = {}
+        for conversation_type, examples in rewrites.items():
+            if len(examples) >= self.min_examples:
+                gated = _train_gated(
+                    RewriteModel, examples, [], self.min_confidence, self.min_precision
+                )
+                if gated and "unchanged" in gated.trusted:
+                    rewrite_models[conversation_type] = gated
+
+        with self._lock:
+            self._category_model = category_model
+            self._rewrite_models = rewrite_models
+            self.stats["trainings"] += 1
+            self.stats["training_examples"] = len(outcomes)
+
+        logger.info(
+            f"🧠 Query classifier trained on {len(outcomes)} outcomes "
+            f"(trusted categories: {sorted(category_model.trusted) if category_model else []}, "
+            f"rewrite skipping: {sorted(rewrite_models)})"
+        )
+        return True
+
+    def _run_training(self):
+        try:
+            self.train()
+        except Exception as e:
+            logger.error(f"Query classifier training failed: {e}")
+        finally:
+            self._training = False
+
+    def _schedule_training(self):
+        """Retrain in the background once enough new outcomes have been logged."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # _since_training is also advanced by _flush on executor threads
+        with self._lock:
+            if self._training or self._since_training < self.retrain_every:
+                return
+            self._training = True
+            self._since_training = 0
+        loop.run_in_executor(None, self._run_training)
+
+    async def initialize(self):
+        """Train from the logged outcomes without blocking the event loop."""
+        if not self.enabled:
+            return
+        self._training = True
+        await asyncio.get_running_loop().run_in_executor(None, self._run_training)
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+
+    def predict_category(self, query: str, in_conversation: bool = False) -> Optional[Tuple[str, float]]:
+        """(category, confidence) when a trusted label is predicted confidently, else None."""
+        gated = self._category_model
+        if not self.enabled or gated is None:
+            return None
+        if in_conversation and _REFERRING_RE.search(query):
+            return None
+
+        category, confidence = gated.model.predict(query)
+        if confidence < self.min_confidence or category not in gated.trusted:
+            return None
+        self.stats["category_predictions"] += 1
+        return category, confidence
+
+    def is_well_formed(self, query: str, conversation_type: str) -> bool:
+        """True when the LLM rewrite for this conversation type is predicted to change nothing."""
+        gated = self._rewrite_models.get(conversation_type)
+        if not self.enabled or gated is None:
+            return False
+        if conversation_type == "continue" and _REFERRING_RE.search(query):
+            return False
+
+        label, confidence = gated.model.predict(query)
+        if label != "unchanged" or confidence < self.min_confidence:
+            return False
+        self.stats["rewrites_skipped"] += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Outcome logging
+    # ------------------------------------------------------------------
+
+    def record_category(self, query: str, category: str):
+        """Log a category decided by the LLM."""
+        self._record({"kind": "category", "query": query, "label": category})
+
+    def record_rewrite(self, query: str, conversation_type: str, rewritten: bool):
+        """Log whether the LLM rewrite changed a query."""
+        self._record({
+            "kind": "rewrite",
+            "query": query,
+            "label": "rewritten" if rewritten else "unchanged",
+            "conversation_type": conversation_type
+        })
+
+    def _record(self, outcome: Dict):
+        if not self.enabled or not outcome.get("query"):
+            return
+        outcome["created_at"] = datetime.utcnow()
+        with self._lock:
+            self._buffer.append(outcome)
+            if len(self._buffer) < _FLUSH_SIZE:
+                return
+            batch, self._buffer = self._buffer, []
+
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._flush, batch)
+        except RuntimeError:
+            self._flush(batch)
+
+        self._schedule_training()
+
+    def _flush(self, batch: List[Dict]):
+        collection = self._get_collection()
+        if collection is None:
+            return
+        try:
+            collection.insert_many(batch, ordered=False)
+            with self._lock:
+                self.stats["outcomes_logged"] += len(batch)
+                self._since_training += len(batch)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to log query outcomes: {e}")
+
+    def get_stats(self) -> Dict:
+        category_model = self._category_model
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "trusted_categories": category_model.trusted if category_model else {},
+            "rewrite_skipping": sorted(self._rewrite_models)
+        }
+
+
+# Global instance
+_query_classifier: Optional[QueryClassifier] = None
+
+
+def get_query_classifier() -> QueryClassifier:
+    """Get the local query classifier."""
+    global _query_classifier
+    if _query_classifier is None:
+        _query_classifier = QueryClassifier(
+            enabled=settings.QUERY_CLASSIFIER_ENABLED,
+            min_confidence=settings.QUERY_CLASSIFIER_MIN_CONFIDENCE,
+            min_precision=settings.QUERY_CLASSIFIER_MIN_PRECISION,
+            min_examples=settings.QUERY_CLASSIFIER_MIN_EXAMPLES,
+            max_examples=settings.QUERY_CLASSIFIER_MAX_EXAMPLES,
+            retrain_every=settings.QUERY_CLASSIFIER_RETRAIN_EVERY,
+            retention_days=settings.QUERY_CLASSIFIER_RETENTION_DAYS
+        )
+    return _query_classifier
@@ -1,16 +1,26 @@
 """
-Ultra-fast reranker replacement - no ML dependencies.
+Ultra-fast reranker: vectorized BM25 plus score boosts, with an optional
+CPU cross-encoder pass over the top-k only.
 """
 
 import asyncio
 import time
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+
 from app.config import get_settings
 from app.core.exceptions import RAGException
+from app.services.rag.bm25 import (
+    bm25_scores,
+    get_corpus_stats_store,
+    idf,
+    stats_scope,
+    term_frequencies,
+    tokenize
+)
 from app.utils.logger import get_logger
 from app.constants import (
-    TITLE_EXACT_MATCH_BOOST,
     TITLE_PARTIAL_MATCH_BOOST,
     SOURCE_EXACT_MATCH_BOOST,
     QUERY_TERM_MATCH_BOOST,
@@ -23,16 +33,46 @@ settings = get_settings()
 
 
 class UltraFastReranker:
-    """Ultra-fast reranker using only similarity scores and query matching."""
+    """Ultra-fast reranker using similarity scores, BM25 and query matching."""
     
     def __init__(self):
-        self.is_initialized = True  # No initialization needed
+        self.is_initialized = False
         self.min_score_threshold = getattr(settings, 'RERANKER_MIN_SCORE', 0.3)
         self.top_k_default = getattr(settings, 'TOP_K_RERANK', 8)
+        self.bm25_weight = settings.RERANKER_BM25_WEIGHT
+        self.bm25_k1 = settings.RERANKER_BM25_K1
+        self.bm25_b = settings.RERANKER_BM25_B
+        self.stats_timeout = settings.RERANKER_BM25_STATS_TIMEOUT
+        self.corpus_stats = get_corpus_stats_store()
+        self.cross_encoder = None
+        self.cross_encoder_weight = settings.RERANKER_CROSS_ENCODER_WEIGHT
     
     async def initialize(self):
-        """No initialization needed for ultra-fast reranker."""
-        pass
+        """Load the optional cross-encoder (CPU) off the event loop."""
+        if self.is_initialized:
+            return
+        self.is_initialized = True
+
+        if settings.RERANKER_CROSS_ENCODER_ENABLED:
+            loop = asyncio.get_running_loop()
+            self.cross_encoder = await loop.run_in_executor(None, self._load_cross_encoder)
+    
+    def _load_cross_encoder(self):
+        try:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(
+                settings.RERANKER_MODEL,
+                max_length=settings.RERANKER_MAX_LENGTH,
+                device="cpu"
+            )
+            logger.info(f"✅ Cross-encoder loaded for top-k reranking: {settings.RERANKER_MODEL}")
+            return model
+        except ImportError:
+            logger.warning("⚠️ sentence-transformers not installed, cross-encoder stage disabled")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load cross-encoder {settings.RERANKER_MODEL}: {e}")
+        return None
     
     async def rerank_results(
         self, 
@@ -40,7 +80,7 @@ class UltraFastReranker:
         results: List[Dict[str, Any]], 
         top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Ultra-fast reranking using scores and query matching."""
+        """Rerank all candidates in one vectorized pass, then refine the top-k."""
         
         if not results:
             return []
@@ -52,45 +92,44 @@ class UltraFastReranker:
             logger.info(f"Ultra-fast reranking {len(results)} results")
             
             query_lower = query.lower().strip()
-            query_words = set(query_lower.split())
+            query_terms = list(dict.fromkeys(tokenize(query_lower)))
+            contents = [self._extract_content(result).lower() for result in results]
             
-            # Process each result
-            for result in results:
-                # Get base similarity score
-                base_score = (
-                    result.get("score", 0.0) or 
-                    result.get("similarity_score", 0.0) or 
-                    0.0
-                )
-                
-                # Extract content for matching
-                content = self._extract_content(result).lower()
-                content_words = set(content.split())
-                
-                # Calculate boosts
-                word_overlap_boost = self._calculate_word_overlap_boost(query_words, content_words)
-                phrase_boost = self._calculate_phrase_boost(query_lower, content)
-                source_boost = self._calculate_source_boost(result)
-                
-                # Final rerank score
-                total_boost = word_overlap_boost + phrase_boost + source_boost
-                final_score = min(1.0, max(0.0, base_score + total_boost))
-                
-                result["rerank_score"] = final_score
-                result["rerank_raw_score"] = final_score
+            base_scores = np.array([
+                result.get("score", 0.0) or result.get("similarity_score", 0.0) or 0.0
+                for result in results
+            ], dtype=np.float32)
             
-            # Sort by rerank score (descending)
-            reranked = sorted(
-                results,
-                key=lambda x: x.get("rerank_raw_score", 0.0),
-                reverse=True
+            lexical_scores = await self._bm25_scores(results, contents, query_terms)
+            query_phrases = self._query_phrases(query_lower)
+            phrase_boosts = np.array(
+                [self._calculate_phrase_boost(query_lower, query_phrases, content) for content in contents],
+                dtype=np.float32
+            )
+            source_boosts = np.array(
+                [self._calculate_source_boost(result) for result in results],
+                dtype=np.float32
+            )
+            
+            final_scores = np.clip(
+                base_scores + self.bm25_weight * lexical_scores + phrase_boosts + source_boosts,
+                0.0, 1.0
             )
             
-            # Filter by threshold and limit
-            filtered = [
-                r for r in reranked 
-                if r.get("rerank_score", 0.0) >= self.min_score_threshold
-            ][:top_k]
+            # Stable sort keeps retrieval order among ties
+            order = np.argsort(-final_scores, kind="stable")
+            selected = [int(i) for i in order if final_scores[i] >= self.min_score_threshold][:top_k]
+            
+            filtered = []
+            for i in selected:
+                result = results[i]
+                result["bm25_score"] = float(lexical_scores[i])
+                result["rerank_score"] = float(final_scores[i])
+                result["rerank_raw_score"] = float(final_scores[i])
+                filtered.append(result)
+            
+            if self.cross_encoder is not None and len(filtered) > 1:
+                filtered = await self._cross_encode(query, filtered)
             
             processing_time = time.perf_counter() - start_time
             logger.info(f"Ultra-fast reranking completed in {processing_time:.4f}s -> {len(filtered)} results")
@@ -106,6 +145,64 @@ class UltraFastReranker:
                 reverse=True
             )[:top_k]
     
+    async def _bm25_scores(
+        self,
+        results: List[Dict[str, Any]],
+        contents: List[str],
+        query_terms: List[str]
+    ) -> np.ndarray:
+        """BM25 for every candidate, normalised to [0, 1] by the best candidate."""
+        if not query_terms:
+            return np.zeros(len(results), dtype=np.float32)
+        
+        tf, doc_lengths = term_frequencies(contents, query_terms)
+        
+        # Candidate-set IDF for graph items and collections without ingest statistics
+        local_idf = idf(len(results), (tf > 0).sum(axis=0).astype(np.float32))
+        idf_matrix = np.tile(local_idf, (len(results), 1))
+        
+        scopes = [stats_scope(result) for result in results]
+        unique_scopes = sorted({scope for scope in scopes if scope})
+        if unique_scopes:
+            idf_by_scope = await self.corpus_stats.get_idf_async(
+                unique_scopes, query_terms, timeout=self.stats_timeout
+            )
+            if idf_by_scope:
+                scope_array = np.array([scope or "" for scope in scopes])
+                for scope, scope_idf in idf_by_scope.items():
+                    idf_matrix[scope_array == scope] = scope_idf
+        
+        scores = bm25_scores(tf, doc_lengths, idf_matrix, k1=self.bm25_k1, b=self.bm25_b)
+        best = float(scores.max()) if scores.size else 0.0
+        return scores / best if best > 0 else scores
+    
+    async def _cross_encode(self, query: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Blend cross-encoder relevance into the top-k and reorder them."""
+        pairs = [(query, self._extract_content(result)) for result in candidates]
+        loop = asyncio.get_running_loop()
+        
+        try:
+            logits = await loop.run_in_executor(
+                None,
+                lambda: self.cross_encoder.predict(
+                    pairs, batch_size=settings.RERANKER_BATCH_SIZE, show_progress_bar=False
+                )
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Cross-encoder scoring failed, keeping lexical order: {e}")
+            return candidates
+        
+        relevance = 1.0 / (1.0 + np.exp(-np.asarray(logits, dtype=np.float32)))
+        for result, score in zip(candidates, relevance):
+            result["cross_encoder_score"] = float(score)
+            result["rerank_score"] = float(
+                (1.0 - self.cross_encoder_weight) * result["rerank_score"]
+                + self.cross_encoder_weight * score
+            )
+            result["rerank_raw_score"] = result["rerank_score"]
+        
+        return sorted(candidates, key=lambda x: x["rerank_score"], reverse=True)
+    
     def _extract_content(self, result: Dict[str, Any]) -> str:
         """Extract content from result for analysis."""
         source_type = result.get("source", "")
@@ -131,18 +228,14 @@ class UltraFastReranker:
         # Truncate for performance
         return content[:CHUNK_CONTENT_PREVIEW_LENGTH] if content else ""
     
-    def _calculate_word_overlap_boost(self, query_words: set, content_words: set) -> float:
-        """Calculate boost based on word overlap."""
-        if not query_words or not content_words:
-            return 0.0
-        
-        overlap_count = len(query_words & content_words)
-        overlap_ratio = overlap_count / len(query_words)
-        
-        # Boost up to TITLE_EXACT_MATCH_BOOST based on overlap
-        return min(TITLE_EXACT_MATCH_BOOST, overlap_ratio * 0.2)
+    def _query_phrases(self, query_lower: str) -> List[str]:
+        """3-word phrases checked for partial matches of longer queries."""
+        query_parts = query_lower.split()
+        if len(query_lower) <= 20 or len(query_parts) < 3:
+            return []
+        return [" ".join(query_parts[i:i+3]) for i in range(len(query_parts) - 2)]
     
-    def _calculate_phrase_boost(self, query_lower: str, content_lower: str) -> float:
+    def _calculate_phrase_boost(self, query_lower: str, query_phrases: List[str], content_lower: str) -> float:
         """Calculate boost for exact phrase matches."""
         if not query_lower or not content_lower:
             return 0.0
@@ -152,14 +245,8 @@ class UltraFastReranker:
             return TITLE_PARTIAL_MATCH_BOOST
 
         # Partial phrase matches for longer queries
-        if len(query_lower) > 20:
-            query_parts = query_lower.split()
-            if len(query_parts) >= 3:
-                # Check for 3-word phrases
-                for i in range(len(query_parts) - 2):
-                    phrase = " ".join(query_parts[i:i+3])
-                    if phrase in content_lower:
-                        return SOURCE_EXACT_MATCH_BOOST
+        if any(phrase in content_lower for phrase in query_phrases):
+            return SOURCE_EXACT_MATCH_BOOST
         
         return 0.0
     
@@ -178,17 +265,19 @@ class UltraFastReranker:
         return 0.0
     
     async def health_check(self) -> bool:
-        """Health check - always healthy since no dependencies."""
+        """Health check - always healthy; BM25 statistics and cross-encoder are optional."""
         return True
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics."""
         return {
-            "type": "ultra_fast_score_based",
-            "dependencies": "none",
+            "type": "ultra_fast_bm25",
+            "cross_encoder": settings.RERANKER_MODEL if self.cross_encoder is not None else None,
             "speed": "ultra_fast",
-            "is_initialized": True,
-            "min_score_threshold": self.min_score_threshold
+            "is_initialized": self.is_initialized,
+            "min_score_threshold": self.min_score_threshold,
+            "bm25_weight": self.bm25_weight,
+            "corpus_stats": self.corpus_stats.get_stats()
         }
 
 
@@ -198,4 +287,6 @@ ultra_fast_reranker = UltraFastReranker()
 
 async def get_reranker_service() -> UltraFastReranker:
     """Get the ultra-fast reranker service."""
+    if not ultra_fast_reranker.is_initialized:
+        await ultra_fast_reranker.initialize()
     return ultra_fast_reranker
\ No newline at end of file
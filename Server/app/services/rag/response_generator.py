@@ -1,6 +1,6 @@
 """
-Clean response generation service with PURE SCORE-BASED context building.
-Prioritizes highest relevance scores across all sources - no diversity guarantees.
+Clean response generation service with TOKEN-BUDGETED score-based context building.
+Packs the highest relevance per token across all sources - no diversity guarantees.
 STP is now handled AFTER response generation in the chain service.
 Features: Robust parsing with smart === marker detection, paragraph preservation
 """
@@ -13,6 +13,7 @@ from dataclasses import dataclass
 
 from app.config import get_settings
 from app.services.llm.factory import get_llm
+from app.services.llm.tokenizer import get_token_counter
 from app.services.prompts.manager import get_prompt_manager
 from app.core.exceptions import RAGException
 from app.utils.logger import get_logger
@@ -28,23 +29,26 @@ class GenerationResult:
     content: str
     generation_time: float
     context_length: int
+    context_tokens: int = 0
 
 
 class ResponseGeneratorService:
-    """Response generator with pure score-based context building and smart parsing."""
+    """Response generator with token-budgeted score-based context building and smart parsing."""
     
     def __init__(self):
         self.llm = None
         self.prompt_manager = None
         self.is_initialized = False
-        self.max_context_length = settings.MAX_CONTEXT_LENGTH
+        self.max_context_tokens = settings.MAX_CONTEXT_TOKENS
+        self.max_memory_tokens = settings.MAX_MEMORY_TOKENS
         self.response_timeout = settings.OLLAMA_TIMEOUT
+        self.token_counter = get_token_counter()
         
-        # Content length limits per source type
-        self.CONTENT_LIMITS = {
-            "chunk": 400,
-            "summary": 300,
-            "graph": 200
+        # Token limits per item by source type
+        self.CONTENT_TOKEN_LIMITS = {
+            "chunk": 256,
+            "summary": 192,
+            "graph": 128
         }
         
         # Performance tracking
@@ -60,9 +64,11 @@ class ResponseGeneratorService:
     async def initialize(self):
         """Initialize the response generator."""
         try:
-            self.llm, self.prompt_manager = await asyncio.gather(
+            loop = asyncio.get_running_loop()
+            self.llm, self.prompt_manager, _ = await asyncio.gather(
                 get_llm(),
-                get_prompt_manager()
+                get_prompt_manager(),
+                loop.run_in_executor(None, self.token_counter.load)
             )
             
             self.is_initialized = True
@@ -93,11 +99,12 @@ class ResponseGeneratorService:
         self.performance_stats["start_conversations"] += 1
         
         try:
-            # Build context using pure score-based method
-            context, context_length = self._build_context_by_score(
+            # Build context using score-per-token packing
+            context, context_length, context_tokens = self._build_context_by_score(
                 chunks=chunks[:settings.MAX_CONTEXT_CHUNKS],
                 summaries=summaries[:settings.MAX_CONTEXT_SUMMARIES],
-                graph_data=graph_data[:settings.MAX_CONTEXT_GRAPH_ITEMS]
+                graph_data=graph_data[:settings.MAX_CONTEXT_GRAPH_ITEMS],
+                token_budget=self.max_context_tokens
             )
             
             # Generate prompt
@@ -125,13 +132,14 @@ class ResponseGeneratorService:
             generation_time = time.perf_counter() - start_time
             self._update_stats(generation_time)
             
-            logger.info(f"✅ Generated start response in {generation_time:.3f}s")
+            logger.info(f"✅ Generated start response in {generation_time:.3f}s ({context_tokens} context tokens)")
             
             return GenerationResult(
                 title=title,
                 content=content,
                 generation_time=generation_time,
-                context_length=context_length
+                context_length=context_length,
+                context_tokens=context_tokens
             )
             
         except Exception as e:
@@ -161,15 +169,17 @@ class ResponseGeneratorService:
         self.performance_stats["continue_conversations"] += 1
         
         try:
+            # Memory comes out of the same token budget as the retrieved context
+            optimized_memory, memory_tokens = self._optimize_memory(conversation_memory)
+            
             # Build context
-            context, context_length = self._build_context_by_score(
+            context, context_length, context_tokens = self._build_context_by_score(
                 chunks=chunks[:settings.MAX_CONTEXT_CHUNKS + 2],
                 summaries=summaries[:settings.MAX_CONTEXT_SUMMARIES + 1],
-                graph_data=graph_data[:settings.MAX_CONTEXT_GRAPH_ITEMS + 1]
+                graph_data=graph_data[:settings.MAX_CONTEXT_GRAPH_ITEMS + 1],
+                token_budget=self.max_context_tokens - memory_tokens
             )
             
-            optimized_memory = self._optimize_memory(conversation_memory)
-            
             # Generate prompt
             if context_length > 0:
                 prompt = self.prompt_manager.render_continue_conversation_prompt(
@@ -201,13 +211,15 @@ class ResponseGeneratorService:
             generation_time = time.perf_counter() - start_time
             self._update_stats(generation_time)
             
-            logger.info(f"✅ Generated continue response in {generation_time:.3f}s")
+            logger.info(f"✅ Generated continue response in {generation_time:.3f}s "
+                        f"({context_tokens} context + {memory_tokens} memory tokens)")
 
             return GenerationResult(
                 title=None,  # No title for continue conversations
                 content=content,
                 generation_time=generation_time,
-                context_length=context_length
+                context_length=context_length,
+                context_tokens=context_tokens + memory_tokens
             )
             
         except Exception as e:
@@ -486,15 +498,21 @@ class ResponseGeneratorService:
         
         return result if result else None
     
-    def _build_context_by_score(self, chunks, summaries, graph_data) -> tuple[str, int]:
-        """Build context by pure score priority - highest scores win."""
+    def _build_context_by_score(self, chunks, summaries, graph_data,
+                                token_budget: Optional[int] = None) -> Tuple[str, int, int]:
+        """
+        Pack context into a token budget - greedy by relevance score per token.
+
+        Returns (context, context length in characters, context tokens).
+        """
         
         chunks = chunks or []
         summaries = summaries or []
         graph_data = graph_data or []
+        budget = self.max_context_tokens if token_budget is None else max(0, token_budget)
         
         if not chunks and not summaries and not graph_data:
-            return "No relevant data found.", 25
+            return "No relevant data found.", 25, self.token_counter.count("No relevant data found.")
         
         # Combine all sources with scores
         all_items = []
@@ -520,21 +538,49 @@ class ResponseGeneratorService:
                 "score": graph.get("rerank_score", graph.get("score", 0.0))
             })
         
-        # Sort by score (highest first)
-        all_items.sort(key=lambda x: x["score"], reverse=True)
-        
-        # Build context until full
-        context_parts = []
-        current_length = 0
+        # Scores are min-max normalised so raw (possibly negative) reranker logits still rank by value
+        scores = [item["score"] for item in all_items]
+        low, high = min(scores), max(scores)
+        spread = (high - low) or 1.0
         
-        for item in all_items:
+        candidates = []
+        for order, item in enumerate(all_items):
             text = self._format_item(item)
-            if current_length + len(text) > self.max_context_length:
-                break
-            context_parts.append(text)
-            current_length += len(text)
-        
-        return "\n".join(context_parts) if context_parts else "No relevant content.", current_length
+            tokens = max(1, self.token_counter.count(text))
+            value = (item["score"] - low) / spread + 1e-6
+            candidates.append((value / tokens, item["score"], order, text, tokens))
+        
+        # Greedy fill by value per token, and the same fill seeded with the top-scored item;
+        # keeping the more valuable of the two stops a long best item losing to many short ones
+        candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+        selected, used_tokens, value = self._pack_candidates(candidates, budget)
+        top = max(candidates, key=lambda c: (c[1], -c[2]))
+        if top not in selected and top[4] <= budget:
+            seeded = self._pack_candidates(candidates, budget, seed=top)
+            if seeded[2] > value:
+                selected, used_tokens, value = seeded
+        
+        if not selected:
+            return "No relevant content.", 0, 0
+        
+        # Present the chosen items highest score first
+        selected.sort(key=lambda c: (-c[1], c[2]))
+        context = "\n".join(candidate[3] for candidate in selected)
+        return context, len(context), used_tokens
+    
+    @staticmethod
+    def _pack_candidates(candidates: List[tuple], budget: int, seed: Optional[tuple] = None) -> Tuple[List[tuple], int, float]:
+        """Fill the budget in candidate order, skipping items that no longer fit."""
+        selected = [seed] if seed else []
+        used_tokens = seed[4] if seed else 0
+        value = seed[0] * seed[4] if seed else 0.0
+        for candidate in candidates:
+            if candidate is seed or used_tokens + candidate[4] > budget:
+                continue
+            selected.append(candidate)
+            used_tokens += candidate[4]
+            value += candidate[0] * candidate[4]
+        return selected, used_tokens, value
     
     def _format_item(self, item: Dict[str, Any]) -> str:
         """Format a context item."""
@@ -543,29 +589,45 @@ class ResponseGeneratorService:
         doc_name = item.get("doc_name", "Unknown")[:30]
         
         if source_type == "chunk":
-            content = item.get("content", "")[:self.CONTENT_LIMITS["chunk"]]
+            content = self.token_counter.truncate(item.get("content", ""), self.CONTENT_TOKEN_LIMITS["chunk"])
             return f"[Chunk: {doc_name} ({score:.2f})]\n{content}\n"
         elif source_type == "summary":
-            content = item.get("summary", item.get("content", ""))[:self.CONTENT_LIMITS["summary"]]
+            content = self.token_counter.truncate(item.get("summary", item.get("content", "")),
+                                                  self.CONTENT_TOKEN_LIMITS["summary"])
             return f"[Summary: {doc_name} ({score:.2f})]\n{content}\n"
         else:  # graph
-            content = item.get("content", "")[:self.CONTENT_LIMITS["graph"]]
+            content = self.token_counter.truncate(item.get("content", ""), self.CONTENT_TOKEN_LIMITS["graph"])
             entities = item.get("entities", []) or []
             text = f"[Graph: {doc_name} ({score:.2f})]\n{content}"
             if entities:
                 text += f"\nEntities: {', '.join(entities[:5])}"
             return text + "\n"
     
-    def _optimize_memory(self, memory: str) -> str:
-        """Optimize conversation memory."""
-        if not memory or len(memory) <= 500:
-            return memory
-        
-        lines = memory.split('\n')
-        recent = lines[-6:] if len(lines) > 6 else lines
-        optimized = '\n'.join(recent)
+    def _optimize_memory(self, memory: str) -> Tuple[str, int]:
+        """Keep the most recent memory lines that fit MAX_MEMORY_TOKENS; returns (memory, tokens)."""
+        if not memory:
+            return memory, 0
+        
+        budget = self.max_memory_tokens
+        total = self.token_counter.count(memory)
+        if total <= budget:
+            return memory, total
+        
+        kept = []
+        used = 0
+        for line in reversed(memory.split('\n')):
+            tokens = self.token_counter.count(line) + 1  # newline
+            if used + tokens > budget:
+                if not kept:
+                    # Newest line alone is too long: keep its end
+                    line = self.token_counter.truncate(line, budget, keep_end=True)
+                    kept.append(line)
+                    used = self.token_counter.count(line)
+                break
+            kept.append(line)
+            used += tokens
         
-        return optimized[-500:] if len(optimized) > 500 else optimized
+        return '\n'.join(reversed(kept)), used
     
     async def _generate_llm_response_with_timeout(self, prompt: str) -> str:
         """Generate LLM response with timeout."""
@@ -609,7 +671,8 @@ class ResponseGeneratorService:
         
         return {
             **self.performance_stats,
-            "context_building_method": "pure_score_based",
+            "context_building_method": "token_budget_score_per_token",
+            "token_counter": self.token_counter.get_stats(),
             "parsing_method": "smart_marker_detection",
             "parsing_success_rate": self.performance_stats["parsing_successes"] / total_parsing if total_parsing > 0 else 0.0,
             "start_ratio": self.performance_stats["start_conversations"] / total if total > 0 else 0.0,
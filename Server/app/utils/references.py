@@ -1,5 +1,4 @@
-import asyncio
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from app.config import get_settings
 from app.services.external.minio import get_minio_client
 from app.utils.logger import get_logger
@@ -37,50 +36,27 @@ async def process_references_with_shareable_urls_and_count(
     
     minio_client = get_minio_client()
     
-    # Create tasks for parallel processing
-    tasks = []
-    
-    # Process chunks
-    if chunks:
-        chunk_task = asyncio.create_task(
-            _process_chunks_parallel_with_shareable_urls(chunks, minio_client)
-        )
-        tasks.append(chunk_task)
-    else:
-        tasks.append(asyncio.create_task(_get_empty_list()))
-    
-    # Process summaries
-    if summaries:
-        summary_task = asyncio.create_task(
-            _process_summaries_parallel_with_shareable_urls(summaries, minio_client)
-        )
-        tasks.append(summary_task)
-    else:
-        tasks.append(asyncio.create_task(_get_empty_list()))
-    
-    # Process graph documents with document_name
-    if graph_documents:
-        graph_docs_task = asyncio.create_task(
-            _process_graph_documents_parallel_with_shareable_urls(graph_documents, minio_client)
-        )
-        tasks.append(graph_docs_task)
-    else:
-        tasks.append(asyncio.create_task(_get_empty_list()))
-    
-    # Execute all URL processing tasks in parallel
+    # Candidate documents per reference, in chunk, summary, graph order
+    items = []
+    for index, chunk in enumerate(chunks or []):
+        item = _reference_item(chunk, "chunk", index, _chunk_candidates, ("rerank_score", "similarity_score", "score"))
+        if item:
+            items.append(item)
+    for index, summary in enumerate(summaries or []):
+        item = _reference_item(summary, "summary", index, _summary_candidates, ("rerank_score", "similarity_score", "score"))
+        if item:
+            items.append(item)
+    for index, graph_doc in enumerate(graph_documents):
+        item = _reference_item(graph_doc, "graph document", index, _graph_document_candidates, ("similarity_score", "score", "relevance_score"))
+        if item:
+            items.append(item)
+    
+    # Resolve every distinct document once, in batched MinIO lookups
     try:
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        all_references = await _resolve_references(items, minio_client)
     except Exception as e:
-        logger.error(f"Error in parallel shareable URL processing: {e}")
-        results = [[], [], []]
-    
-    # Handle results
-    chunk_refs = results[0] if not isinstance(results[0], Exception) else []
-    summary_refs = results[1] if not isinstance(results[1], Exception) else []
-    graph_doc_refs = results[2] if not isinstance(results[2], Exception) else []
-    
-    # Combine all references
-    all_references = chunk_refs + summary_refs + graph_doc_refs
+        logger.error(f"Error in batched shareable URL processing: {e}")
+        all_references = []
     
     # Filter and deduplicate
     valid_references = _filter_references_with_valid_shareable_urls(all_references)
@@ -104,286 +80,152 @@ async def process_references_with_shareable_urls_and_count(
     }
 
 
-async def _process_chunks_parallel_with_shareable_urls(
-    chunks: List[Dict[str, Any]], 
-    minio_client
-) -> List[Dict[str, Any]]:
-    """Process chunks in parallel with MinIO shareable URL generation."""
-    
-    tasks = []
-    for i, chunk in enumerate(chunks):
-        task = asyncio.create_task(
-            _extract_reference_from_chunk_with_shareable_url(chunk, minio_client, i)
-        )
-        tasks.append(task)
+def _reference_item(
+    item: Dict[str, Any],
+    kind: str,
+    index: int,
+    candidates_for: Callable[[Dict[str, Any]], List[Tuple[str, str, bool]]],
+    score_fields: Tuple[str, ...]
+) -> Optional[Tuple[List[Tuple[str, str, bool]], float]]:
+    """Candidate (doc_name, bucket_source, is_news) list and display score for one retrieved item."""
     
     try:
-        semaphore = asyncio.Semaphore(8)
-        
-        async def limited_task(task):
-            async with semaphore:
-                return await task
-        
-        limited_tasks = [limited_task(task) for task in tasks]
-        results = await asyncio.gather(*limited_tasks, return_exceptions=True)
+        candidates = candidates_for(item)
+        if not candidates:
+            return None
         
-        chunk_refs = [ref for ref in results if ref and not isinstance(ref, Exception)]
-        return chunk_refs
+        raw_score = next((item.get(field) for field in score_fields if item.get(field)), 0.0)
+        return candidates, round(float(raw_score) * 100, 1)
         
     except Exception as e:
-        logger.error(f"Error processing chunks with shareable URLs: {e}")
-        return []
+        logger.warning(f"Error extracting {kind} reference {index}: {e}")
+        return None
 
 
-async def _process_summaries_parallel_with_shareable_urls(
-    summaries: List[Dict[str, Any]], 
-    minio_client
-) -> List[Dict[str, Any]]:
-    """Process summaries in parallel with MinIO shareable URL generation."""
-    
-    tasks = []
-    for i, summary in enumerate(summaries):
-        task = asyncio.create_task(
-            _extract_reference_from_summary_with_shareable_url(summary, minio_client, i)
-        )
-        tasks.append(task)
+def _chunk_candidates(chunk: Dict[str, Any]) -> List[Tuple[str, str, bool]]:
+    """The document a chunk came from."""
+    bucket_source = chunk.get("bucket_source", "").lower()
+    is_news = bucket_source == "news" or chunk.get("collection") == "News"
     
-    try:
-        semaphore = asyncio.Semaphore(8)
-        
-        async def limited_task(task):
-            async with semaphore:
-                return await task
-        
-        limited_tasks = [limited_task(task) for task in tasks]
-        results = await asyncio.gather(*limited_tasks, return_exceptions=True)
-        
-        summary_refs = [ref for ref in results if ref and not isinstance(ref, Exception)]
-        return summary_refs
-        
-    except Exception as e:
-        logger.error(f"Error processing summaries with shareable URLs: {e}")
-        return []
+    if is_news:
+        return [(chunk.get("doc_name", ""), bucket_source, True)]
+    return [(chunk.get("doc_name", "Unknown Document"), bucket_source, False)]
 
 
-async def _process_graph_documents_parallel_with_shareable_urls(
-    graph_documents: List[Dict[str, Any]], 
-    minio_client
-) -> List[Dict[str, Any]]:
-    """Process graph documents with document_name in parallel with MinIO shareable URL generation."""
-    
-    tasks = []
-    for i, graph_doc in enumerate(graph_documents):
-        task = asyncio.create_task(
-            _extract_reference_from_graph_document_with_shareable_url(graph_doc, minio_client, i)
-        )
-        tasks.append(task)
+def _summary_candidates(summary: Dict[str, Any]) -> List[Tuple[str, str, bool]]:
+    """The document a summary describes."""
+    bucket_source = summary.get("bucket_source", "").lower()
+    is_news = bucket_source == "news" or summary.get("collection") == "News"
     
-    try:
-        semaphore = asyncio.Semaphore(8)
-        
-        async def limited_task(task):
-            async with semaphore:
-                return await task
-        
-        limited_tasks = [limited_task(task) for task in tasks]
-        results = await asyncio.gather(*limited_tasks, return_exceptions=True)
-        
-        graph_doc_refs = [ref for ref in results if ref and not isinstance(ref, Exception)]
-        return graph_doc_refs
-        
-    except Exception as e:
-        logger.error(f"Error processing graph documents with shareable URLs: {e}")
-        return []
+    if is_news:
+        return [(summary.get("doc_name", "") or summary.get("title", ""), bucket_source, True)]
+    return [(summary.get("title", "") or summary.get("doc_name", "Unknown Document"), bucket_source, False)]
 
 
-async def _extract_reference_from_chunk_with_shareable_url(
-    chunk: Dict[str, Any], 
-    minio_client,
-    index: int
-) -> Dict[str, Any]:
-    """Extract clean reference from a document chunk with MinIO shareable URL generation."""
+def _graph_document_candidates(graph_doc: Dict[str, Any]) -> List[Tuple[str, str, bool]]:
+    """Documents a GraphRAG item cites, in the order they should be tried."""
     
-    try:
-        bucket_source = chunk.get("bucket_source", "").lower()
-        is_news = bucket_source == "news" or chunk.get("collection") == "News"
-        
-        if is_news:
-            source_url = chunk.get("doc_name", "")
-            doc_name = source_url
-            title = _create_title_from_news_url(source_url) or "News Article"
-            url = source_url
-            
-            if not _is_valid_news_url(url):
-                return None
-        else:
-            doc_name = chunk.get("doc_name", "Unknown Document")
-            title = _clean_document_name(doc_name)
-            url = await minio_client.generate_shareable_reference_url(doc_name, bucket_source)
-            
-            if not _is_valid_shareable_url(url):
-                return None
-        
-        raw_score = (
-            chunk.get("rerank_score") or 
-            chunk.get("similarity_score") or 
-            chunk.get("score", 0.0)
-        )
-        similarity_score = round(float(raw_score) * 100, 1)
-        
-        return {
-            "title": title,
-            "doc_name": doc_name,
-            "url": url,
-            "similarity_score": similarity_score
-        }
-        
-    except Exception as e:
-        logger.warning(f"Error extracting chunk reference {index}: {e}")
-        return None
+    # Get document_names array from metadata (preferred) or fall back to document_name string
+    doc_candidates = []
+    metadata = graph_doc.get("metadata", {})
 
+    # First try to get document_names array from metadata (this is the actual array from GraphRAG)
+    document_names_array = metadata.get("document_names", [])
 
-async def _extract_reference_from_summary_with_shareable_url(
-    summary: Dict[str, Any], 
-    minio_client,
-    index: int
-) -> Dict[str, Any]:
-    """Extract clean reference from a summary document with MinIO shareable URL generation."""
-    
-    try:
-        bucket_source = summary.get("bucket_source", "").lower()
-        is_news = bucket_source == "news" or summary.get("collection") == "News"
-        
-        if is_news:
-            source_url = summary.get("doc_name", "") or summary.get("title", "")
-            doc_name = source_url
-            title = _create_title_from_news_url(source_url) or "News Article"
-            url = source_url
-            
-            if not _is_valid_news_url(url):
-                return None
-        else:
-            doc_name = summary.get("title", "") or summary.get("doc_name", "Unknown Document")
-            title = _clean_document_name(doc_name)
-            url = await minio_client.generate_shareable_reference_url(doc_name, bucket_source)
-            
-            if not _is_valid_shareable_url(url):
-                return None
-        
-        raw_score = (
-            summary.get("rerank_score") or 
-            summary.get("similarity_score") or 
-            summary.get("score", 0.0)
+    if document_names_array and isinstance(document_names_array, list):
+        doc_candidates = [d.strip() if isinstance(d, str) else str(d) for d in document_names_array]
+    else:
+        # Fall back to document_name string (may be comma-separated)
+        document_name = (
+            graph_doc.get("document_name") or
+            metadata.get("document_name") or
+            graph_doc.get("doc_name") or
+            ""
         )
-        similarity_score = round(float(raw_score) * 100, 1)
-        
-        return {
-            "title": title,
-            "doc_name": doc_name,
-            "url": url,
-            "similarity_score": similarity_score
-        }
-        
-    except Exception as e:
-        logger.warning(f"Error extracting summary reference {index}: {e}")
-        return None
+        if document_name:
+            if ", " in document_name:
+                doc_candidates = [d.strip() for d in document_name.split(", ")]
+            else:
+                doc_candidates = [document_name]
+
+    # Get bucket information (empty string triggers multi-bucket search in MinIO)
+    bucket_source = (
+        graph_doc.get("bucket") or
+        metadata.get("bucket") or
+        metadata.get("bucket_source") or
+        ""
+    )
 
+    candidates = []
+    for candidate in doc_candidates:
+        if not candidate or candidate.lower() in ['unknown', 'test', '']:
+            continue
 
-async def _extract_reference_from_graph_document_with_shareable_url(
-    graph_doc: Dict[str, Any],
-    minio_client,
-    index: int
-) -> Dict[str, Any]:
-    """Extract clean reference from a GraphRAG document with MinIO shareable URL generation."""
+        # Check if candidate is a URL (news article)
+        is_url = candidate.startswith(("http://", "https://"))
+        candidates.append((candidate, bucket_source, bucket_source.lower() == "news" or is_url))
 
-    try:
-        # Get document_names array from metadata (preferred) or fall back to document_name string
-        doc_candidates = []
-        metadata = graph_doc.get("metadata", {})
+    return candidates
 
-        # First try to get document_names array from metadata (this is the actual array from GraphRAG)
-        document_names_array = metadata.get("document_names", [])
 
-        if document_names_array and isinstance(document_names_array, list):
-            doc_candidates = [d.strip() if isinstance(d, str) else str(d) for d in document_names_array]
-        else:
-            # Fall back to document_name string (may be comma-separated)
-            document_name = (
-                graph_doc.get("document_name") or
-                metadata.get("document_name") or
-                graph_doc.get("doc_name") or
-                ""
-            )
-            if document_name:
-                if ", " in document_name:
-                    doc_candidates = [d.strip() for d in document_name.split(", ")]
-                else:
-                    doc_candidates = [document_name]
-
-        if not doc_candidates:
-            return None
-
-        # Get bucket information (empty string triggers multi-bucket search in MinIO)
-        bucket_source = (
-            graph_doc.get("bucket") or
-            metadata.get("bucket") or
-            metadata.get("bucket_source") or
-            ""
-        )
+async def _resolve_references(
+    items: List[Tuple[List[Tuple[str, str, bool]], float]],
+    minio_client
+) -> List[Dict[str, Any]]:
+    """Build one reference per item from its first candidate with a valid URL.
 
-        # Try to find a valid document from the candidates
-        for candidate in doc_candidates:
-            if not candidate or candidate.lower() in ['unknown', 'test', '']:
-                continue
-
-            # Check if candidate is a URL (news article)
-            is_url = candidate.startswith(("http://", "https://"))
-            is_news = bucket_source.lower() == "news" or is_url
-
-            if is_news:
-                if _is_valid_news_url(candidate):
-                    title = _create_title_from_news_url(candidate) or "News Article"
-
-                    raw_score = (
-                        graph_doc.get("similarity_score") or
-                        graph_doc.get("score") or
-                        graph_doc.get("relevance_score", 0.0)
-                    )
-                    similarity_score = round(float(raw_score) * 100, 1)
-
-                    return {
-                        "title": title,
-                        "doc_name": candidate,
-                        "url": candidate,
+    Each round sends the current MinIO candidate of every unresolved item as a
+    single deduplicated batch; later candidates are only tried for items whose
+    earlier ones were not found.
+    """
+    
+    references: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    positions = [0] * len(items)
+    pending = list(range(len(items)))
+    
+    while pending:
+        lookups = {}
+        for i in pending:
+            candidates, similarity_score = items[i]
+            
+            # News candidates link to the article itself
+            while positions[i] < len(candidates) and candidates[positions[i]][2]:
+                source_url = candidates[positions[i]][0]
+                if _is_valid_news_url(source_url):
+                    references[i] = {
+                        "title": _create_title_from_news_url(source_url) or "News Article",
+                        "doc_name": source_url,
+                        "url": source_url,
                         "similarity_score": similarity_score
                     }
+                    break
+                positions[i] += 1
+            
+            if references[i] is None and positions[i] < len(candidates):
+                doc_name, bucket_source, _ = candidates[positions[i]]
+                lookups[i] = (doc_name, bucket_source)
+        
+        if not lookups:
+            break
+        
+        urls = await minio_client.generate_shareable_reference_urls(lookups.values())
+        
+        pending = []
+        for i, key in lookups.items():
+            url = urls.get(key)
+            if _is_valid_shareable_url(url):
+                references[i] = {
+                    "title": _clean_document_name(key[0]),
+                    "doc_name": key[0],
+                    "url": url,
+                    "similarity_score": items[i][1]
+                }
             else:
-                # Try to find this file in MinIO (searches all buckets)
-                url = await minio_client.generate_shareable_reference_url(candidate, bucket_source)
-
-                if _is_valid_shareable_url(url):
-                    title = _clean_document_name(candidate)
-
-                    raw_score = (
-                        graph_doc.get("similarity_score") or
-                        graph_doc.get("score") or
-                        graph_doc.get("relevance_score", 0.0)
-                    )
-                    similarity_score = round(float(raw_score) * 100, 1)
-
-                    return {
-                        "title": title,
-                        "doc_name": candidate,
-                        "url": url,
-                        "similarity_score": similarity_score
-                    }
-
-        # No valid document found from any candidate
-        return None
-
-    except Exception as e:
-        logger.warning(f"Error extracting graph document reference {index}: {e}")
-        return None
+                positions[i] += 1
+                if positions[i] < len(items[i][0]):
+                    pending.append(i)
+    
+    return [ref for ref in references if ref]
 
 
 def _create_title_from_news_url(source_url: str) -> str:
@@ -557,11 +399,6 @@ def _clean_document_name(doc_name: str) -> str:
     return cleaned_name
 
 
-async def _get_empty_list() -> List:
-    """Return empty list for parallel processing."""
-    return []
-
-
 # Main function
 async def process_references_with_urls_and_count(
     chunks: List[Dict[str, Any]],